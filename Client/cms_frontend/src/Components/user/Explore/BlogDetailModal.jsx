@@ -8,6 +8,7 @@ const BlogDetailModal = ({ blogId, isOpen, onClose }) => {
     const [isLiked, setIsLiked] = useState(false);
     const [likesCount, setLikesCount] = useState(0);
     const [comments, setComments] = useState([]);
+    const [commentsNext, setCommentsNext] = useState(null);
     const [newComment, setNewComment] = useState("");
     const [editingComment, setEditingComment] = useState(null);
     const [editingText, setEditingText] = useState("");
@@ -39,7 +40,8 @@ const BlogDetailModal = ({ blogId, isOpen, onClose }) => {
             const fetchComments = async () => {
                 try {
                     const response = await api.get(`explore/blogs/${blogId}/comments/`);
-                    setComments(response.data);
+                    setComments(response.data.results);
+                    setCommentsNext(response.data.next);
                 } catch (error) {
                     console.error("Error fetching comments:", error);
                     showError("Failed to fetch comments.");
@@ -120,6 +122,17 @@ const BlogDetailModal = ({ blogId, isOpen, onClose }) => {
         }
     };
 
+    const handleLoadMoreComments = async () => {
+        try {
+            const response = await api.get(commentsNext);
+            setComments((prev) => [...prev, ...response.data.results]);
+            setCommentsNext(response.data.next);
+        } catch (error) {
+            console.error("Error fetching comments:", error);
+            showError("Failed to fetch comments.");
+        }
+    };
+
     const handleAddComment = async () => {
         if (newComment.trim()) {
             try {
@@ -310,7 +323,7 @@ const BlogDetailModal = ({ blogId, isOpen, onClose }) => {
                                 <div className="mt-12 pt-8 border-t border-gray-200">
                                     <div className="flex items-center justify-between mb-6">
                                         <h3 className="text-2xl font-semibold text-gray-900">
-                                            Comments ({comments.length})
+                                            Comments ({blog?.comments_count ?? comments.length})
                                         </h3>
                                     </div>
                                     <div className="mb-8">
@@ -417,6 +430,16 @@ const BlogDetailModal = ({ blogId, isOpen, onClose }) => {
                                             </div>
                                         ))}
                                     </div>
+                                    {commentsNext && (
+                                        <div className="flex justify-center mt-6">
+                                            <button
+                                                onClick={handleLoadMoreComments}
+                                                className="px-4 py-2 text-sm rounded-lg border border-gray-300 hover:bg-gray-50"
+                                            >
+                                                Load more comments
+                                            </button>
+                                        </div>
+                                    )}
                                 </div>
                             </div>
                         </div>
@@ -9,6 +9,7 @@ const BlogDetailModal = ({
     onClose,
     onFetchBlogDetail,
     onDeleteComment,
+    onLoadMoreComments,
 }) => {
     useEffect(() => {
         if (modalType === "view" && selectedPost && !blogDetail) {
@@ -180,7 +181,7 @@ const BlogDetailModal = ({
                                                 <div className="flex items-center">
                                                     <MessageCircle className="w-4 h-4 mr-1 text-blue-500" />
                                                     <span>
-                                                        {blogDetail?.comments?.length || selectedPost.comments_count || 0}
+                                                        {blogDetail?.comments_count ?? selectedPost.comments_count ?? 0}
                                                     </span>
                                                 </div>
                                             </div>
@@ -218,7 +219,7 @@ const BlogDetailModal = ({
                                         <div className="pt-8 border-t border-gray-200">
                                             <div className="flex items-center justify-between mb-6">
                                                 <h3 className="text-2xl font-semibold text-gray-900">
-                                                    Comments ({blogDetail?.comments?.length || 0})
+                                                    Comments ({blogDetail?.comments_count ?? blogDetail?.comments?.length ?? 0})
                                                 </h3>
                                             </div>
                                             {blogDetail?.comments && blogDetail.comments.length > 0 ? (
@@ -267,6 +268,16 @@ const BlogDetailModal = ({
                                                             </div>
                                                         </div>
                                                     ))}
+                                                    {blogDetail.comments_next && (
+                                                        <div className="flex justify-center">
+                                                            <button
+                                                                onClick={onLoadMoreComments}
+                                                                className="px-4 py-2 text-sm rounded-lg border border-gray-300 hover:bg-gray-50"
+                                                            >
+                                                                Load more comments
+                                                            </button>
+                                                        </div>
+                                                    )}
                                                 </div>
                                             ) : (
                                                 <div className="text-center py-8 text-gray-500">
@@ -61,6 +61,25 @@ const Posts = () => {
         }
     }, []);
 
+    const handleLoadMoreComments = async () => {
+        if (!blogDetail?.comments_next) return;
+        try {
+            const res = await api.get(blogDetail.comments_next);
+            setBlogDetail((prev) =>
+                prev
+                    ? {
+                          ...prev,
+                          comments: [...prev.comments, ...res.data.comments],
+                          comments_count: res.data.comments_count,
+                          comments_next: res.data.comments_next,
+                      }
+                    : prev
+            );
+        } catch (error) {
+            console.error("Error fetching comments:", error);
+        }
+    };
+
     const handleDeleteComment = async (commentId, blogId) => {
         try {
             await api.delete(`admin/blog/${blogId}/`, {
@@ -357,6 +376,7 @@ const Posts = () => {
                 onClose={handleCloseModal}
                 onFetchBlogDetail={fetchBlogDetail}
                 onDeleteComment={handleDeleteComment}
+                onLoadMoreComments={handleLoadMoreComments}
             />
 
             {/* Delete Confirmation Modal */}
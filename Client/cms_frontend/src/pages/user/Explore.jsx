@@ -109,6 +109,7 @@ const Explore = () => {
                             onChange={(e) => setSortBy(e.target.value)}
                         >
                             <option value="latest">Latest</option>
+                            <option value="trending">Trending</option>
                             <option value="popular">Most Popular</option>
                             <option value="most-commented">Most Commented</option>
                         </select>
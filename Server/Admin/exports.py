@@ -0,0 +1,50 @@
+import csv
+import json
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+
+EXPORT_FORMATS = {
+    'csv': 'text/csv; charset=utf-8',
+    'ndjson': 'application/x-ndjson',
+}
+
+
+class Echo:
+    """File-like object whose write() returns the line, so csv.writer can feed a generator."""
+
+    def write(self, value):
+        return value
+
+
+def csv_cell(value):
+    # Lists and objects (post tags) are written as JSON rather than Python reprs.
+    if isinstance(value, (list, dict)):
+        return json.dumps(value, ensure_ascii=False)
+    return value
+
+
+def csv_lines(columns, rows):
+    writer = csv.writer(Echo())
+    yield writer.writerow(columns)
+    for row in rows:
+        yield writer.writerow([csv_cell(value) for value in row])
+
+
+def ndjson_lines(columns, rows):
+    for row in rows:
+        yield json.dumps(dict(zip(columns, row)), cls=DjangoJSONEncoder, ensure_ascii=False) + '\n'
+
+
+def export_response(queryset, columns, export_format, name, chunk_size=2000):
+    """
+    Stream a values_list queryset as CSV or NDJSON. Rows are read through
+    `iterator()` (a server-side cursor on PostgreSQL) while the response is
+    being sent, so only one chunk is held in memory at a time.
+    """
+    rows = queryset.iterator(chunk_size=chunk_size)
+    lines = csv_lines(columns, rows) if export_format == 'csv' else ndjson_lines(columns, rows)
+    response = StreamingHttpResponse(lines, content_type=EXPORT_FORMATS[export_format])
+    filename = f"{name}-{timezone.now():%Y%m%d-%H%M%S}.{export_format}"
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
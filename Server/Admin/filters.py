@@ -1,16 +1,31 @@
-import django_filters
-from authCustom.models import Profile
-
-class UserFilter(django_filters.FilterSet):
-    status = django_filters.CharFilter(method='filter_status')
-
-    class Meta:
-        model = Profile
-        fields = []
-
-    def filter_status(self, queryset, name, value):
-        if value.lower() == 'active':
-            return queryset.filter(is_active=True)
-        elif value.lower() == 'inactive':
-            return queryset.filter(is_active=False)
-        return queryset
+import django_filters
+from django.db.models import Q
+from authCustom.models import Profile
+from users.models import BlogPost
+
+class UserFilter(django_filters.FilterSet):
+    status = django_filters.CharFilter(method='filter_status')
+
+    class Meta:
+        model = Profile
+        fields = []
+
+    def filter_status(self, queryset, name, value):
+        if value.lower() == 'active':
+            return queryset.filter(is_active=True)
+        elif value.lower() == 'inactive':
+            return queryset.filter(is_active=False)
+        return queryset
+
+
+class BlogPostFilter(django_filters.FilterSet):
+    status = django_filters.CharFilter(field_name='status')
+    show = django_filters.BooleanFilter(field_name='show')
+    search = django_filters.CharFilter(method='filter_search')
+
+    class Meta:
+        model = BlogPost
+        fields = []
+
+    def filter_search(self, queryset, name, value):
+        return queryset.filter(Q(title__icontains=value) | Q(author__first_name__icontains=value))
@@ -1,6 +1,19 @@
-from rest_framework.pagination import PageNumberPagination
-
-class StandardPagination(PageNumberPagination):
-    page_size = 10
-    page_size_query_param = 'page_size'
-    max_page_size = 50
+from rest_framework.pagination import PageNumberPagination
+from explore.pagination import BlogPostCursorPagination
+
+class StandardPagination(PageNumberPagination):
+    page_size = 10
+    page_size_query_param = 'page_size'
+    max_page_size = 50
+
+class CommentPagination(PageNumberPagination):
+    page_size = 20
+    page_query_param = 'comments_page'
+    page_size_query_param = 'comments_page_size'
+    max_page_size = 100
+
+class UserCursorPagination(BlogPostCursorPagination):
+    """Keyset pages over the user directory, newest accounts first, without a COUNT."""
+    page_size = 10
+    max_page_size = 50
+    default_ordering = ('-created_at', '-id')
@@ -1,3 +1,268 @@
-from django.test import TestCase
-
-# Create your tests here.
+import csv
+import io
+import json
+from unittest import skipUnless
+from django.db import connection
+from django.test import TestCase, override_settings
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+from authCustom.cache import user_cache
+from authCustom.models import Profile
+from cms_project.Loggin.logger import add_sink, log_stats, logger, request_context
+from cms_project.metrics import metrics
+from users.models import BlogLike, BlogPost, Comment, ContentCategory
+
+LOCMEM_CACHE = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'admin-tests'}}
+
+
+@override_settings(CACHES=LOCMEM_CACHE)
+class AdminTestCase(TestCase):
+    def setUp(self):
+        user_cache.clear()
+        self.admin = Profile.objects.create_user(email='admin@example.com', password='secret123', is_staff=True)
+        self.category = ContentCategory.objects.create(name='Tech')
+        self.client = APIClient()
+        self.client.cookies['access_token'] = str(RefreshToken.for_user(self.admin).access_token)
+        # Warm the authentication cache so budgets below only count view queries.
+        self.client.post('/api/v1/auth/authenticated/')
+
+    def create_posts(self, count, comments_per_post=3):
+        offset = Profile.objects.count()
+        readers = [
+            Profile.objects.create_user(email=f'reader{offset + i}@example.com', first_name=f'Reader {i}')
+            for i in range(comments_per_post)
+        ]
+        posts = []
+        for i in range(count):
+            post = BlogPost.objects.create(
+                author=readers[i % len(readers)], title=f'Post {i}', content='Body', category=self.category,
+                status='published', thumbnail='https://example.com/thumb.png',
+                likes_count=len(readers), comments_count=comments_per_post,
+            )
+            for reader in readers:
+                Comment.objects.create(blog=post, user=reader, content='Nice')
+                BlogLike.objects.create(blog=post, user=reader)
+            posts.append(post)
+        return posts
+
+
+class BlogPostListQueryBudgetTests(AdminTestCase):
+    def test_list_query_count_does_not_grow_with_page_size(self):
+        self.create_posts(2)
+        with self.assertNumQueries(2):  # COUNT + page
+            small = self.client.get('/api/v1/admin/posts/')
+        self.create_posts(10)
+        with self.assertNumQueries(2):
+            large = self.client.get('/api/v1/admin/posts/')
+        self.assertEqual(len(small.data['results']), 2)
+        self.assertEqual(len(large.data['results']), 10)
+
+    def test_list_rows_carry_counts_without_comments(self):
+        self.create_posts(1)
+        row = self.client.get('/api/v1/admin/posts/').data['results'][0]
+        self.assertEqual(row['likes_count'], 3)
+        self.assertEqual(row['comments_count'], 3)
+        self.assertNotIn('comments', row)
+        self.assertNotIn('content', row)
+
+
+class BlogPostListFastSerializationTests(AdminTestCase):
+    def test_fast_path_renders_the_same_bytes(self):
+        posts = self.create_posts(12, comments_per_post=1)
+        BlogPost.objects.filter(pk=posts[0].pk).update(title='Caf\u00e9 \u2028 "\U0001f680"', tags=['a', 'b'], show=False)
+        Profile.objects.filter(pk=posts[1].author_id).update(profile_picture='https://example.com/p.png')
+        for query in ('', '?page=2', '?show=false', '?search=reader&page_size=3'):
+            with self.subTest(query=query):
+                with override_settings(FAST_SERIALIZATION=False):
+                    current = self.client.get(f'/api/v1/admin/posts/{query}')
+                fast = self.client.get(f'/api/v1/admin/posts/{query}')
+                self.assertEqual(fast.status_code, 200)
+                self.assertEqual(fast.content, JSONRenderer().render(current.data))
+
+
+class BlogDetailQueryBudgetTests(AdminTestCase):
+    def test_detail_paginates_comments_with_batched_author_counts(self):
+        post = self.create_posts(1, comments_per_post=25)[0]
+        # post + comments COUNT + comments page + grouped author post counts
+        with self.assertNumQueries(4):
+            response = self.client.get(f'/api/v1/admin/blog/{post.id}/')
+        self.assertEqual(len(response.data['comments']), 20)
+        self.assertIsNotNone(response.data['comments_next'])
+        self.assertEqual(response.data['comments'][0]['user']['posts'], 0)
+        self.assertEqual(response.data['author']['posts'], 1)
+
+        second = self.client.get(response.data['comments_next'])
+        self.assertEqual(len(second.data['comments']), 5)
+
+
+    def test_deleting_a_comment_removes_its_replies_from_the_counters(self):
+        post = self.create_posts(1, comments_per_post=1)[0]
+        root = Comment.objects.create(blog=post, user=self.admin, content='Root')
+        reply = Comment.objects.create(blog=post, user=self.admin, parent=root, content='Reply')
+        Comment.objects.create(blog=post, user=self.admin, parent=reply, content='Nested')
+        Comment.objects.filter(pk=root.pk).update(replies_count=2)
+        Comment.objects.filter(pk=reply.pk).update(replies_count=1)
+        BlogPost.objects.filter(pk=post.pk).update(comments_count=4)
+
+        response = self.client.delete(f'/api/v1/admin/blog/{post.id}/?comment_id={reply.id}')
+        self.assertEqual(response.status_code, 204)
+        root.refresh_from_db()
+        post.refresh_from_db()
+        self.assertEqual(root.replies_count, 0)
+        self.assertEqual(post.comments_count, 2)
+
+        self.client.delete(f'/api/v1/admin/blog/{post.id}/?comment_id={root.id}')
+        post.refresh_from_db()
+        self.assertEqual(post.comments_count, 1)
+        self.assertEqual(Comment.objects.filter(blog=post).count(), 1)
+
+class UserDirectoryTests(AdminTestCase):
+    def create_users(self, count, **extra):
+        offset = Profile.objects.count()
+        return [
+            Profile.objects.create_user(email=f'member{offset + i}@example.com', first_name=f'Member {offset + i}', **extra)
+            for i in range(count)
+        ]
+
+    def test_query_count_does_not_grow_with_page_size(self):
+        author = self.create_posts(2)[0].author
+        with self.assertNumQueries(1):  # page with annotated post counts, no COUNT
+            small = self.client.get('/api/v1/admin/users/')
+        self.create_users(20)
+        with self.assertNumQueries(1):
+            large = self.client.get('/api/v1/admin/users/?page_size=30')
+        self.assertEqual(len(small.data['results']), 4)
+        self.assertEqual(len(large.data['results']), 24)
+        counts = {row['email']: row['posts'] for row in small.data['results']}
+        self.assertEqual(counts[author.email], 1)
+        self.assertEqual(counts['admin@example.com'], 0)
+
+    def test_cursor_walks_every_user_newest_first(self):
+        self.create_users(23)
+        seen, url = [], '/api/v1/admin/users/'
+        while url:
+            response = self.client.get(url)
+            self.assertNotIn('count', response.data)
+            seen.extend(row['id'] for row in response.data['results'])
+            url = response.data['next']
+        expected = list(Profile.objects.order_by('-created_at', '-id').values_list('id', flat=True))
+        self.assertEqual(seen, expected)
+
+    def test_status_filter_and_search(self):
+        self.create_users(3)
+        inactive = self.create_users(2, is_active=False)
+        response = self.client.get('/api/v1/admin/users/?status=inactive')
+        self.assertEqual({row['id'] for row in response.data['results']}, {user.id for user in inactive})
+        response = self.client.get(f'/api/v1/admin/users/?search={inactive[-1].first_name.upper()}')
+        self.assertEqual([row['id'] for row in response.data['results']], [inactive[-1].id])
+
+
+class ExportTests(AdminTestCase):
+    def read(self, response):
+        return b''.join(response.streaming_content).decode()
+
+    def test_user_csv_applies_filters_and_counts(self):
+        self.create_posts(2)
+        Profile.objects.filter(email='reader1@example.com').update(is_active=False)
+        response = self.client.get('/api/v1/admin/users/export/?status=inactive')
+        self.assertEqual(response['Content-Type'], 'text/csv; charset=utf-8')
+        self.assertIn('attachment; filename="users-', response['Content-Disposition'])
+        rows = list(csv.DictReader(io.StringIO(self.read(response))))
+        self.assertEqual([row['email'] for row in rows], ['reader1@example.com'])
+        self.assertEqual(rows[0]['posts_count'], '1')
+        self.assertEqual(rows[0]['comments_count'], '2')
+
+    def test_post_ndjson_streams_in_one_query(self):
+        posts = self.create_posts(3)
+        BlogPost.objects.filter(pk=posts[0].pk).update(show=False, tags=['a', 'b'])
+        with self.assertNumQueries(1):
+            response = self.client.get('/api/v1/admin/posts/export/?output=ndjson&show=false')
+            lines = self.read(response).splitlines()
+        rows = [json.loads(line) for line in lines]
+        self.assertEqual([row['id'] for row in rows], [posts[0].id])
+        self.assertEqual(rows[0]['tags'], ['a', 'b'])
+        self.assertEqual(rows[0]['comments_count'], 3)
+        self.assertEqual(rows[0]['author__email'], posts[0].author.email)
+
+    def test_requires_staff_and_known_format(self):
+        self.assertEqual(self.client.get('/api/v1/admin/posts/export/?output=xml').status_code, 400)
+        reader = Profile.objects.create_user(email='plain@example.com')
+        self.client.cookies['access_token'] = str(RefreshToken.for_user(reader).access_token)
+        self.assertEqual(self.client.get('/api/v1/admin/users/export/').status_code, 403)
+
+
+class MetricsTests(AdminTestCase):
+    def setUp(self):
+        super().setUp()
+        metrics.reset()
+
+    def test_requests_are_recorded_per_url_name(self):
+        self.create_posts(2)
+        with override_settings(METRICS_QUERY_BUDGETS={'posts-list': 1}):
+            self.client.get('/api/v1/admin/posts/')
+        body = self.client.get('/api/v1/metrics/').content.decode()
+        labels = 'view="posts-list",route="api/v1/admin/posts/",method="GET"'
+        self.assertIn(f'cms_requests_total{{{labels},status="200"}} 1\n', body)
+        self.assertIn(f'cms_request_queries_bucket{{{labels},le="2"}} 1\n', body)
+        self.assertIn(f'cms_request_queries_sum{{{labels}}} 2\n', body)
+        self.assertIn(f'cms_request_duration_seconds_count{{{labels}}} 1\n', body)
+        self.assertIn(f'cms_query_budget_exceeded_total{{{labels}}} 1\n', body)
+        self.assertIn('# TYPE cms_request_duration_seconds histogram\n', body)
+
+    @skipUnless(hasattr(connection, 'pool_stats'), "connection metrics come from the cms_project.postgresql backend")
+    def test_new_connections_are_counted_and_timed(self):
+        params = connection.get_connection_params()
+        connection.get_new_connection(params).close()
+        with self.assertRaises(connection.Database.OperationalError):
+            connection.get_new_connection({**params, 'port': 1})
+        body = self.client.get('/api/v1/metrics/').content.decode()
+        labels = 'alias="default",mode="direct"'
+        self.assertIn(f'cms_db_connections_total{{{labels},outcome="ok"}} 1\n', body)
+        self.assertIn(f'cms_db_connections_total{{{labels},outcome="error"}} 1\n', body)
+        self.assertIn(f'cms_db_connection_wait_seconds_count{{{labels}}} 2\n', body)
+
+    def test_metrics_are_staff_only(self):
+        reader = Profile.objects.create_user(email='plain@example.com')
+        self.client.cookies['access_token'] = str(RefreshToken.for_user(reader).access_token)
+        self.assertEqual(self.client.get('/api/v1/metrics/').status_code, 403)
+
+
+class LoggingTests(AdminTestCase):
+    def setUp(self):
+        super().setUp()
+        log_stats.reset()
+        self.lines = []
+        handler = add_sink(self.lines.append)
+        self.addCleanup(logger.remove, handler)
+
+    def records(self):
+        return [json.loads(line) for line in self.lines]
+
+    def test_requests_get_an_id_and_an_access_record(self):
+        response = self.client.get('/api/v1/admin/posts/')
+        access = [record for record in self.records() if record['message'] == 'Request finished']
+        self.assertEqual(len(access), 1)
+        self.assertEqual(access[0]['request_id'], response['X-Request-ID'])
+        self.assertEqual(access[0]['route'], 'api/v1/admin/posts/')
+        self.assertEqual(access[0]['status'], 200)
+        self.assertGreater(access[0]['latency_ms'], 0)
+        response = self.client.get('/api/v1/admin/posts/', HTTP_X_REQUEST_ID='lb-1234')
+        self.assertEqual(response['X-Request-ID'], 'lb-1234')
+        self.assertEqual(self.records()[-1]['request_id'], 'lb-1234')
+
+    @override_settings(LOG_SAMPLING={'Admin.tests': {'DEBUG': 0}}, LOG_REQUEST_RECORD_LIMIT=2)
+    def test_sampling_and_the_per_request_limit(self):
+        logger.debug("sampled out")
+        logger.info("kept")
+        with request_context('req-1') as context:
+            context.route = 'api/v1/test/'
+            for number in range(4):
+                logger.info(f"step {number}")
+            logger.warning("always kept")
+        messages = [record['message'] for record in self.records()]
+        self.assertEqual(messages, ['kept', 'step 0', 'step 1', 'always kept'])
+        self.assertEqual(self.records()[-1]['request_id'], 'req-1')
+        self.assertEqual(log_stats.snapshot()['dropped'], {'sampled': 1, 'request_limit': 2})
+        body = self.client.get('/api/v1/metrics/').content.decode()
+        self.assertIn('cms_log_records_dropped_total{reason="request_limit",', body)
@@ -1,149 +1,216 @@
-from rest_framework import generics, status, filters
-from rest_framework.response import Response
-from rest_framework.views import APIView
-from rest_framework.permissions import IsAuthenticated, AllowAny
-from django_filters.rest_framework import DjangoFilterBackend
-from authCustom.models import Profile
-from .serializers import UserSerializer, BlogPostSerializer
-from .filters import UserFilter
-from users.models import BlogPost, Comment
-from django.db.models import Q
-from .pagination import StandardPagination
-from django.shortcuts import get_object_or_404
-from django.contrib.auth import authenticate
-from rest_framework_simplejwt.tokens import RefreshToken
-
-class AdminLogin(APIView):
-    permission_classes = [AllowAny]
-
-    def post(self, request):
-        email = request.data.get('email')
-        password = request.data.get('password')
-        if not email or not password:
-            return Response({"success": False, "error": "Email and password are required"},
-                            status=status.HTTP_400_BAD_REQUEST)
-
-        user = authenticate(request, email=email, password=password)
-
-        if not user:
-            return Response({"success": False, "error": "Invalid credentials"},
-                            status=status.HTTP_401_UNAUTHORIZED)
-
-        if not user.is_staff:
-            return Response({"success": False, "error": "You are not authorized to access admin"},
-                            status=status.HTTP_403_FORBIDDEN)
-
-        refresh = RefreshToken.for_user(user)
-        access_token = str(refresh.access_token)
-        
-        response = Response({
-            "success": True,
-            "role": "admin",
-            "user": {
-                "id": user.id,
-                "email": user.email,
-                "name": user.get_full_name() or user.email
-            }
-        }, status=status.HTTP_200_OK)
-
-        response.set_cookie("access_token", access_token, httponly=True, secure=True, samesite="None", path="/")
-        response.set_cookie("refresh_token", str(refresh), httponly=True, secure=True, samesite="None", path="/")
-
-        return response
-
-class UserListView(generics.ListAPIView):
-    queryset = Profile.objects.all()
-    serializer_class = UserSerializer
-    permission_classes = [IsAuthenticated]
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter]
-    filterset_class = UserFilter
-    search_fields = ['first_name', 'email']
-
-class UserStatusUpdateView(APIView):
-    permission_classes = [IsAuthenticated]
-
-    def patch(self, request, pk):
-        try:
-            user = Profile.objects.get(pk=pk)
-        except Profile.DoesNotExist:
-            return Response({"detail": "User not found."}, status=status.HTTP_404_NOT_FOUND)
-
-        new_status = request.data.get('status')
-        if new_status not in ['Active', 'Inactive']:
-            return Response({"detail": "Invalid status."}, status=status.HTTP_400_BAD_REQUEST)
-
-        user.is_active = (new_status == 'Active')
-        user.save()
-
-        serializer = UserSerializer(user)
-        return Response(serializer.data, status=status.HTTP_200_OK)
-
-class BlogPostListAPIView(APIView):
-    pagination_class = StandardPagination()
-
-    def get(self, request):
-        queryset = BlogPost.objects.select_related('author', 'category').prefetch_related('likes', 'comments').order_by('-created_at')
-        
-        status_filter = request.query_params.get('status')
-        show_filter = request.query_params.get('show')
-        search = request.query_params.get('search')
-
-        if status_filter:
-            queryset = queryset.filter(status=status_filter)
-        if show_filter is not None:
-            if show_filter:
-                queryset = queryset.filter(show=True)
-            elif not show_filter:
-                queryset = queryset.filter(show=False)
-        if search:
-            queryset = queryset.filter(Q(title__icontains=search) | Q(author__first_name__icontains=search))
-
-        paginator = self.pagination_class
-        page = paginator.paginate_queryset(queryset, request, view=self)
-        serializer = BlogPostSerializer(page, many=True, context={'request': request})
-        return paginator.get_paginated_response(serializer.data)
-
-class BlogPostSoftDeleteAPIView(APIView):
-
-    def patch(self, request, pk):
-        try:
-            post = BlogPost.objects.get(pk=pk)
-        except BlogPost.DoesNotExist:
-            return Response({"detail": "Post not found."}, status=status.HTTP_404_NOT_FOUND)
-
-        post.show = False
-        post.save()
-        serializer = BlogPostSerializer(post, context={'request': request})
-        return Response(serializer.data, status=status.HTTP_200_OK)
-
-class BlogPostRestoreAPIView(APIView):
-
-    def patch(self, request, pk):
-        try:
-            post = BlogPost.objects.get(pk=pk)
-        except BlogPost.DoesNotExist:
-            return Response({"detail": "Post not found."}, status=status.HTTP_404_NOT_FOUND)
-
-        post.show = True
-        post.save()
-        serializer = BlogPostSerializer(post, context={'request': request})
-        return Response(serializer.data, status=status.HTTP_200_OK)
-
-class BlogDetailAPIView(APIView):
-
-    def get(self, request, blog_id):
-        blog = get_object_or_404(BlogPost, id=blog_id)
-        serializer = BlogPostSerializer(blog)
-        return Response(serializer.data, status=status.HTTP_200_OK)
-
-    def delete(self, request, blog_id):
-        if not request.user.is_staff:
-            return Response({"error": "Permission denied"}, status=status.HTTP_403_FORBIDDEN)
-        
-        comment_id = request.query_params.get("comment_id")
-        if not comment_id:
-            return Response({"error": "comment_id query param is required"}, status=status.HTTP_400_BAD_REQUEST)
-        
-        comment = get_object_or_404(Comment, id=comment_id, blog_id=blog_id)
-        comment.delete()
-        return Response({"message": "Comment deleted successfully"}, status=status.HTTP_204_NO_CONTENT)
+from rest_framework import generics, status, filters
+from rest_framework.response import Response
+from rest_framework.views import APIView
+from rest_framework.permissions import IsAuthenticated, IsAdminUser, AllowAny
+from django_filters.rest_framework import DjangoFilterBackend
+from authCustom.models import Profile
+from .serializers import UserSerializer, BlogPostSerializer, BlogPostListSerializer, CommentSerializer, post_list_values
+from .filters import UserFilter, BlogPostFilter
+from .exports import EXPORT_FORMATS, export_response
+from users.models import BlogPost, Comment
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from .pagination import StandardPagination, CommentPagination, UserCursorPagination
+from explore.cache import feed_cache
+from explore.trending import trending_engine
+from django.shortcuts import get_object_or_404
+from django.contrib.auth import authenticate
+from rest_framework_simplejwt.tokens import RefreshToken
+
+class AdminLogin(APIView):
+    permission_classes = [AllowAny]
+
+    def post(self, request):
+        email = request.data.get('email')
+        password = request.data.get('password')
+        if not email or not password:
+            return Response({"success": False, "error": "Email and password are required"},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        user = authenticate(request, email=email, password=password)
+
+        if not user:
+            return Response({"success": False, "error": "Invalid credentials"},
+                            status=status.HTTP_401_UNAUTHORIZED)
+
+        if not user.is_staff:
+            return Response({"success": False, "error": "You are not authorized to access admin"},
+                            status=status.HTTP_403_FORBIDDEN)
+
+        refresh = RefreshToken.for_user(user)
+        access_token = str(refresh.access_token)
+        
+        response = Response({
+            "success": True,
+            "role": "admin",
+            "user": {
+                "id": user.id,
+                "email": user.email,
+                "name": user.get_full_name() or user.email
+            }
+        }, status=status.HTTP_200_OK)
+
+        response.set_cookie("access_token", access_token, httponly=True, secure=True, samesite="None", path="/")
+        response.set_cookie("refresh_token", str(refresh), httponly=True, secure=True, samesite="None", path="/")
+
+        return response
+
+class UserListView(generics.ListAPIView):
+    serializer_class = UserSerializer
+    permission_classes = [IsAuthenticated]
+    pagination_class = UserCursorPagination
+    filter_backends = [DjangoFilterBackend, filters.SearchFilter]
+    filterset_class = UserFilter
+    search_fields = ['first_name', 'email']
+
+    def get_queryset(self):
+        posts_count = (
+            BlogPost.objects.filter(author=OuterRef('pk'))
+            .order_by().values('author').annotate(total=Count('id')).values('total')
+        )
+        return (
+            Profile.objects.only('id', 'first_name', 'email', 'is_active', 'created_at')
+            .annotate(posts_count=Coalesce(Subquery(posts_count), 0))
+            .order_by('-created_at', '-id')
+        )
+
+class UserExportView(UserListView):
+    """The user directory as a streamed CSV / NDJSON file, with the list view's filters and search."""
+    permission_classes = [IsAdminUser]
+    pagination_class = None
+    columns = ['id', 'first_name', 'email', 'is_active', 'created_at', 'posts_count', 'comments_count']
+
+    def get_queryset(self):
+        comments_count = (
+            Comment.objects.filter(user=OuterRef('pk'))
+            .order_by().values('user').annotate(total=Count('id')).values('total')
+        )
+        return super().get_queryset().annotate(comments_count=Coalesce(Subquery(comments_count), 0))
+
+    def get(self, request):
+        export_format = request.query_params.get('output', 'csv')
+        if export_format not in EXPORT_FORMATS:
+            return Response({"detail": "output must be csv or ndjson."}, status=status.HTTP_400_BAD_REQUEST)
+        queryset = self.filter_queryset(self.get_queryset()).values_list(*self.columns)
+        return export_response(queryset, self.columns, export_format, 'users')
+
+class UserStatusUpdateView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def patch(self, request, pk):
+        try:
+            user = Profile.objects.get(pk=pk)
+        except Profile.DoesNotExist:
+            return Response({"detail": "User not found."}, status=status.HTTP_404_NOT_FOUND)
+
+        new_status = request.data.get('status')
+        if new_status not in ['Active', 'Inactive']:
+            return Response({"detail": "Invalid status."}, status=status.HTTP_400_BAD_REQUEST)
+
+        user.is_active = (new_status == 'Active')
+        user.save()
+
+        serializer = UserSerializer(user)
+        return Response(serializer.data, status=status.HTTP_200_OK)
+
+class BlogPostListAPIView(APIView):
+    pagination_class = StandardPagination()
+    list_fields = [
+        'id', 'title', 'status', 'excerpt', 'thumbnail', 'created_at', 'published_date',
+        'likes_count', 'comments_count', 'tags', 'show',
+        'author__id', 'author__first_name', 'author__email', 'author__profile_picture',
+        'category__id', 'category__name',
+    ]
+
+    def get(self, request):
+        queryset = BlogPost.objects.select_related('author', 'category').only(*self.list_fields).order_by('-created_at')
+        queryset = BlogPostFilter(request.query_params, queryset=queryset).qs
+
+        paginator = self.pagination_class
+        if settings.FAST_SERIALIZATION:
+            page = paginator.paginate_queryset(post_list_values.queryset(queryset), request, view=self)
+            return paginator.get_paginated_response(post_list_values.serialize(page, context={'request': request}))
+        page = paginator.paginate_queryset(queryset, request, view=self)
+        serializer = BlogPostListSerializer(page, many=True, context={'request': request})
+        return paginator.get_paginated_response(serializer.data)
+
+class BlogPostExportAPIView(APIView):
+    """Posts as a streamed CSV / NDJSON file, filtered like the post list."""
+    permission_classes = [IsAdminUser]
+    columns = [
+        'id', 'title', 'status', 'show', 'author_id', 'author__email', 'author__first_name', 'category__name',
+        'tags', 'likes_count', 'comments_count', 'created_at', 'published_date',
+    ]
+
+    def get(self, request):
+        export_format = request.query_params.get('output', 'csv')
+        if export_format not in EXPORT_FORMATS:
+            return Response({"detail": "output must be csv or ndjson."}, status=status.HTTP_400_BAD_REQUEST)
+        queryset = BlogPostFilter(request.query_params, queryset=BlogPost.objects.order_by('-created_at', '-id')).qs
+        return export_response(queryset.values_list(*self.columns), self.columns, export_format, 'posts')
+
+class BlogPostSoftDeleteAPIView(APIView):
+
+    def patch(self, request, pk):
+        try:
+            post = BlogPost.objects.select_related('author', 'category').get(pk=pk)
+        except BlogPost.DoesNotExist:
+            return Response({"detail": "Post not found."}, status=status.HTTP_404_NOT_FOUND)
+
+        post.show = False
+        post.save()
+        serializer = BlogPostListSerializer(post, context={'request': request})
+        return Response(serializer.data, status=status.HTTP_200_OK)
+
+class BlogPostRestoreAPIView(APIView):
+
+    def patch(self, request, pk):
+        try:
+            post = BlogPost.objects.select_related('author', 'category').get(pk=pk)
+        except BlogPost.DoesNotExist:
+            return Response({"detail": "Post not found."}, status=status.HTTP_404_NOT_FOUND)
+
+        post.show = True
+        post.save()
+        serializer = BlogPostListSerializer(post, context={'request': request})
+        return Response(serializer.data, status=status.HTTP_200_OK)
+
+class BlogDetailAPIView(APIView):
+
+    def get(self, request, blog_id):
+        blog = get_object_or_404(BlogPost.objects.select_related('author', 'category'), id=blog_id)
+
+        comments = Comment.objects.filter(blog=blog).select_related('user').order_by('-created_at', '-id')
+        paginator = CommentPagination()
+        page = paginator.paginate_queryset(comments, request, view=self)
+
+        # One grouped COUNT for every author on the page instead of one per comment.
+        author_ids = {comment.user_id for comment in page} | {blog.author_id}
+        post_counts = dict(
+            BlogPost.objects.filter(author_id__in=author_ids).order_by()
+            .values('author_id').annotate(total=Count('id')).values_list('author_id', 'total')
+        )
+        context = {'request': request, 'post_counts': post_counts}
+
+        data = BlogPostSerializer(blog, context=context).data
+        data['comments'] = CommentSerializer(page, many=True, context=context).data
+        data['comments_next'] = paginator.get_next_link()
+        data['comments_previous'] = paginator.get_previous_link()
+        return Response(data, status=status.HTTP_200_OK)
+
+    def delete(self, request, blog_id):
+        if not request.user.is_staff:
+            return Response({"error": "Permission denied"}, status=status.HTTP_403_FORBIDDEN)
+        
+        comment_id = request.query_params.get("comment_id")
+        if not comment_id:
+            return Response({"error": "comment_id query param is required"}, status=status.HTTP_400_BAD_REQUEST)
+        
+        comment = get_object_or_404(Comment.objects.select_related('blog__category'), id=comment_id, blog_id=blog_id)
+        with transaction.atomic():
+            comment.delete_thread()
+            trending_engine.mark_stale(comment.blog_id)
+            feed_cache.invalidate_post(comment.blog)
+        return Response({"message": "Comment deleted successfully"}, status=status.HTTP_204_NO_CONTENT)
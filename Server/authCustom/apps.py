@@ -4,3 +4,13 @@ from django.apps import AppConfig
 class AuthcustomConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'authCustom'
+
+    def ready(self):
+        from django.db.models.signals import post_delete, post_save, pre_migrate
+        from users.indexes import create_postgres_extensions
+        from .cache import invalidate_cached_user
+        from .models import Profile
+
+        post_save.connect(invalidate_cached_user, sender=Profile, dispatch_uid='auth_user_cache_save')
+        post_delete.connect(invalidate_cached_user, sender=Profile, dispatch_uid='auth_user_cache_delete')
+        pre_migrate.connect(create_postgres_extensions, sender=self, dispatch_uid='auth_postgres_extensions')
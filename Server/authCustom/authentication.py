@@ -1,16 +1,37 @@
-from rest_framework_simplejwt.authentication import JWTAuthentication
-
-class CookieJWTAuthentication(JWTAuthentication): 
-    def authenticate(self, request):
-        access_token = request.COOKIES.get('access_token')
-        if not access_token:
-            return None
-        
-        validated_token = self.get_validated_token(access_token)
-        
-        try:
-            user = self.get_user(validated_token)
-        except:
-            return None
-        
-        return (user, validated_token)
\ No newline at end of file
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.settings import api_settings
+from .cache import user_cache
+
+class CookieJWTAuthentication(JWTAuthentication): 
+    def authenticate(self, request):
+        access_token = request.COOKIES.get('access_token')
+        if not access_token:
+            return None
+        
+        validated_token = self.get_validated_token(access_token)
+        
+        try:
+            user = self.get_user(validated_token)
+        except:
+            return None
+        
+        return (user, validated_token)
+
+    def get_user(self, validated_token):
+        # Revocation checks need the password hash, which is never cached.
+        if api_settings.CHECK_REVOKE_TOKEN or api_settings.USER_ID_FIELD != 'id':
+            return super().get_user(validated_token)
+
+        user_id = validated_token.get(api_settings.USER_ID_CLAIM)
+        if user_id is None:
+            return super().get_user(validated_token)
+        # Read before the database so a concurrent invalidation outdates what is cached below.
+        generation = user_cache.generation(user_id)
+        user = user_cache.get(self.user_model, user_id, generation)
+        if user is None:
+            user = super().get_user(validated_token)
+            user_cache.set(user, generation)
+        elif api_settings.CHECK_USER_IS_ACTIVE and not user.is_active:
+            raise AuthenticationFailed("User is inactive", code="user_inactive")
+        return user
@@ -0,0 +1,155 @@
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS
+from cms_project.Loggin.logger import logger
+
+# Never cache the password hash; a cached user that needs it loads it on access.
+EXCLUDED_FIELDS = {'password'}
+
+# Generation of a user whose token could not be read; nothing is cached under it.
+UNAVAILABLE = object()
+
+
+class LocalLRU:
+    """Small thread-safe, per-process LRU with per-entry expiry."""
+
+    def __init__(self, maxsize, ttl):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+class UserCache:
+    """
+    Two-tier cache of authenticated users: a per-process LRU (a few seconds)
+    in front of a shared cache entry (minutes). Entries hold the concrete
+    field values of the user, not the model instance.
+
+    Saving or deleting a Profile drops both tiers in the writing process and
+    the shared tier for everyone, and replaces the user's generation token in
+    the shared cache. Both tiers store the generation read *before* the user
+    was loaded from the database, and an entry is only used while that is
+    still the current generation. A request that loads a user while it is
+    being invalidated therefore caches it under the old generation, and every
+    process sees a deactivation or a permission change on its next request.
+    """
+    prefix = 'auth:user'
+
+    def __init__(self):
+        self.local = LocalLRU(
+            maxsize=getattr(settings, 'AUTH_USER_CACHE_LOCAL_MAXSIZE', 1024),
+            ttl=getattr(settings, 'AUTH_USER_CACHE_LOCAL_TTL', 5),
+        )
+
+    @property
+    def shared_ttl(self):
+        return getattr(settings, 'AUTH_USER_CACHE_SHARED_TTL', 300)
+
+    def key(self, user_id):
+        return f'{self.prefix}:{user_id}'
+
+    def generation_key(self, user_id):
+        return f'{self.prefix}:{user_id}:gen'
+
+    def generation(self, user_id):
+        """The current generation of `user_id`; read it before loading the user to `set()` it."""
+        try:
+            return cache.get(self.generation_key(user_id))
+        except Exception:
+            logger.exception("Shared user cache read failed")
+            return UNAVAILABLE
+
+    def get(self, model, user_id, generation):
+        """The cached user if it was stored under `generation`, the one `generation()` returns now."""
+        if generation is UNAVAILABLE:
+            return None
+        key = self.key(user_id)
+        entry = self.local.get(key)
+        if entry is None or entry[0] != generation:
+            try:
+                entry = cache.get(key)
+            except Exception:
+                logger.exception("Shared user cache read failed")
+                return None
+            if entry is None or entry[0] != generation:
+                return None
+            self.local.set(key, entry)
+        return self._build(model, entry[1])
+
+    def set(self, user, generation):
+        if generation is UNAVAILABLE:
+            return
+        key = self.key(user.pk)
+        values = {
+            field.attname: getattr(user, field.attname)
+            for field in user._meta.concrete_fields
+            if field.attname not in EXCLUDED_FIELDS and field.attname not in user.get_deferred_fields()
+        }
+        entry = (generation, values)
+        self.local.set(key, entry)
+        try:
+            cache.set(key, entry, timeout=self.shared_ttl)
+        except Exception:
+            logger.exception("Shared user cache write failed")
+
+    def invalidate(self, user_id):
+        key = self.key(user_id)
+        self.local.delete(key)
+        try:
+            cache.delete(key)
+            # Outlives every entry stored under the previous generation, including
+            # those written by requests still in flight.
+            cache.set(
+                self.generation_key(user_id), uuid.uuid4().hex,
+                timeout=2 * max(self.shared_ttl, self.local.ttl),
+            )
+        except Exception:
+            logger.exception("Shared user cache invalidation failed")
+
+    def clear(self):
+        self.local.clear()
+
+    def _build(self, model, values):
+        names = [field.attname for field in model._meta.concrete_fields if field.attname in values]
+        # from_db marks the missing fields (password) as deferred, so saving this
+        # instance only writes the loaded fields and never blanks the hash.
+        return model.from_db(DEFAULT_DB_ALIAS, names, [values[name] for name in names])
+
+
+user_cache = UserCache()
+
+
+def invalidate_cached_user(sender, instance, **kwargs):
+    user_cache.invalidate(instance.pk)
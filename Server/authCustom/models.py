@@ -1,5 +1,9 @@
+from django.contrib.postgres.indexes import OpClass
 from django.db import models
+from django.db.models import Index, Q
+from django.db.models.functions import Upper
 from django.contrib.auth.models import AbstractUser
+from users.indexes import PostgresGinIndex
 from users.models import ContentCategory
 from .managers import CustomUserManager
 
@@ -20,5 +24,16 @@ class Profile(AbstractUser):
 
     objects = CustomUserManager()
 
+    class Meta(AbstractUser.Meta):
+        indexes = [
+            # Admin directory: keyset pages over (-created_at, -id), and the
+            # `status=inactive` filter, which matches a small share of the table.
+            Index(fields=['-created_at', '-id'], name='profile_created_id_idx'),
+            Index(fields=['-created_at', '-id'], condition=Q(is_active=False), name='profile_inactive_created_idx'),
+            # Trigram indexes for icontains search, which compares UPPER(column).
+            PostgresGinIndex(OpClass(Upper('first_name'), name='gin_trgm_ops'), name='profile_first_name_trgm'),
+            PostgresGinIndex(OpClass(Upper('email'), name='gin_trgm_ops'), name='profile_email_trgm'),
+        ]
+
     def __str__(self):
         return self.email
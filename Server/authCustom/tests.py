@@ -1,3 +1,67 @@
-from django.test import TestCase
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+from .cache import UserCache, user_cache
+from .models import Profile
 
-# Create your tests here.
+LOCMEM_CACHE = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'auth-tests'}}
+
+
+def authenticated_client(user):
+    client = APIClient()
+    client.cookies['access_token'] = str(RefreshToken.for_user(user).access_token)
+    return client
+
+
+@override_settings(CACHES=LOCMEM_CACHE)
+class CookieJWTUserCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        user_cache.clear()
+        self.user = Profile.objects.create_user(email='member@example.com', password='secret123', first_name='Member')
+        self.admin = Profile.objects.create_user(email='admin@example.com', password='secret123', is_staff=True)
+        self.client = authenticated_client(self.user)
+
+    def test_repeated_requests_resolve_user_from_cache(self):
+        self.client.post('/api/v1/auth/authenticated/')
+        with self.assertNumQueries(0):
+            response = self.client.post('/api/v1/auth/authenticated/')
+        self.assertEqual(response.status_code, 200)
+
+    def test_shared_tier_serves_other_processes(self):
+        self.client.post('/api/v1/auth/authenticated/')
+        user_cache.local.clear()
+        with self.assertNumQueries(0):
+            self.client.post('/api/v1/auth/authenticated/')
+
+    def test_cached_user_never_carries_password_hash(self):
+        self.client.post('/api/v1/auth/authenticated/')
+        generation, values = cache.get(user_cache.key(self.user.pk))
+        self.assertNotIn('password', values)
+
+    def test_deactivation_takes_effect_immediately(self):
+        self.client.post('/api/v1/auth/authenticated/')
+        response = authenticated_client(self.admin).patch(
+            f'/api/v1/admin/users/{self.user.pk}/status/', {'status': 'Inactive'}, format='json'
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.client.post('/api/v1/auth/authenticated/').status_code, 401)
+
+    def test_invalidation_reaches_the_local_tier_of_other_processes(self):
+        self.client.post('/api/v1/auth/authenticated/')
+        other_process = UserCache()
+        Profile.objects.filter(pk=self.user.pk).update(is_active=False)
+        other_process.invalidate(self.user.pk)
+        self.assertIsNotNone(user_cache.local.get(user_cache.key(self.user.pk)))
+        self.assertEqual(self.client.post('/api/v1/auth/authenticated/').status_code, 401)
+
+    def test_user_loaded_during_an_invalidation_is_not_trusted(self):
+        generation = user_cache.generation(self.user.pk)
+        loaded = Profile.objects.get(pk=self.user.pk)
+        Profile.objects.filter(pk=self.user.pk).update(is_active=False)
+        UserCache().invalidate(self.user.pk)
+        user_cache.set(loaded, generation)
+
+        self.assertIsNone(user_cache.get(Profile, self.user.pk, user_cache.generation(self.user.pk)))
+        self.assertEqual(self.client.post('/api/v1/auth/authenticated/').status_code, 401)
@@ -1,9 +1,336 @@
-from loguru import logger
-import sys
-
-logger.remove()
-
-logger.add(sys.stdout, level="DEBUG", backtrace=True, diagnose=True)
-logger.add("logs/debug.log", rotation="10 MB", level="DEBUG", compression="zip")
-
-logger.add("logs/error.log", rotation="10 MB", level="ERROR", compression="zip")
+"""
+Application logging, on loguru.
+
+Logging does not block: the caller only filters a record, renders it as one
+line of JSON and puts it on a bounded queue (QueueSink). A writer thread
+does the writing and the file rotation, and rotated files are zipped on a
+thread of their own, so compressing a log never holds up the writer either.
+
+Which records are kept is decided once per record, before any sink sees it:
+- LOG_LEVELS: minimum level per module prefix ('' is the default).
+- LOG_SAMPLING: the fraction of a level's records kept per module prefix,
+  e.g. {'explore.views': {'DEBUG': 0.01}}.
+- LOG_REQUEST_RECORD_LIMIT: DEBUG/INFO records kept per request; warnings,
+  errors and the access record are always kept.
+
+Records logged while a request is served carry its request id, route and
+the elapsed time (see cms_project/Loggin/middleware.py). Kept and dropped
+records and the time callers spend logging are counted in `log_stats` and
+exposed on the metrics page.
+"""
+import atexit
+import copy
+import json
+import os
+import queue
+import random
+import sys
+import threading
+import time
+import traceback
+import zipfile
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from django.core.exceptions import ImproperlyConfigured
+from django.core.signals import setting_changed
+from loguru import logger
+
+JSON_FORMAT = "{extra[_json]}\n"
+TEXT_FORMAT = (
+    "<green>{time:YYYY-MM-DD HH:mm:ss.SSS}</green> | <level>{level: <8}</level> | "
+    "<cyan>{name}</cyan>:<cyan>{function}</cyan>:<cyan>{line}</cyan> - <level>{message}</level>{exception}\n"
+)
+WARNING_NO = logger.level("WARNING").no
+ERROR_NO = logger.level("ERROR").no
+
+
+def _setting(name, default):
+    try:
+        from django.conf import settings
+        return getattr(settings, name, default)
+    except ImproperlyConfigured:
+        return default
+
+
+class RequestLogContext:
+    """The request a record was logged from. Mutable, so the route can be filled in once the URL is resolved."""
+
+    def __init__(self, request_id, method, path):
+        self.request_id = request_id
+        self.method = method
+        self.path = path
+        self.route = None
+        self.start = time.perf_counter()
+        self.records = 0
+
+    def elapsed_ms(self):
+        return round((time.perf_counter() - self.start) * 1000, 3)
+
+
+_request_context = ContextVar('request_log_context', default=None)
+
+
+@contextmanager
+def request_context(request_id, method='', path=''):
+    context = RequestLogContext(request_id, method, path)
+    token = _request_context.set(context)
+    try:
+        yield context
+    finally:
+        _request_context.reset(token)
+
+
+def current_request_context():
+    return _request_context.get()
+
+
+class LogStats:
+    """Per-process counts of kept and dropped records and of the time spent emitting them on the caller's thread."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.records = Counter()
+            self.dropped = Counter()
+            self.emit_seconds = 0.0
+
+    def kept(self, level):
+        with self._lock:
+            self.records[level] += 1
+
+    def drop(self, reason):
+        with self._lock:
+            self.dropped[reason] += 1
+
+    def emitted(self, duration):
+        with self._lock:
+            self.emit_seconds += duration
+
+    def snapshot(self):
+        with self._lock:
+            return {'records': dict(self.records), 'dropped': dict(self.dropped), 'emit_seconds': self.emit_seconds}
+
+
+log_stats = LogStats()
+
+
+class RecordPolicy:
+    """Resolves LOG_LEVELS and LOG_SAMPLING for a module name, by its longest configured prefix."""
+
+    def __init__(self):
+        self._rules = {}
+
+    def clear(self, **kwargs):
+        self._rules = {}
+
+    def rule(self, name):
+        rule = self._rules.get(name)
+        if rule is None:
+            levels = _setting('LOG_LEVELS', {})
+            sampling = _setting('LOG_SAMPLING', {})
+            min_level = logger.level(_lookup(levels, name) or _setting('LOG_LEVEL', 'DEBUG')).no
+            rates = {logger.level(level).no: rate for level, rate in (_lookup(sampling, name) or {}).items()}
+            rule = self._rules[name] = (min_level, rates)
+        return rule
+
+    def drop_reason(self, record):
+        min_level, rates = self.rule(record['name'] or '')
+        level_no = record['level'].no
+        if level_no < min_level:
+            return 'level'
+        rate = rates.get(level_no)
+        if rate is not None and random.random() >= rate:
+            return 'sampled'
+        context = _request_context.get()
+        if context is not None and level_no < WARNING_NO and '_access' not in record['extra']:
+            if context.records >= _setting('LOG_REQUEST_RECORD_LIMIT', 50):
+                return 'request_limit'
+            context.records += 1
+        return None
+
+
+def _lookup(rules, name):
+    # 'explore' applies to 'explore.views', not to 'explorer'.
+    while True:
+        if name in rules:
+            return rules[name]
+        if not name:
+            return None
+        name = name.rpartition('.')[0]
+
+
+record_policy = RecordPolicy()
+setting_changed.connect(record_policy.clear, dispatch_uid='logging_record_policy_clear')
+
+
+def annotate(record):
+    """Patcher run once per record: decides whether it is kept and attaches the request context."""
+    record['extra']['_start'] = time.perf_counter()
+    reason = record_policy.drop_reason(record)
+    if reason is not None:
+        record['extra']['_drop'] = True
+        log_stats.drop(reason)
+        return
+    log_stats.kept(record['level'].name)
+    context = _request_context.get()
+    if context is not None:
+        record['extra'].setdefault('request_id', context.request_id)
+        record['extra'].setdefault('route', context.route)
+        record['extra'].setdefault('elapsed_ms', context.elapsed_ms())
+
+
+def keep(record):
+    return '_drop' not in record['extra']
+
+
+def json_format(record):
+    """One JSON object per line; rendered once per record however many sinks write it."""
+    extra = record['extra']
+    if '_json' not in extra:
+        data = {
+            'time': record['time'].isoformat(),
+            'level': record['level'].name,
+            'logger': record['name'],
+            'function': record['function'],
+            'line': record['line'],
+            'message': record['message'],
+        }
+        data.update((key, value) for key, value in extra.items() if not key.startswith('_'))
+        if record['exception'] is not None:
+            kind, value, tb = record['exception']
+            data['exception'] = ''.join(traceback.format_exception(kind, value, tb))
+        extra['_json'] = json.dumps(data, default=str, ensure_ascii=False)
+    return JSON_FORMAT
+
+
+class QueueSink:
+    """
+    The one sink records go through: it puts the rendered line on a bounded
+    queue and returns. A writer thread wakes up at most every
+    `flush_interval` seconds and writes what has queued up in one go, so the
+    cost of writing grows with the volume of logs rather than with the
+    number of records. When the writer falls LOG_QUEUE_SIZE lines behind,
+    new lines are dropped and counted instead of blocking the caller.
+    """
+
+    def __init__(self, output, maxsize, flush_interval):
+        # `output` is a separate loguru logger: stdout and debug.log take
+        # every batch, error.log only the lines bound with errors_only.
+        self.output = output.opt(raw=True)
+        self.errors = output.bind(errors_only=True).opt(raw=True)
+        self.flush_interval = flush_interval
+        self.queue = queue.Queue(maxsize)
+        self._lock = threading.Lock()
+        self._thread = None
+        self._pid = None
+
+    def __call__(self, message):
+        record = message.record
+        self._ensure_writer()
+        try:
+            self.queue.put_nowait((record['level'].no, str(message)))
+        except queue.Full:
+            log_stats.drop('queue_full')
+        log_stats.emitted(time.perf_counter() - record['extra']['_start'])
+
+    def _ensure_writer(self):
+        # Started lazily, and again in a forked worker, which does not inherit threads.
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid != os.getpid():
+                self._thread = threading.Thread(target=self._write, name='log-writer', daemon=True)
+                self._thread.start()
+                self._pid = os.getpid()
+
+    def _write(self):
+        while True:
+            batch = [self.queue.get()]
+            time.sleep(self.flush_interval)
+            while True:
+                try:
+                    batch.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+            lines = [item for item in batch if item is not None]
+            try:
+                self.flush(lines)
+            except Exception:
+                # Nowhere left to log to.
+                log_stats.drop('write_failed')
+            if len(lines) < len(batch):
+                return
+
+    def flush(self, lines):
+        if not lines:
+            return
+        self.output.log(min(level for level, _ in lines), ''.join(line for _, line in lines))
+        errors = ''.join(line for level, line in lines if level >= ERROR_NO)
+        if errors:
+            self.errors.log(ERROR_NO, errors)
+
+    def stop(self, timeout=5):
+        """Write out what is queued; registered to run at exit."""
+        if self._pid == os.getpid() and self._thread.is_alive():
+            self.queue.put(None)
+            self._thread.join(timeout)
+            self._pid = None
+
+
+def compress_in_background(path):
+    """loguru `compression` callable: zip a rotated file without blocking the writer thread."""
+    threading.Thread(target=_zip_and_remove, args=(path,), name='log-compress', daemon=True).start()
+
+
+def _zip_and_remove(path):
+    try:
+        with zipfile.ZipFile(f'{path}.zip', 'w', compression=zipfile.ZIP_DEFLATED) as archive:
+            archive.write(path, os.path.basename(path))
+        os.remove(path)
+    except OSError:
+        logger.exception(f"Compressing {path} failed")
+
+
+def _all_lines(record):
+    return 'errors_only' not in record['extra']
+
+
+def _error_lines(record):
+    return 'errors_only' in record['extra']
+
+
+def add_sink(sink, level='DEBUG', serialize=True, **kwargs):
+    """Add a sink with the shared filtering and format."""
+    return logger.add(sink, level=level, filter=keep, format=json_format if serialize else TEXT_FORMAT, **kwargs)
+
+
+def configure():
+    level = _setting('LOG_LEVEL', 'DEBUG')
+    # The sink must let through the lowest level any module is configured for.
+    handler_level = min([level, *_setting('LOG_LEVELS', {}).values()], key=lambda name: logger.level(name).no)
+    diagnose = _setting('LOG_DIAGNOSE', False)
+    directory = _setting('LOG_DIR', 'logs')
+
+    logger.remove()
+    # An independent logger for the writer thread; only lines rendered by `logger` reach it.
+    output = copy.deepcopy(logger)
+    output.add(sys.stdout, filter=_all_lines, format="{message}")
+    output.add(os.path.join(directory, 'debug.log'), filter=_all_lines, format="{message}",
+               rotation="10 MB", compression=compress_in_background)
+    output.add(os.path.join(directory, 'error.log'), filter=_error_lines, format="{message}",
+               rotation="10 MB", compression=compress_in_background)
+
+    sink = QueueSink(
+        output, maxsize=_setting('LOG_QUEUE_SIZE', 10000), flush_interval=_setting('LOG_FLUSH_INTERVAL', 0.05)
+    )
+    atexit.register(sink.stop)
+    logger.configure(patcher=annotate)
+    add_sink(sink, level=handler_level, serialize=_setting('LOG_JSON', True), backtrace=diagnose, diagnose=diagnose)
+    return sink
+
+
+queue_sink = configure()
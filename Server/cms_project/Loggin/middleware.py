@@ -0,0 +1,62 @@
+import re
+import uuid
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from .logger import current_request_context, logger, request_context
+
+REQUEST_ID_HEADER = 'X-Request-ID'
+# Accept a caller's (load balancer's) request id only if it looks like one.
+VALID_REQUEST_ID = re.compile(r'^[A-Za-z0-9._-]{1,64}$')
+
+
+def request_id_for(request):
+    incoming = request.headers.get(REQUEST_ID_HEADER, '')
+    return incoming if VALID_REQUEST_ID.match(incoming) else uuid.uuid4().hex
+
+
+class RequestLoggingMiddleware:
+    """
+    Gives every request an id (the caller's X-Request-ID, or a new one),
+    attaches it with the route and elapsed time to the records logged while
+    the request is served, returns it in the response headers and, with
+    LOG_ACCESS, logs one access record with the status and latency. Works in
+    both sync and async stacks.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        with request_context(request_id_for(request), request.method, request.path) as context:
+            response = self.get_response(request)
+            self.finish(context, response)
+        return response
+
+    async def __acall__(self, request):
+        with request_context(request_id_for(request), request.method, request.path) as context:
+            response = await self.get_response(request)
+            self.finish(context, response)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        # The context object is shared, so this also applies when Django runs
+        # the hook in a worker thread under ASGI.
+        context = current_request_context()
+        if context is not None:
+            context.route = request.resolver_match.route
+        return None
+
+    def finish(self, context, response):
+        response[REQUEST_ID_HEADER] = context.request_id
+        if getattr(settings, 'LOG_ACCESS', True):
+            logger.bind(
+                method=context.method, path=context.path, status=response.status_code,
+                latency_ms=context.elapsed_ms(), _access=True,
+            ).info("Request finished")
@@ -0,0 +1,189 @@
+import random
+import threading
+import time
+from contextvars import ContextVar
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, connections
+from cms_project.Loggin.logger import logger
+
+PIN_COOKIE = 'db_primary'
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+# How far behind the primary a PostgreSQL standby is, in seconds (0 on a primary or a caught-up standby).
+REPLICATION_LAG_SQL = """
+    SELECT CASE
+        WHEN NOT pg_is_in_recovery() OR pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+    END
+"""
+
+
+def replica_aliases():
+    return list(getattr(settings, 'DATABASE_REPLICAS', []))
+
+
+class RoutingState:
+    """Per-request routing decision, shared with the worker threads the request's queries run in."""
+
+    def __init__(self, pinned=False):
+        self.use_replicas = False
+        self.pinned = pinned
+        self.wrote = False
+        self.replica = None
+
+
+_routing_state = ContextVar('db_routing_state', default=None)
+
+
+class ReplicaHealth:
+    """
+    Whether each replica is reachable and within DATABASE_REPLICA_MAX_LAG
+    seconds of the primary. Results are cached per process for
+    DATABASE_REPLICA_HEALTH_INTERVAL seconds, so a dead replica costs one
+    failed connection attempt per interval rather than one per request.
+    """
+
+    def __init__(self):
+        self._status = {}
+        self._lock = threading.Lock()
+
+    def is_healthy(self, alias):
+        with self._lock:
+            healthy, expires = self._status.get(alias, (None, 0.0))
+        if healthy is not None and expires > time.monotonic():
+            return healthy
+        healthy = self.check(alias)
+        self.mark(alias, healthy)
+        return healthy
+
+    def check(self, alias):
+        connection = connections[alias]
+        try:
+            with connection.cursor() as cursor:
+                if connection.vendor == 'postgresql':
+                    cursor.execute(REPLICATION_LAG_SQL)
+                else:
+                    cursor.execute('SELECT 0')
+                lag = float(cursor.fetchone()[0])
+        except DatabaseError as e:
+            logger.warning(f"Read replica {alias} is unavailable, reading from the primary: {e}")
+            connection.close()
+            return False
+        max_lag = getattr(settings, 'DATABASE_REPLICA_MAX_LAG', 5)
+        if lag > max_lag:
+            logger.warning(f"Read replica {alias} is {lag:.1f}s behind the primary, reading from the primary")
+            return False
+        return True
+
+    def mark(self, alias, healthy):
+        interval = getattr(settings, 'DATABASE_REPLICA_HEALTH_INTERVAL', 5)
+        with self._lock:
+            self._status[alias] = (healthy, time.monotonic() + interval)
+
+    def reset(self):
+        with self._lock:
+            self._status.clear()
+
+
+replica_health = ReplicaHealth()
+
+
+class PrimaryReplicaRouter:
+    """
+    Sends the reads of requests marked by ReplicaRoutingMiddleware to a
+    healthy replica, one per request so that a count and its page come from
+    the same snapshot. Everything else uses the primary: writes, reads in a
+    transaction on the primary, reads of a request that has written, reads
+    of a user pinned after a recent write, and code running outside a
+    request (management commands, the like flusher).
+    """
+
+    def db_for_read(self, model, **hints):
+        state = _routing_state.get()
+        if state is None or not state.use_replicas or state.pinned or state.wrote:
+            return DEFAULT_DB_ALIAS
+        if connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return DEFAULT_DB_ALIAS
+        if state.replica is None:
+            healthy = [alias for alias in replica_aliases() if replica_health.is_healthy(alias)]
+            state.replica = random.choice(healthy) if healthy else DEFAULT_DB_ALIAS
+        return state.replica
+
+    def db_for_write(self, model, **hints):
+        state = _routing_state.get()
+        if state is not None:
+            state.wrote = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same rows as the primary.
+        databases = {DEFAULT_DB_ALIAS, *replica_aliases()}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Replicas are migrated through replication, not by `migrate`.
+        if db in replica_aliases():
+            return False
+        return None
+
+
+class ReplicaRoutingMiddleware:
+    """
+    Lets safe-method requests to the views in DATABASE_REPLICA_VIEWS read
+    from a replica. A request that writes sets a short-lived cookie so the
+    same client reads from the primary for DATABASE_REPLICA_PIN_SECONDS and
+    sees its own post or comment before the replicas catch up. Works in both
+    sync and async stacks.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        state = RoutingState(pinned=PIN_COOKIE in request.COOKIES)
+        token = _routing_state.set(state)
+        try:
+            response = self.get_response(request)
+        finally:
+            _routing_state.reset(token)
+        return self.pin(state, response)
+
+    async def __acall__(self, request):
+        state = RoutingState(pinned=PIN_COOKIE in request.COOKIES)
+        token = _routing_state.set(state)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _routing_state.reset(token)
+        return self.pin(state, response)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        # The state object is shared, so this also applies when Django runs
+        # the hook in a worker thread under ASGI.
+        state = _routing_state.get()
+        if state is not None and request.method in SAFE_METHODS and replica_aliases():
+            state.use_replicas = request.resolver_match.view_name in getattr(settings, 'DATABASE_REPLICA_VIEWS', ())
+        return None
+
+    def pin(self, state, response):
+        if state.wrote:
+            response.set_cookie(
+                key=PIN_COOKIE,
+                value='1',
+                max_age=getattr(settings, 'DATABASE_REPLICA_PIN_SECONDS', 10),
+                httponly=True,
+                secure=True,
+                samesite='None',
+                path='/'
+            )
+        return response
@@ -0,0 +1,329 @@
+import os
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+import redis
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+from cms_project.Loggin.logger import log_stats, logger
+from cms_project.redis_client import get_redis
+
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+CONNECTION_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5)
+
+FAMILIES = (
+    ('cms_requests_total', 'counter', 'Requests by view, method and status code.'),
+    ('cms_request_duration_seconds', 'histogram', 'Time spent in the view and the middleware below it.'),
+    ('cms_request_queries', 'histogram', 'SQL queries run per request.'),
+    ('cms_request_sql_seconds_total', 'counter', 'Time spent executing SQL.'),
+    ('cms_response_size_bytes_total', 'counter', 'Response body bytes (streaming responses are not counted).'),
+    ('cms_query_budget_exceeded_total', 'counter', 'Requests that ran more queries than their budget.'),
+    ('cms_db_connections_total', 'counter', 'Database connections handed to Django, by mode (direct or pool) and outcome.'),
+    ('cms_db_connection_wait_seconds', 'histogram', 'Time to get a database connection: connecting, or waiting for a pool slot.'),
+)
+# Pool gauges are read from the worker serving the scrape when the page is rendered.
+POOL_FAMILIES = (
+    ('cms_db_pool_size', 'size', 'Open connections in the pool.'),
+    ('cms_db_pool_available', 'available', 'Idle connections in the pool.'),
+    ('cms_db_pool_max', 'max', 'Maximum size of the pool.'),
+    ('cms_db_pool_requests_waiting', 'waiting', 'Requests queued for a pool connection.'),
+)
+HISTOGRAM_SUFFIXES = ('_bucket', '_sum', '_count')
+
+
+def _label_value(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(**labels):
+    return ','.join(f'{name}="{_label_value(value)}"' for name, value in labels.items())
+
+
+def _format(value):
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+def _family(name):
+    for suffix in HISTOGRAM_SUFFIXES:
+        if name.endswith(suffix):
+            return name[:-len(suffix)]
+    return name
+
+
+def _histogram(updates, name, labels, value, buckets):
+    updates[f'{name}_sum{{{labels}}}'] = value
+    updates[f'{name}_count{{{labels}}}'] = 1
+    for bound in buckets:
+        if value <= bound:
+            updates[f'{name}_bucket{{{labels},le="{bound}"}}'] = 1
+    updates[f'{name}_bucket{{{labels},le="+Inf"}}'] = 1
+
+
+def pool_stats():
+    """Pool stats per database alias, for the backends that pool (cms_project.postgresql with OPTIONS["pool"])."""
+    stats = {}
+    for alias in connections:
+        connection = connections[alias]
+        if hasattr(connection, 'pool_stats'):
+            alias_stats = connection.pool_stats()
+            if alias_stats is not None:
+                stats[alias] = alias_stats
+    return stats
+
+
+def _sort_key(field):
+    # Buckets in ascending `le` order rather than string order.
+    if ',le="' not in field:
+        return field, 0.0
+    series, bound = field.rsplit(',le="', 1)
+    return series, float(bound[:-2])
+
+
+class MetricsRegistry:
+    """
+    Request metrics shared by every worker.
+
+    Series are fields of one Redis hash (`<metric>{<labels>}` -> value), so
+    each request costs a single pipelined round trip and every worker adds to
+    the same totals. Histogram buckets are incremented cumulatively at write
+    time, which makes rendering the Prometheus text format a plain sort.
+    Without REDIS_URL the series live in process memory (development, tests).
+    """
+    key = 'metrics:series'
+
+    def __init__(self, client=None):
+        self._client = client
+        self._local = defaultdict(float)
+        self._lock = threading.Lock()
+
+    @property
+    def client(self):
+        return self._client or get_redis()
+
+    def observe(self, view, route, method, status, duration, queries, sql_time, size, over_budget):
+        labels = _labels(view=view, route=route, method=method)
+        updates = {
+            f'cms_requests_total{{{labels},status="{status}"}}': 1,
+            f'cms_request_sql_seconds_total{{{labels}}}': sql_time,
+        }
+        _histogram(updates, 'cms_request_duration_seconds', labels, duration, DURATION_BUCKETS)
+        _histogram(updates, 'cms_request_queries', labels, queries, QUERY_BUCKETS)
+        if size is not None:
+            updates[f'cms_response_size_bytes_total{{{labels}}}'] = size
+        if over_budget:
+            updates[f'cms_query_budget_exceeded_total{{{labels}}}'] = 1
+        self._increment(updates)
+
+    def observe_connection(self, alias, mode, duration, ok):
+        labels = _labels(alias=alias, mode=mode)
+        updates = {f'cms_db_connections_total{{{labels},outcome="{"ok" if ok else "error"}"}}': 1}
+        _histogram(updates, 'cms_db_connection_wait_seconds', labels, duration, CONNECTION_BUCKETS)
+        self._increment(updates)
+
+    def series(self):
+        client = self.client
+        if client is None:
+            with self._lock:
+                return dict(self._local)
+        return {field: float(value) for field, value in client.hgetall(self.key).items()}
+
+    def render(self):
+        """All series in the Prometheus text exposition format."""
+        families = defaultdict(list)
+        for field, value in self.series().items():
+            families[_family(field.split('{', 1)[0])].append((field, value))
+        lines = []
+        for family, kind, description in FAMILIES:
+            lines.append(f'# HELP {family} {description}')
+            lines.append(f'# TYPE {family} {kind}')
+            for field, value in sorted(families[family], key=lambda item: _sort_key(item[0])):
+                lines.append(f'{field} {_format(value)}')
+        pools = pool_stats()
+        for family, key, description in POOL_FAMILIES if pools else ():
+            lines.append(f'# HELP {family} {description}')
+            lines.append(f'# TYPE {family} gauge')
+            for alias, stats in sorted(pools.items()):
+                lines.append(f'{family}{{{_labels(alias=alias, pid=os.getpid())}}} {_format(stats[key])}')
+        lines.extend(self.render_logging())
+        return '\n'.join(lines) + '\n'
+
+    def render_logging(self):
+        # Per-process counters, like the pool gauges.
+        stats = log_stats.snapshot()
+        pid = os.getpid()
+        lines = [
+            '# HELP cms_log_records_total Log records kept, by level.',
+            '# TYPE cms_log_records_total counter',
+        ]
+        lines.extend(
+            f'cms_log_records_total{{{_labels(level=level, pid=pid)}}} {count}' for level, count in sorted(stats['records'].items())
+        )
+        lines.append('# HELP cms_log_records_dropped_total Log records dropped by level, sampling or the per-request limit.')
+        lines.append('# TYPE cms_log_records_dropped_total counter')
+        lines.extend(
+            f'cms_log_records_dropped_total{{{_labels(reason=reason, pid=pid)}}} {count}'
+            for reason, count in sorted(stats['dropped'].items())
+        )
+        lines.append('# HELP cms_log_emit_seconds_total Time callers spent filtering, formatting and queueing log records.')
+        lines.append('# TYPE cms_log_emit_seconds_total counter')
+        lines.append(f'cms_log_emit_seconds_total{{{_labels(pid=pid)}}} {_format(stats["emit_seconds"])}')
+        return lines
+
+    def reset(self):
+        client = self.client
+        if client is None:
+            with self._lock:
+                self._local.clear()
+        else:
+            client.delete(self.key)
+
+    def _increment(self, updates):
+        client = self.client
+        if client is None:
+            with self._lock:
+                for field, amount in updates.items():
+                    self._local[field] += amount
+            return
+        try:
+            with client.pipeline(transaction=False) as pipe:
+                for field, amount in updates.items():
+                    if isinstance(amount, float):
+                        pipe.hincrbyfloat(self.key, field, amount)
+                    else:
+                        pipe.hincrby(self.key, field, amount)
+                pipe.execute()
+        except redis.RedisError:
+            logger.exception("Recording request metrics failed")
+
+
+metrics = MetricsRegistry()
+
+
+class QueryCounter:
+    """Queries and SQL time of one request, counted by `count_queries`. Nested counters also count into the outer one."""
+
+    def __init__(self, parent=None):
+        self.count = 0
+        self.duration = 0.0
+        self.parent = parent
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.add(time.perf_counter() - start)
+
+    def add(self, duration):
+        counter = self
+        while counter is not None:
+            counter.count += 1
+            counter.duration += duration
+            counter = counter.parent
+
+
+_current_counter = ContextVar('query_counter', default=None)
+
+
+def count_queries(execute, sql, params, many, context):
+    """
+    Execute wrapper installed on every connection. It reports to the counter
+    of the current context, which sync_to_async carries into the worker
+    threads where async views run their queries.
+    """
+    counter = _current_counter.get()
+    if counter is None:
+        return execute(sql, params, many, context)
+    return counter(execute, sql, params, many, context)
+
+
+def install_query_counter(connection):
+    if count_queries not in connection.execute_wrappers:
+        connection.execute_wrappers.append(count_queries)
+
+
+def install_on_new_connection(sender, connection, **kwargs):
+    install_query_counter(connection)
+
+
+connection_created.connect(install_on_new_connection, dispatch_uid='metrics_install_query_counter')
+
+
+@contextmanager
+def counting_queries():
+    """Count the queries run in this context (and threads it hands work to) until the block exits."""
+    for connection in connections.all():
+        install_query_counter(connection)
+    counter = QueryCounter(parent=_current_counter.get())
+    token = _current_counter.set(counter)
+    try:
+        yield counter
+    finally:
+        _current_counter.reset(token)
+
+
+def query_budget(view_name):
+    budgets = getattr(settings, 'METRICS_QUERY_BUDGETS', {})
+    return budgets.get(view_name, getattr(settings, 'METRICS_QUERY_BUDGET', 20))
+
+
+class RequestMetricsMiddleware:
+    """
+    Records latency, SQL query count and time, and response size for every
+    request, labelled by the resolved URL name, and logs requests that run
+    more queries than METRICS_QUERY_BUDGET (or their METRICS_QUERY_BUDGETS
+    entry). Works in both sync and async stacks.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        if not getattr(settings, 'METRICS_ENABLED', True):
+            return self.get_response(request)
+
+        start = time.perf_counter()
+        with counting_queries() as counter:
+            response = self.get_response(request)
+        self.record(request, response, time.perf_counter() - start, counter)
+        return response
+
+    async def __acall__(self, request):
+        if not getattr(settings, 'METRICS_ENABLED', True):
+            return await self.get_response(request)
+
+        start = time.perf_counter()
+        with counting_queries() as counter:
+            response = await self.get_response(request)
+        # Writing to Redis blocks, so keep it off the event loop.
+        await sync_to_async(self.record, thread_sensitive=False)(request, response, time.perf_counter() - start, counter)
+        return response
+
+    def record(self, request, response, duration, counter):
+        match = request.resolver_match
+        view = match.view_name if match else 'unresolved'
+        route = match.route if match else ''
+        budget = query_budget(view)
+        over_budget = counter.count > budget
+        if over_budget:
+            logger.warning(
+                f"Query budget exceeded: {request.method} {request.path} ({view}) ran {counter.count} queries, "
+                f"budget {budget}"
+            )
+        size = None if response.streaming else len(response.content)
+        metrics.observe(
+            view, route, request.method, response.status_code, duration, counter.count, counter.duration, size,
+            over_budget,
+        )
@@ -0,0 +1,36 @@
+"""
+The PostgreSQL backend, plus connection metrics: every connection handed to
+Django is counted and the time it took is recorded, whether that is a new
+TCP/TLS/auth handshake (persistent connections) or the wait for a free slot
+in the psycopg pool (OPTIONS["pool"]).
+"""
+import time
+from django.db.backends.postgresql import base
+from cms_project.metrics import metrics
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+
+    def get_new_connection(self, conn_params):
+        mode = 'pool' if self.pool else 'direct'
+        start = time.perf_counter()
+        try:
+            connection = super().get_new_connection(conn_params)
+        except Exception:
+            metrics.observe_connection(self.alias, mode, time.perf_counter() - start, ok=False)
+            raise
+        metrics.observe_connection(self.alias, mode, time.perf_counter() - start, ok=True)
+        return connection
+
+    def pool_stats(self):
+        """Size and queue of this process's pool for the alias, or None without pooling."""
+        pool = self.pool
+        if pool is None:
+            return None
+        stats = pool.get_stats()
+        return {
+            'size': stats.get('pool_size', 0),
+            'available': stats.get('pool_available', 0),
+            'max': stats.get('pool_max', 0),
+            'waiting': stats.get('requests_waiting', 0),
+        }
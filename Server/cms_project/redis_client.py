@@ -0,0 +1,22 @@
+import threading
+import redis
+from django.conf import settings
+
+_client = None
+_lock = threading.Lock()
+
+
+def get_redis():
+    """
+    Shared redis-py client for features that need data structures beyond the
+    cache API (sets, sorted sets). Returns None when REDIS_URL is not configured.
+    """
+    global _client
+    url = getattr(settings, 'REDIS_URL', None)
+    if not url:
+        return None
+    if _client is None:
+        with _lock:
+            if _client is None:
+                _client = redis.Redis.from_url(url, decode_responses=True)
+    return _client
@@ -0,0 +1,155 @@
+"""
+Fast-path serialization for hot list endpoints.
+
+A ValuesSerializer reads a DRF ModelSerializer's fields once and compiles
+them into the `values_list()` columns they need and a mapper per field, so
+a page is serialized from plain row tuples instead of model instances:
+
+    rows = explore_list_values.queryset(queryset)     # values_list(..., named=True)
+    data = explore_list_values.serialize(page_of_rows, context)
+
+The dicts produced are equal to `serializer_class(instances, many=True).data`
+key for key, in the same order. Fields whose representation is the stored
+value (char, integer, boolean, JSON) are copied as is; other fields call
+the DRF field's own `to_representation`; nested serializers are flattened
+into `relation__field` columns and PrimaryKeyRelatedField reads the
+foreign key column.
+
+A SerializerMethodField is supported when the serializer names the model
+fields its method reads in `values_sources`, e.g.
+`values_sources = {'display_name': ('first_name', 'last_name')}`; the
+method is then called with an object carrying only those attributes.
+Anything else that needs a model instance (file fields, many-related and
+hyperlinked fields, `source='*'`) raises ImproperlyConfigured when the
+serializer is compiled.
+"""
+from operator import itemgetter
+from types import SimpleNamespace
+from django.core.exceptions import ImproperlyConfigured
+from rest_framework import serializers
+
+# Fields whose representation of a database value is the value itself.
+IDENTITY_FIELDS = (serializers.CharField, serializers.IntegerField, serializers.BooleanField)
+
+# Fields that need a model instance: files, other serializers (lists, plain
+# Serializers) and related fields other than PrimaryKeyRelatedField.
+UNSUPPORTED_FIELDS = (
+    serializers.FileField, serializers.BaseSerializer, serializers.RelatedField, serializers.ManyRelatedField,
+)
+
+VALUE, NESTED, METHOD = 'value', 'nested', 'method'
+
+
+class ValuesSerializer:
+    def __init__(self, serializer_class):
+        self.serializer_class = serializer_class
+        self._columns = None
+        self._plan = None
+
+    @property
+    def columns(self):
+        """The values_list() columns of one serialized row."""
+        self._compile()
+        return self._columns
+
+    def queryset(self, queryset):
+        """`queryset` as named rows of `columns`, plus its ordering fields (read by the cursor pagination)."""
+        columns = list(self.columns)
+        for field in queryset.query.order_by:
+            if isinstance(field, str) and field != '?':
+                name = field.lstrip('-')
+                if name not in columns:
+                    columns.append(name)
+        if 'id' not in columns:
+            columns.append('id')
+        return queryset.values_list(*columns, named=True)
+
+    def serialize(self, rows, context=None):
+        """Serialized dicts of `rows` from `queryset()`."""
+        build = self._bind(self._compiled_plan(), context or {})
+        return [build(row) for row in rows]
+
+    def _compiled_plan(self):
+        self._compile()
+        return self._plan
+
+    def _compile(self):
+        if self._plan is not None:
+            return
+        columns = {}
+        plan = self._compile_serializer(self.serializer_class(), '', columns)
+        self._columns, self._plan = tuple(columns), plan
+
+    def _compile_serializer(self, serializer, prefix, columns):
+        def column(path):
+            return columns.setdefault(path, len(columns))
+
+        plan = []
+        for name, field in serializer.fields.items():
+            if field.write_only:
+                continue
+            if isinstance(field, serializers.SerializerMethodField):
+                sources = getattr(serializer, 'values_sources', {}).get(name)
+                if sources is None:
+                    raise ImproperlyConfigured(
+                        f"{type(serializer).__name__}.values_sources must list the fields {name} reads."
+                    )
+                attrs = tuple((attr, column(prefix + attr)) for attr in sources)
+                plan.append((METHOD, name, (type(serializer), field.method_name, attrs)))
+                continue
+            path = prefix + field.source.replace('.', '__')
+            if isinstance(field, serializers.ModelSerializer) and field.source != '*':
+                pk_index = column(f'{path}__{field.Meta.model._meta.pk.name}')
+                plan.append((NESTED, name, (pk_index, self._compile_serializer(field, f'{path}__', columns))))
+            elif isinstance(field, serializers.PrimaryKeyRelatedField):
+                to_representation = field.pk_field.to_representation if field.pk_field is not None else None
+                plan.append((VALUE, name, (column(path), to_representation)))
+            elif isinstance(field, UNSUPPORTED_FIELDS) or field.source == '*':
+                raise ImproperlyConfigured(
+                    f"{type(serializer).__name__}.{name} ({type(field).__name__}) needs a model instance "
+                    f"and cannot be serialized from values."
+                )
+            elif type(field) in IDENTITY_FIELDS or (isinstance(field, serializers.JSONField) and not field.binary):
+                plan.append((VALUE, name, (column(path), None)))
+            else:
+                plan.append((VALUE, name, (column(path), field.to_representation)))
+        return plan
+
+    def _bind(self, plan, context):
+        """Row -> dict function for one call, with method fields bound to `context`."""
+        getters = []
+        for kind, name, spec in plan:
+            if kind == VALUE:
+                index, to_representation = spec
+                get = itemgetter(index) if to_representation is None else _mapped(index, to_representation)
+            elif kind == NESTED:
+                pk_index, nested_plan = spec
+                get = _nested(pk_index, self._bind(nested_plan, context))
+            else:
+                serializer_class, method_name, attrs = spec
+                get = _method(getattr(serializer_class(context=context), method_name), attrs)
+            getters.append((name, get))
+        getters = tuple(getters)
+
+        def build(row):
+            return {name: get(row) for name, get in getters}
+        return build
+
+
+def _mapped(index, to_representation):
+    def get(row):
+        value = row[index]
+        return None if value is None else to_representation(value)
+    return get
+
+
+def _nested(pk_index, build):
+    def get(row):
+        return None if row[pk_index] is None else build(row)
+    return get
+
+
+def _method(method, attrs):
+    def get(row):
+        return method(SimpleNamespace(**{attr: row[index] for attr, index in attrs}))
+    return get
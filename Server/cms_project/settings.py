@@ -1,176 +1,334 @@
-import os
-from dotenv import load_dotenv
-from pathlib import Path
-from datetime import timedelta
-
-load_dotenv()
-
-BASE_DIR = Path(__file__).resolve().parent.parent
-
-SECRET_KEY = os.getenv('SECRET_KEY')
-
-# CORS_ALLOWED_ORIGINS = [
-#     "http://localhost:5173",
-# ]
-CORS_ALLOW_ALL_ORIGINS = True
-
-CORS_ALLOW_CREDENTIALS = True
-
-DEBUG = True
-
-ALLOWED_HOSTS = os.getenv("ALLOWED_HOSTS", "").split(",")
-
-CSRF_TRUSTED_ORIGINS = [
-    'https://cms-application-v7cg.onrender.com',
-]
-
-
-INSTALLED_APPS = [
-    'django.contrib.admin',
-    'django.contrib.auth',
-    'django.contrib.contenttypes',
-    'django.contrib.sessions',
-    'django.contrib.messages',
-    'django.contrib.staticfiles',
-    'corsheaders',
-    'rest_framework_simplejwt',
-    'users',
-    'authCustom',
-    'django_filters',
-    'explore',
-]
-
-AUTH_USER_MODEL = 'authCustom.Profile'
-
-# AUTHENTICATION_BACKENDS = [
-#     'authCustom.backends.EmailBackend',
-# ]
-AUTHENTICATION_BACKENDS = [
-    'django.contrib.auth.backends.ModelBackend',
-    'authCustom.backends.EmailBackend',
-]
-
-
-REST_FRAMEWORK = {
-    'DEFAULT_AUTHENTICATION_CLASSES': (
-        'authCustom.authentication.CookieJWTAuthentication',
-    ),
-    'DEFAULT_PERMISSION_CLASSES': [
-        'rest_framework.permissions.IsAuthenticated',
-    ],
-    'DEFAULT_FILTER_BACKENDS': [
-        'django_filters.rest_framework.DjangoFilterBackend',
-    ],
-    'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
-    'PAGE_SIZE': 10,
-}
-
-MIDDLEWARE = [
-    'corsheaders.middleware.CorsMiddleware',
-    'django.middleware.security.SecurityMiddleware',
-    'django.contrib.sessions.middleware.SessionMiddleware',
-    'django.middleware.common.CommonMiddleware',
-    'django.middleware.csrf.CsrfViewMiddleware',
-    'django.contrib.auth.middleware.AuthenticationMiddleware',
-    'django.contrib.messages.middleware.MessageMiddleware',
-    'django.middleware.clickjacking.XFrameOptionsMiddleware',
-]
-
-ROOT_URLCONF = 'cms_project.urls'
-
-TEMPLATES = [
-    {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
-        'DIRS': [],
-        'APP_DIRS': True,
-        'OPTIONS': {
-            'context_processors': [
-                'django.template.context_processors.request',
-                'django.contrib.auth.context_processors.auth',
-                'django.contrib.messages.context_processors.messages',
-            ],
-        },
-    },
-]
-
-WSGI_APPLICATION = 'cms_project.wsgi.application'
-
-# DATABASES = {
-#     'default': {
-#         'ENGINE': 'django.db.backends.postgresql',
-#         'NAME': os.getenv("POSTGRES_DB"),
-#         'USER': 'postgres',
-#         'PASSWORD': 'mnbmnb',
-#         'HOST': 'localhost',
-#         'PORT': '5432',
-#     }
-# }
-
-DATABASES = {
-    "default": {
-        "ENGINE": "django.db.backends.postgresql",
-        "NAME": os.getenv("POSTGRES_DB"),
-        "USER": os.getenv("POSTGRES_USER"),
-        "PASSWORD": os.getenv("POSTGRES_PASSWORD"),
-        "HOST": os.getenv("POSTGRES_HOST"),
-        "PORT": os.getenv("POSTGRES_PORT"),
-    }
-}
-
-# Password validation
-# https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
-
-AUTH_PASSWORD_VALIDATORS = [
-    {
-        'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator',
-    },
-    {
-        'NAME': 'django.contrib.auth.password_validation.MinimumLengthValidator',
-    },
-    {
-        'NAME': 'django.contrib.auth.password_validation.CommonPasswordValidator',
-    },
-    {
-        'NAME': 'django.contrib.auth.password_validation.NumericPasswordValidator',
-    },
-]
-
-
-# Internationalization
-# https://docs.djangoproject.com/en/5.2/topics/i18n/
-
-LANGUAGE_CODE = 'en-us'
-
-TIME_ZONE = 'UTC'
-
-USE_I18N = True
-
-USE_TZ = True
-
-
-# Static files (CSS, JavaScript, Images)
-# https://docs.djangoproject.com/en/5.2/howto/static-files/
-
-STATIC_URL = 'static/'
-
-# Default primary key field type
-# https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
-
-DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
-
-SIMPLE_JWT = {
-    'LEEWAY': 100,
-    "ACCESS_TOKEN_LIFETIME": timedelta(days=3),
-    "REFRESH_TOKEN_LIFETIME": timedelta(days=7),
-    "ROTATE_REFRESH_TOKENS": True,
-    "BLACKLIST_AFTER_ROTATION": True,
-    "ALGORITHM": "HS256",
-    "SIGNING_KEY": SECRET_KEY,
-    "AUTH_HEADER_TYPES": ("Bearer",), 
-    "AUTH_COOKIE": "access_token",
-    "AUTH_COOKIE_REFRESH": "refresh_token",
-    "AUTH_COOKIE_SECURE": False,
-    "AUTH_COOKIE_HTTP_ONLY": True,
-    "AUTH_COOKIE_PATH": "/",
-    "AUTH_COOKIE_SAMESITE": "Lax",
+import os
+from dotenv import load_dotenv
+from pathlib import Path
+from datetime import timedelta
+
+load_dotenv()
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+
+SECRET_KEY = os.getenv('SECRET_KEY')
+
+# CORS_ALLOWED_ORIGINS = [
+#     "http://localhost:5173",
+# ]
+CORS_ALLOW_ALL_ORIGINS = True
+
+CORS_ALLOW_CREDENTIALS = True
+
+DEBUG = True
+
+ALLOWED_HOSTS = os.getenv("ALLOWED_HOSTS", "").split(",")
+
+CSRF_TRUSTED_ORIGINS = [
+    'https://cms-application-v7cg.onrender.com',
+]
+
+
+INSTALLED_APPS = [
+    'django.contrib.admin',
+    'django.contrib.auth',
+    'django.contrib.contenttypes',
+    'django.contrib.sessions',
+    'django.contrib.messages',
+    'django.contrib.staticfiles',
+    'django.contrib.postgres',
+    'corsheaders',
+    'rest_framework_simplejwt',
+    'users',
+    'authCustom',
+    'django_filters',
+    'explore',
+]
+
+AUTH_USER_MODEL = 'authCustom.Profile'
+
+# AUTHENTICATION_BACKENDS = [
+#     'authCustom.backends.EmailBackend',
+# ]
+AUTHENTICATION_BACKENDS = [
+    'django.contrib.auth.backends.ModelBackend',
+    'authCustom.backends.EmailBackend',
+]
+
+
+REST_FRAMEWORK = {
+    'DEFAULT_AUTHENTICATION_CLASSES': (
+        'authCustom.authentication.CookieJWTAuthentication',
+    ),
+    'DEFAULT_PERMISSION_CLASSES': [
+        'rest_framework.permissions.IsAuthenticated',
+    ],
+    'DEFAULT_FILTER_BACKENDS': [
+        'django_filters.rest_framework.DjangoFilterBackend',
+    ],
+    'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
+    'PAGE_SIZE': 10,
+    'DEFAULT_RENDERER_CLASSES': [
+        'cms_project.renderers.ORJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+}
+
+MIDDLEWARE = [
+    'cms_project.Loggin.middleware.RequestLoggingMiddleware',
+    'cms_project.metrics.RequestMetricsMiddleware',
+    'cms_project.db_router.ReplicaRoutingMiddleware',
+    'corsheaders.middleware.CorsMiddleware',
+    'django.middleware.security.SecurityMiddleware',
+    'django.contrib.sessions.middleware.SessionMiddleware',
+    'django.middleware.common.CommonMiddleware',
+    'django.middleware.csrf.CsrfViewMiddleware',
+    'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'django.contrib.messages.middleware.MessageMiddleware',
+    'django.middleware.clickjacking.XFrameOptionsMiddleware',
+]
+
+ROOT_URLCONF = 'cms_project.urls'
+
+TEMPLATES = [
+    {
+        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        'DIRS': [],
+        'APP_DIRS': True,
+        'OPTIONS': {
+            'context_processors': [
+                'django.template.context_processors.request',
+                'django.contrib.auth.context_processors.auth',
+                'django.contrib.messages.context_processors.messages',
+            ],
+        },
+    },
+]
+
+WSGI_APPLICATION = 'cms_project.wsgi.application'
+
+# DATABASES = {
+#     'default': {
+#         'ENGINE': 'django.db.backends.postgresql',
+#         'NAME': os.getenv("POSTGRES_DB"),
+#         'USER': 'postgres',
+#         'PASSWORD': 'mnbmnb',
+#         'HOST': 'localhost',
+#         'PORT': '5432',
+#     }
+# }
+
+DATABASES = {
+    "default": {
+        "ENGINE": "cms_project.postgresql",
+        "NAME": os.getenv("POSTGRES_DB"),
+        "USER": os.getenv("POSTGRES_USER"),
+        "PASSWORD": os.getenv("POSTGRES_PASSWORD"),
+        "HOST": os.getenv("POSTGRES_HOST"),
+        "PORT": os.getenv("POSTGRES_PORT"),
+    }
+}
+
+# Connection reuse. By default connections persist for DATABASE_CONN_MAX_AGE
+# seconds and are health-checked before reuse (set it to 0 under ASGI, where
+# every request runs in a new thread). DATABASE_POOL=True uses psycopg's pool
+# instead; it needs psycopg[pool] installed in place of psycopg2-binary.
+# Connection and pool metrics are served at api/v1/metrics/.
+DATABASE_POOL = os.getenv("DATABASE_POOL", "False") == "True"
+# Set when connecting through PgBouncer (or similar) in transaction mode:
+# consecutive transactions may run on different server connections, so
+# nothing may rely on session state. Server-side cursors (WITH HOLD outside
+# a transaction) and psycopg's prepared statements are turned off.
+DATABASE_TRANSACTION_POOLING = os.getenv("DATABASE_TRANSACTION_POOLING", "False") == "True"
+DATABASES["default"].update({
+    "CONN_MAX_AGE": 0 if DATABASE_POOL else int(os.getenv("DATABASE_CONN_MAX_AGE", 60)),
+    "CONN_HEALTH_CHECKS": True,
+    "DISABLE_SERVER_SIDE_CURSORS": DATABASE_TRANSACTION_POOLING,
+    "OPTIONS": {},
+})
+if DATABASE_POOL:
+    DATABASES["default"]["OPTIONS"]["pool"] = {
+        "min_size": int(os.getenv("DATABASE_POOL_MIN_SIZE", 2)),
+        "max_size": int(os.getenv("DATABASE_POOL_MAX_SIZE", 10)),
+        # Seconds a request waits for a free connection before failing.
+        "timeout": float(os.getenv("DATABASE_POOL_TIMEOUT", 10)),
+        "max_idle": float(os.getenv("DATABASE_POOL_MAX_IDLE", 300)),
+        "max_lifetime": float(os.getenv("DATABASE_POOL_MAX_LIFETIME", 1800)),
+    }
+    if DATABASE_TRANSACTION_POOLING:
+        DATABASES["default"]["OPTIONS"]["prepare_threshold"] = None
+
+# Read replicas (cms_project/db_router.py): POSTGRES_REPLICA_HOSTS=host[:port],...
+# Each replica uses the primary's name and credentials. Safe-method requests to
+# DATABASE_REPLICA_VIEWS read from a healthy replica; a client that wrote reads
+# from the primary for DATABASE_REPLICA_PIN_SECONDS afterwards.
+for index, replica_host in enumerate(filter(None, os.getenv("POSTGRES_REPLICA_HOSTS", "").split(",")), start=1):
+    replica_host, _, replica_port = replica_host.strip().partition(":")
+    DATABASES[f"replica{index}"] = {
+        **DATABASES["default"],
+        "HOST": replica_host,
+        "PORT": replica_port or DATABASES["default"]["PORT"],
+        "OPTIONS": {**DATABASES["default"]["OPTIONS"], "connect_timeout": 2},
+        "TEST": {"MIRROR": "default"},
+    }
+DATABASE_REPLICAS = [alias for alias in DATABASES if alias != "default"]
+DATABASE_ROUTERS = ["cms_project.db_router.PrimaryReplicaRouter"]
+DATABASE_REPLICA_VIEWS = [
+    "explore_blogs", "explore-facets", "personal-feed", "comments-list", "comment-replies",
+    "user-blogs", "content_categories", "posts-list", "user-list",
+]
+DATABASE_REPLICA_PIN_SECONDS = int(os.getenv("DATABASE_REPLICA_PIN_SECONDS", 10))
+DATABASE_REPLICA_MAX_LAG = float(os.getenv("DATABASE_REPLICA_MAX_LAG", 5))
+DATABASE_REPLICA_HEALTH_INTERVAL = float(os.getenv("DATABASE_REPLICA_HEALTH_INTERVAL", 5))
+
+REDIS_URL = os.getenv("REDIS_URL")
+
+if REDIS_URL:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": REDIS_URL,
+            "KEY_PREFIX": "cms",
+        }
+    }
+else:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+            "LOCATION": "cms-local",
+        }
+    }
+
+# Explore feed response cache (explore/cache.py)
+EXPLORE_CACHE_TTL = int(os.getenv("EXPLORE_CACHE_TTL", 60))
+EXPLORE_CACHE_LOCK_TIMEOUT = 10
+EXPLORE_CACHE_LOCK_WAIT = 2
+
+# Explore facet counts (explore/facets.py): filtered variants are cached this long.
+EXPLORE_FACETS_CACHE_TTL = int(os.getenv("EXPLORE_FACETS_CACHE_TTL", 30))
+EXPLORE_FACET_TAGS = 20
+
+# Serve the explore list, detail and comment list through their async views
+# (explore/async_views.py). Enable when running under an ASGI server.
+EXPLORE_ASYNC_VIEWS = os.getenv("EXPLORE_ASYNC_VIEWS", "False") == "True"
+
+# Write-behind likes (explore/likes.py). Requires REDIS_URL and a running
+# `manage.py flush_likes --loop` process.
+LIKE_WRITE_BEHIND = bool(REDIS_URL) and os.getenv("LIKE_WRITE_BEHIND", "False") == "True"
+LIKE_FLUSH_INTERVAL = float(os.getenv("LIKE_FLUSH_INTERVAL", 1))
+
+# Personalized "for you" feed (explore/feeds.py). Served from Redis sorted sets
+# when REDIS_URL is set, otherwise straight from the database. New posts reach
+# warm user lists through a `manage.py fan_out_feeds --loop` process.
+PERSONAL_FEED_LENGTH = int(os.getenv("PERSONAL_FEED_LENGTH", 500))
+PERSONAL_FEED_TTL = int(os.getenv("PERSONAL_FEED_TTL", 60 * 60 * 24))
+PERSONAL_FEED_FANOUT_INTERVAL = float(os.getenv("PERSONAL_FEED_FANOUT_INTERVAL", 1))
+
+# Trending ranking (explore/trending.py), refreshed by `manage.py update_trending --loop`.
+# Activity loses half its weight every TRENDING_HALF_LIFE_HOURS.
+TRENDING_HALF_LIFE_HOURS = float(os.getenv("TRENDING_HALF_LIFE_HOURS", 24))
+TRENDING_REFRESH_INTERVAL = float(os.getenv("TRENDING_REFRESH_INTERVAL", 300))
+# Each refresh re-scans activity stamped this many seconds before the previous
+# run, so likes and comments that commit after a run are still counted.
+TRENDING_REFRESH_OVERLAP = float(os.getenv("TRENDING_REFRESH_OVERLAP", 300))
+TRENDING_LIKE_WEIGHT = 1.0
+TRENDING_COMMENT_WEIGHT = 2.0
+TRENDING_MIN_SCORE = 0.05
+
+# Serialize the explore list, the user blog list and the admin post list from
+# values() rows instead of model instances (cms_project/serialization.py).
+FAST_SERIALIZATION = os.getenv("FAST_SERIALIZATION", "True") == "True"
+
+# Request metrics (cms_project/metrics.py), served at api/v1/metrics/. Requests
+# running more SQL queries than their budget are logged and counted.
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "True") == "True"
+METRICS_QUERY_BUDGET = int(os.getenv("METRICS_QUERY_BUDGET", 20))
+METRICS_QUERY_BUDGETS = {
+    'explore_blogs': 5,
+    'explore-facets': 5,
+    'personal-feed': 5,
+    'posts-list': 5,
+    'user-list': 5,
+}
+
+# Logging (cms_project/Loggin/logger.py): JSON lines on stdout and in LOG_DIR,
+# written by a background thread. LOG_LEVELS and LOG_SAMPLING are keyed by
+# module prefix; LOG_REQUEST_RECORD_LIMIT caps DEBUG/INFO records per request.
+LOG_LEVEL = os.getenv("LOG_LEVEL", "DEBUG" if DEBUG else "INFO")
+LOG_LEVELS = {}
+LOG_SAMPLING = {
+    "explore.views": {"DEBUG": 0.01},
+    "explore.async_views": {"DEBUG": 0.01},
+    "explore.feeds": {"DEBUG": 0.1},
+}
+LOG_REQUEST_RECORD_LIMIT = int(os.getenv("LOG_REQUEST_RECORD_LIMIT", 50))
+# Lines the writer thread may fall behind by before new records are dropped.
+LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", 10000))
+# Seconds the writer thread lets lines collect before writing them out.
+LOG_FLUSH_INTERVAL = float(os.getenv("LOG_FLUSH_INTERVAL", 0.05))
+LOG_JSON = os.getenv("LOG_JSON", "True") == "True"
+LOG_DIAGNOSE = os.getenv("LOG_DIAGNOSE", "False") == "True"
+LOG_ACCESS = os.getenv("LOG_ACCESS", "True") == "True"
+LOG_DIR = os.getenv("LOG_DIR", "logs")
+
+# Authenticated user cache (authCustom/cache.py)
+AUTH_USER_CACHE_LOCAL_TTL = int(os.getenv("AUTH_USER_CACHE_LOCAL_TTL", 5))
+AUTH_USER_CACHE_LOCAL_MAXSIZE = 1024
+AUTH_USER_CACHE_SHARED_TTL = int(os.getenv("AUTH_USER_CACHE_SHARED_TTL", 300))
+
+# Password validation
+# https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
+
+AUTH_PASSWORD_VALIDATORS = [
+    {
+        'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator',
+    },
+    {
+        'NAME': 'django.contrib.auth.password_validation.MinimumLengthValidator',
+    },
+    {
+        'NAME': 'django.contrib.auth.password_validation.CommonPasswordValidator',
+    },
+    {
+        'NAME': 'django.contrib.auth.password_validation.NumericPasswordValidator',
+    },
+]
+
+
+# Internationalization
+# https://docs.djangoproject.com/en/5.2/topics/i18n/
+
+LANGUAGE_CODE = 'en-us'
+
+TIME_ZONE = 'UTC'
+
+USE_I18N = True
+
+USE_TZ = True
+
+
+# Static files (CSS, JavaScript, Images)
+# https://docs.djangoproject.com/en/5.2/howto/static-files/
+
+STATIC_URL = 'static/'
+
+# Default primary key field type
+# https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
+
+DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
+
+# Text search configuration used for BlogPost.search_vector and explore queries.
+SEARCH_CONFIG = os.getenv("SEARCH_CONFIG", "english")
+
+SIMPLE_JWT = {
+    'LEEWAY': 100,
+    "ACCESS_TOKEN_LIFETIME": timedelta(days=3),
+    "REFRESH_TOKEN_LIFETIME": timedelta(days=7),
+    "ROTATE_REFRESH_TOKENS": True,
+    "BLACKLIST_AFTER_ROTATION": True,
+    "ALGORITHM": "HS256",
+    "SIGNING_KEY": SECRET_KEY,
+    "AUTH_HEADER_TYPES": ("Bearer",), 
+    "AUTH_COOKIE": "access_token",
+    "AUTH_COOKIE_REFRESH": "refresh_token",
+    "AUTH_COOKIE_SECURE": False,
+    "AUTH_COOKIE_HTTP_ONLY": True,
+    "AUTH_COOKIE_PATH": "/",
+    "AUTH_COOKIE_SAMESITE": "Lax",
 }
\ No newline at end of file
@@ -1,10 +1,12 @@
-from django.contrib import admin
-from django.urls import path, include
-
-urlpatterns = [
-    path('admin/', admin.site.urls),
-    path('api/v1/auth/', include('authCustom.urls')),
-    path('api/v1/user/', include('users.urls')),
-    path('api/v1/explore/', include('explore.urls')),
-    path('api/v1/admin/', include('Admin.urls')),
+from django.contrib import admin
+from django.urls import path, include
+from .views import MetricsView
+
+urlpatterns = [
+    path('admin/', admin.site.urls),
+    path('api/v1/auth/', include('authCustom.urls')),
+    path('api/v1/user/', include('users.urls')),
+    path('api/v1/explore/', include('explore.urls')),
+    path('api/v1/admin/', include('Admin.urls')),
+    path('api/v1/metrics/', MetricsView.as_view(), name='metrics'),
 ]
\ No newline at end of file
@@ -0,0 +1,12 @@
+from django.http import HttpResponse
+from rest_framework.permissions import IsAdminUser
+from rest_framework.views import APIView
+from .metrics import metrics
+
+
+class MetricsView(APIView):
+    """Request metrics of every worker in the Prometheus text format (staff only)."""
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        return HttpResponse(metrics.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
@@ -1,6 +1,29 @@
-from django.apps import AppConfig
-
-
-class ExploreConfig(AppConfig):
-    default_auto_field = 'django.db.models.BigAutoField'
-    name = 'explore'
+from django.apps import AppConfig
+
+
+class ExploreConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'explore'
+
+    def ready(self):
+        from django.db.models.signals import m2m_changed, post_delete, post_save, pre_save
+        from authCustom.models import Profile
+        from users.models import BlogPost
+        from .cache import invalidate_feed_on_delete, invalidate_feed_on_save
+        from .facets import update_facets_on_delete, update_facets_on_save
+        from .feeds import forget_feed_on_interests_change, update_feeds_on_delete, update_feeds_on_save
+        from .search import update_post_search_vector
+        from .signals import remember_previous_state
+
+        # One read of the row before a save, shared by the feed cache, personal feed and facet handlers.
+        pre_save.connect(remember_previous_state, sender=BlogPost, dispatch_uid='explore_previous_state')
+        post_save.connect(update_post_search_vector, sender=BlogPost, dispatch_uid='explore_search_vector')
+        post_save.connect(invalidate_feed_on_save, sender=BlogPost, dispatch_uid='explore_feed_cache_save')
+        post_delete.connect(invalidate_feed_on_delete, sender=BlogPost, dispatch_uid='explore_feed_cache_delete')
+        post_save.connect(update_feeds_on_save, sender=BlogPost, dispatch_uid='explore_personal_feed_save')
+        post_delete.connect(update_feeds_on_delete, sender=BlogPost, dispatch_uid='explore_personal_feed_delete')
+        post_save.connect(update_facets_on_save, sender=BlogPost, dispatch_uid='explore_facets_save')
+        post_delete.connect(update_facets_on_delete, sender=BlogPost, dispatch_uid='explore_facets_delete')
+        m2m_changed.connect(
+            forget_feed_on_interests_change, sender=Profile.interests.through, dispatch_uid='explore_personal_feed_interests'
+        )
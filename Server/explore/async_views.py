@@ -0,0 +1,171 @@
+"""
+Async versions of the read-heavy explore views, routed instead of the
+APIView classes when EXPLORE_ASYNC_VIEWS is set (deployments under an ASGI
+server). Queries go through the async ORM and the feed cache through the
+async cache API, so a worker keeps serving other requests while one waits
+on the database or Redis.
+"""
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.views import View
+from rest_framework import exceptions, status
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.request import Request
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.views import exception_handler
+from cms_project.renderers import ORJSONRenderer
+from users.models import BlogPost, Comment
+from .cache import feed_cache
+from .conditional import conditional_response, page_etag, post_etag
+from .filters import BlogPostFilter
+from .pagination import BlogPostCursorPagination, BlogPostPagination, CommentCursorPagination
+from .serializers import BlogExploreSerializer, BlogPostDetailSerializer, CommentSerializer, explore_list_values
+from .viewer import ViewerState
+from .views import CommentsListView
+
+
+class AsyncAPIView(View):
+    """
+    The part of APIView the explore read endpoints need, for `async def`
+    handlers: DRF authentication and permission classes, DRF exception
+    handling and JSON rendering. Authentication runs in a worker thread
+    because a cold user lookup queries the database. Methods without an async
+    handler are served by `sync_view` (an APIView) in a worker thread.
+    """
+    authentication_classes = api_settings.DEFAULT_AUTHENTICATION_CLASSES
+    permission_classes = [IsAuthenticated]
+    sync_view = None
+
+    @classmethod
+    def as_view(cls, **initkwargs):
+        view = super().as_view(**initkwargs)
+        # Authentication is cookie-JWT based, as with APIView.
+        view.csrf_exempt = True
+        return view
+
+    async def dispatch(self, request, *args, **kwargs):
+        method = request.method.lower()
+        handler = getattr(self, method, None) if method in self.http_method_names else None
+        if handler is None and self.sync_view is not None and hasattr(self.sync_view, method):
+            return await sync_to_async(self.sync_view.as_view())(request, *args, **kwargs)
+
+        request = Request(request, authenticators=[auth() for auth in self.authentication_classes])
+        self.request = request
+        try:
+            await sync_to_async(self.check_permissions)(request)
+            if handler is None:
+                raise exceptions.MethodNotAllowed(request.method)
+            response = await handler(request, *args, **kwargs)
+        except Exception as exc:
+            response = self.handle_exception(exc)
+        return self.render(request, response)
+
+    def check_permissions(self, request):
+        for permission in [permission() for permission in self.permission_classes]:
+            if not permission.has_permission(request, self):
+                if request.authenticators and not request.successful_authenticator:
+                    raise exceptions.NotAuthenticated()
+                raise exceptions.PermissionDenied(getattr(permission, 'message', None))
+
+    def handle_exception(self, exc):
+        if isinstance(exc, (exceptions.NotAuthenticated, exceptions.AuthenticationFailed)):
+            # As in APIView: 401 with a challenge when the authenticator has one, 403 otherwise.
+            authenticators = self.request.authenticators
+            auth_header = authenticators[0].authenticate_header(self.request) if authenticators else None
+            if auth_header:
+                exc.auth_header = auth_header
+            else:
+                exc.status_code = status.HTTP_403_FORBIDDEN
+        response = exception_handler(exc, {'view': self, 'request': self.request})
+        if response is None:
+            raise exc
+        return response
+
+    def render(self, request, response):
+        response.accepted_renderer = ORJSONRenderer()
+        response.accepted_media_type = ORJSONRenderer.media_type
+        response.renderer_context = {'view': self, 'request': request, 'response': response}
+        return response.render()
+
+
+class AsyncBlogExploreListView(AsyncAPIView):
+
+    async def get(self, request):
+        try:
+            cache_key = await feed_cache.abuild_key(request)
+            (data, response_status, etag), hit = await feed_cache.aget_or_set(cache_key, lambda: self.get_page(request))
+            if etag is None:
+                response = Response(data, status=response_status)
+            else:
+                viewer = await ViewerState.aresolve(request.user, [post['id'] for post in data['results']])
+                data = {**data, 'results': viewer.overlay(data['results'])}
+                response = conditional_response(request, viewer.etag(etag), build=lambda: data)
+            response['X-Cache'] = 'HIT' if hit else 'MISS'
+            return response
+
+        except exceptions.NotFound as e:
+            return Response({'error': str(e.detail)}, status=status.HTTP_404_NOT_FOUND)
+        except Exception as e:
+            return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+    async def get_page(self, request):
+        queryset = BlogPost.objects.filter(status='published', show=True).select_related('author', 'category').order_by('-created_at')
+
+        filterset = BlogPostFilter(request.GET, queryset=queryset)
+        if not filterset.is_valid():
+            return (filterset.errors, status.HTTP_400_BAD_REQUEST, None), False
+
+        if BlogPostCursorPagination.is_requested(request):
+            paginator = BlogPostCursorPagination()
+        else:
+            paginator = BlogPostPagination()
+        if settings.FAST_SERIALIZATION:
+            page = await paginator.apaginate_queryset(explore_list_values.queryset(filterset.qs), request)
+            results = explore_list_values.serialize(page)
+        else:
+            page = await paginator.apaginate_queryset(filterset.qs, request)
+            results = BlogExploreSerializer(page, many=True).data
+        data = paginator.get_paginated_response(results).data
+
+        return (data, status.HTTP_200_OK, page_etag(data)), True
+
+
+class AsyncBlogPostDetailView(AsyncAPIView):
+
+    async def get(self, request, id):
+        try:
+            blog_post = await BlogPost.objects.select_related('author', 'category').aget(
+                id=id, status='published', show=True
+            )
+        except BlogPost.DoesNotExist:
+            return Response({"error": "Blog post not found."}, status=status.HTTP_404_NOT_FOUND)
+        # Resolved up front: the serializer cannot query from the event loop.
+        viewer = await ViewerState.aresolve(request.user, [blog_post.id])
+        context = {'request': request, 'viewer': viewer}
+        return conditional_response(
+            request, post_etag(blog_post, request.user.id, viewer.is_liked(blog_post.id)), blog_post.updated_at,
+            build=lambda: BlogPostDetailSerializer(blog_post, context=context).data,
+        )
+
+
+class AsyncCommentsListView(AsyncAPIView):
+    """Top-level comments of a post; posting a comment is left to the sync CommentsListView."""
+    sync_view = CommentsListView
+
+    async def get(self, request, id):
+        author_id = await (
+            BlogPost.objects.filter(id=id, status='published', show=True).values_list('author_id', flat=True).afirst()
+        )
+        if author_id is None:
+            return Response({"error": "Blog post not found."}, status=status.HTTP_404_NOT_FOUND)
+        comments = (
+            Comment.objects.filter(blog_id=id, parent__isnull=True)
+            .select_related('user')
+            .order_by('-created_at', '-id')
+        )
+        paginator = CommentCursorPagination()
+        page = await paginator.apaginate_queryset(comments, request, view=self)
+        viewer = ViewerState(request.user, post_authors={id: author_id})
+        serializer = CommentSerializer(page, many=True, context={'request': request, 'viewer': viewer})
+        return paginator.get_paginated_response(serializer.data)
@@ -0,0 +1,338 @@
+"""
+API benchmark harness behind `manage.py benchmark`.
+
+A throwaway database (the test database of the configured backend) is
+seeded with a synthetic dataset, then every scenario drives a real endpoint
+through the Django test client and records latency, throughput and SQL
+query counts. Results can be saved as a baseline and later runs compared
+against it. ServerComparison measures the sync and async explore views
+against each other under concurrency.
+"""
+import asyncio
+import json
+import random
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from asgiref.sync import ThreadSensitiveContext, sync_to_async
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import close_old_connections, connections
+from django.test import AsyncClient, Client
+from django.test.utils import override_settings
+from django.urls import include, path
+from django.utils import timezone
+from rest_framework_simplejwt.tokens import RefreshToken
+from cms_project.metrics import counting_queries
+from users.models import BlogPost, Comment, ContentCategory
+from users.transfer import PostImporter
+from .facets import facet_counts
+from .search import update_search_vector
+from .trending import trending_engine
+from .urls import explore_patterns
+
+WORDS = (
+    'python', 'django', 'design', 'travel', 'music', 'health', 'science', 'startup', 'cooking', 'history',
+    'climate', 'finance', 'coffee', 'garden', 'running', 'writing', 'privacy', 'gaming', 'cinema', 'robots',
+)
+
+
+class Dataset:
+    """Deterministic synthetic content for a given size and seed."""
+
+    def __init__(self, users=200, posts=2000, categories=10, comments_per_post=5, likes_per_post=10, seed=1):
+        self.users = users
+        self.posts = posts
+        self.categories = categories
+        self.comments_per_post = comments_per_post
+        self.likes_per_post = min(likes_per_post, users)
+        self.seed = seed
+
+    def as_dict(self):
+        return {
+            'vendor': connections['default'].vendor,
+            'users': self.users, 'posts': self.posts, 'categories': self.categories,
+            'comments_per_post': self.comments_per_post, 'likes_per_post': self.likes_per_post, 'seed': self.seed,
+        }
+
+    def email(self, index):
+        return f'bench{index}@example.com'
+
+    def seed_database(self, batch_size=1000):
+        rng = random.Random(self.seed)
+        User = get_user_model()
+        User.objects.bulk_create(
+            [User(email=self.email(i), first_name=f'Bench {i}', password='!') for i in range(self.users)],
+            batch_size=batch_size,
+        )
+        staff = User.objects.create_user(email='bench-admin@example.com', first_name='Bench admin', is_staff=True)
+        ContentCategory.objects.bulk_create(
+            [ContentCategory(name=f'category-{i}') for i in range(self.categories)], ignore_conflicts=True
+        )
+
+        importer = PostImporter(batch_size=batch_size)
+        now = timezone.now()
+        batch = []
+        for i in range(self.posts):
+            batch.append(self.post_record(rng, i, now))
+            if len(batch) >= batch_size:
+                importer.import_batch(batch)
+                batch = []
+        if batch:
+            importer.import_batch(batch)
+        update_search_vector(BlogPost.objects.all())
+        trending_engine.refresh(full=True)
+        facet_counts.rebuild()
+        return staff
+
+    def post_record(self, rng, index, now):
+        # Posts are spread over the last 30 days, activity over the last 3.
+        created_at = (now - timedelta(minutes=rng.randrange(30 * 24 * 60))).isoformat()
+
+        def recent():
+            return (now - timedelta(minutes=rng.randrange(3 * 24 * 60))).isoformat()
+
+        words = [rng.choice(WORDS) for _ in range(60)]
+        comments = []
+        for key in range(self.comments_per_post):
+            # Every third comment replies to an earlier one.
+            parent = rng.randrange(key) if key and key % 3 == 0 else None
+            comments.append({
+                'key': key, 'parent': parent, 'user': self.email(rng.randrange(self.users)),
+                'content': ' '.join(rng.choice(WORDS) for _ in range(12)),
+                'created_at': recent(),
+            })
+        likers = rng.sample(range(self.users), self.likes_per_post)
+        return {
+            'author': self.email(rng.randrange(self.users)),
+            'category': f'category-{rng.randrange(self.categories)}',
+            'title': ' '.join(words[:6]).capitalize(),
+            'excerpt': ' '.join(words[:20]),
+            'content': ' '.join(words),
+            'status': 'published' if rng.random() < 0.9 else 'draft',
+            'tags': rng.sample(WORDS, 3),
+            'thumbnail': f'https://example.com/thumbs/{index}.png',
+            'created_at': created_at,
+            'updated_at': created_at,
+            'published_date': created_at,
+            'comments': comments,
+            'likes': [{'user': self.email(user), 'liked_at': recent()} for user in likers],
+        }
+
+
+class Scenario:
+    def __init__(self, name, method, url, data=None, staff=False):
+        self.name = name
+        self.method = method
+        self.url = url
+        self.data = data
+        self.staff = staff
+
+
+def default_scenarios(rng, post_ids, comment_ids):
+    # The first few pages of the lists, as long as the dataset has that many.
+    pages = max(1, min(5, len(post_ids) // 10))
+
+    def post_url(suffix=''):
+        return lambda: f'/api/v1/explore/blogs/{rng.choice(post_ids)}/{suffix}'
+
+    return [
+        Scenario('explore-list', 'get', lambda: f'/api/v1/explore/blogs/?page={rng.randint(1, pages)}'),
+        Scenario('explore-search', 'get', lambda: f'/api/v1/explore/blogs/?search={rng.choice(WORDS)}'),
+        Scenario('explore-trending', 'get', lambda: '/api/v1/explore/blogs/?sort_by=trending'),
+        Scenario('explore-detail', 'get', post_url()),
+        Scenario('like-toggle', 'post', post_url('like/')),
+        Scenario('comments-list', 'get', post_url('comments/')),
+        Scenario('comment-create', 'post', post_url('comments/'), data={'content': 'Benchmark comment'}),
+        Scenario('comment-replies', 'get', lambda: f'/api/v1/explore/blogs/comments/{rng.choice(comment_ids)}/replies/'),
+        Scenario('personal-feed', 'get', lambda: '/api/v1/explore/for-you/'),
+        Scenario('user-blogs', 'get', lambda: '/api/v1/user/blogs/user/'),
+        Scenario('admin-posts', 'get', lambda: f'/api/v1/admin/posts/?page={rng.randint(1, pages)}', staff=True),
+        Scenario('admin-users', 'get', lambda: '/api/v1/admin/users/', staff=True),
+    ]
+
+
+def percentile(samples, fraction):
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, round(fraction * len(ordered)) - 1))
+    return ordered[index]
+
+
+class Runner:
+    def __init__(self, requests=200, warmup=10, seed=1):
+        self.requests = requests
+        self.warmup = warmup
+        self.seed = seed
+
+    def client_for(self, user):
+        client = Client()
+        client.cookies['access_token'] = str(RefreshToken.for_user(user).access_token)
+        return client
+
+    def run(self, reader, staff, names=None):
+        rng = random.Random(self.seed)
+        visible = BlogPost.objects.filter(status='published', show=True)
+        post_ids = list(visible.values_list('id', flat=True))
+        comment_ids = list(
+            Comment.objects.filter(blog__in=visible, parent__isnull=True).order_by('id').values_list('id', flat=True)[:1000]
+        )
+        clients = {False: self.client_for(reader), True: self.client_for(staff)}
+        results = {}
+        for scenario in default_scenarios(rng, post_ids, comment_ids):
+            if names and scenario.name not in names:
+                continue
+            results[scenario.name] = self.run_scenario(clients[scenario.staff], scenario)
+        return results
+
+    def run_scenario(self, client, scenario):
+        send = getattr(client, scenario.method)
+        for _ in range(self.warmup):
+            send(scenario.url(), scenario.data)
+
+        durations, queries, errors = [], [], 0
+        started = time.perf_counter()
+        for _ in range(self.requests):
+            with counting_queries() as counter:
+                start = time.perf_counter()
+                response = send(scenario.url(), scenario.data)
+                durations.append(time.perf_counter() - start)
+            queries.append(counter.count)
+            if response.status_code >= 400:
+                errors += 1
+        elapsed = time.perf_counter() - started
+        return {
+            'p50_ms': round(percentile(durations, 0.50) * 1000, 3),
+            'p95_ms': round(percentile(durations, 0.95) * 1000, 3),
+            'p99_ms': round(percentile(durations, 0.99) * 1000, 3),
+            'rps': round(self.requests / elapsed, 1),
+            'queries': round(statistics.mean(queries), 2),
+            'max_queries': max(queries),
+            'errors': errors,
+        }
+
+
+class ServerComparisonURLConf:
+    """The explore routes twice: served by the APIViews and by their async versions."""
+    urlpatterns = [
+        path('wsgi/api/v1/explore/', include(explore_patterns(use_async=False))),
+        path('asgi/api/v1/explore/', include(explore_patterns(use_async=True))),
+    ]
+
+
+class ServerComparison:
+    """
+    Sync (WSGI) against async (ASGI) throughput of the explore read endpoints
+    at a given concurrency. The sync side runs one test client per thread, as
+    a threaded WSGI server would; the async side runs every client as a task
+    on one event loop, each request in its own ThreadSensitiveContext as
+    Django's ASGIHandler does. Both close their database connections after
+    each request like a server with CONN_MAX_AGE = 0.
+    """
+
+    def __init__(self, requests=200, concurrency=16, seed=1):
+        self.requests = requests
+        self.concurrency = concurrency
+        self.seed = seed
+
+    def run(self, reader):
+        rng = random.Random(self.seed)
+        post_ids = list(
+            BlogPost.objects.filter(status='published', show=True).values_list('id', flat=True)
+        )
+        pages = max(1, min(5, len(post_ids) // 10))
+        endpoints = {
+            'explore-list': lambda: f'blogs/?search={rng.choice(WORDS)}&page={rng.randint(1, pages)}',
+            'explore-detail': lambda: f'blogs/{rng.choice(post_ids)}/',
+            'comments-list': lambda: f'blogs/{rng.choice(post_ids)}/comments/',
+        }
+        cookie = str(RefreshToken.for_user(reader).access_token)
+        results = {}
+        with override_settings(ROOT_URLCONF=ServerComparisonURLConf):
+            for name, build in endpoints.items():
+                paths = [build() for _ in range(self.requests)]
+                results[name] = {}
+                for mode in ('wsgi', 'asgi'):
+                    cache.clear()
+                    urls = [f'/{mode}/api/v1/explore/{path}' for path in paths]
+                    shares = [urls[index::self.concurrency] for index in range(self.concurrency)]
+                    started = time.perf_counter()
+                    if mode == 'wsgi':
+                        samples = self.run_wsgi(cookie, shares)
+                    else:
+                        samples = asyncio.run(self.run_asgi(cookie, shares))
+                    results[name][mode] = summarize(samples, time.perf_counter() - started)
+        return results
+
+    def run_wsgi(self, cookie, shares):
+        def client_loop(urls):
+            client = Client()
+            client.cookies['access_token'] = cookie
+            samples = []
+            for url in urls:
+                start = time.perf_counter()
+                response = client.get(url)
+                samples.append((time.perf_counter() - start, response.status_code))
+                close_old_connections()
+            return samples
+
+        with ThreadPoolExecutor(max_workers=self.concurrency) as pool:
+            return [sample for samples in pool.map(client_loop, shares) for sample in samples]
+
+    async def run_asgi(self, cookie, shares):
+        async def client_loop(urls):
+            client = AsyncClient()
+            client.cookies['access_token'] = cookie
+            samples = []
+            for url in urls:
+                async with ThreadSensitiveContext():
+                    start = time.perf_counter()
+                    response = await client.get(url)
+                    samples.append((time.perf_counter() - start, response.status_code))
+                    await sync_to_async(close_old_connections)()
+            return samples
+
+        results = await asyncio.gather(*(client_loop(urls) for urls in shares))
+        return [sample for samples in results for sample in samples]
+
+
+def summarize(samples, elapsed):
+    durations = [duration for duration, _ in samples]
+    return {
+        'p50_ms': round(percentile(durations, 0.50) * 1000, 3),
+        'p95_ms': round(percentile(durations, 0.95) * 1000, 3),
+        'rps': round(len(samples) / elapsed, 1),
+        'errors': sum(1 for _, status_code in samples if status_code >= 400),
+    }
+
+
+def compare(results, baseline, threshold, min_delta_ms=2.0):
+    """
+    Return a list of regressions against `baseline`. The p95 latency may grow
+    by `threshold` (a fraction) or `min_delta_ms`, whichever is larger, so
+    sub-millisecond jitter on fast endpoints is not reported; query counts
+    and errors may not grow at all.
+    """
+    regressions = []
+    for name, result in results.items():
+        previous = baseline.get(name)
+        if previous is None:
+            continue
+        if result['p95_ms'] > previous['p95_ms'] + max(previous['p95_ms'] * threshold, min_delta_ms):
+            regressions.append(f"{name}: p95 {result['p95_ms']}ms vs baseline {previous['p95_ms']}ms")
+        if result['max_queries'] > previous['max_queries']:
+            regressions.append(f"{name}: {result['max_queries']} queries vs baseline {previous['max_queries']}")
+        if result['errors'] > previous['errors']:
+            regressions.append(f"{name}: {result['errors']} errors vs baseline {previous['errors']}")
+    return regressions
+
+
+def load_baseline(path):
+    with open(path, encoding='utf-8') as handle:
+        return json.load(handle)
+
+
+def save_baseline(path, dataset, results):
+    with open(path, 'w', encoding='utf-8') as handle:
+        json.dump({'dataset': dataset.as_dict(), 'results': results}, handle, indent=2, sort_keys=True)
+        handle.write('\n')
@@ -0,0 +1,316 @@
+import asyncio
+import hashlib
+import time
+import uuid
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from cms_project.Loggin.logger import logger
+from users.tags import parse_tags
+from .signals import previous_state
+
+CACHED_PARAMS = ('search', 'category', 'tags', 'tags_match', 'sort_by', 'page', 'page_size', 'pagination', 'cursor')
+
+
+class FeedCache:
+    """
+    Response cache for the explore feed.
+
+    Entries are keyed by the normalized query parameters plus the current
+    generation counters: the global one for unfiltered feeds and the category
+    one for `?category=` feeds. Writes never delete entries; they bump the
+    counters so every key built afterwards misses and old entries expire on
+    their own. A cold key is computed by a single worker (cache.add acts as a
+    cross-process lock on Redis) while the others wait for the result.
+
+    Any cache error falls back to computing the response. The a-prefixed
+    methods are the same protocol over the async cache API for async views.
+    """
+    prefix = 'explore:feed'
+    # Part of every entry key; bumped when the shape of the cached value changes.
+    entry_version = 2
+    stats_keys = ('hits', 'misses', 'waits', 'errors')
+
+    def __init__(self, backend=None):
+        self._backend = backend
+
+    @property
+    def backend(self):
+        return self._backend or cache
+
+    @property
+    def ttl(self):
+        return getattr(settings, 'EXPLORE_CACHE_TTL', 60)
+
+    def generation_key(self, category=None):
+        if category:
+            return f'{self.prefix}:gen:cat:{category.strip().lower()}'
+        return f'{self.prefix}:gen:global'
+
+    def build_key(self, request):
+        """Return the cache key for this request, or None when the cache is unavailable."""
+        generation = self._generation(self.generation_key(request.query_params.get('category')))
+        if generation is None:
+            return None
+        return self._key(request, generation)
+
+    async def abuild_key(self, request):
+        """build_key for async views."""
+        generation = await self._ageneration(self.generation_key(request.query_params.get('category')))
+        if generation is None:
+            return None
+        return self._key(request, generation)
+
+    def _key(self, request, generation):
+        params = []
+        for name in CACHED_PARAMS:
+            value = request.query_params.get(name)
+            if value in (None, ''):
+                continue
+            if name in ('search', 'category'):
+                value = ' '.join(value.lower().split())
+            elif name == 'tags':
+                value = ','.join(sorted(parse_tags(value)))
+            params.append(f'{name}={value}')
+        normalized = '&'.join(params)
+        digest = hashlib.sha1(f'{request.get_host()}|{normalized}'.encode('utf-8')).hexdigest()
+        return f'{self.prefix}:v{self.entry_version}:{generation}:{digest}'
+
+    def get_or_set(self, key, compute):
+        """
+        Return (value, hit). `compute` returns (value, cacheable); uncacheable
+        values (error responses) are returned but never stored.
+        """
+        if key is None:
+            value, _ = compute()
+            return value, False
+        try:
+            value = self.backend.get(key)
+        except Exception:
+            logger.exception("Explore feed cache read failed")
+            self._incr('errors')
+            value, _ = compute()
+            return value, False
+
+        if value is not None:
+            self._incr('hits')
+            return value, True
+
+        self._incr('misses')
+        lock_key = f'{key}:lock'
+        token = uuid.uuid4().hex
+        if self._acquire(lock_key, token):
+            try:
+                value, cacheable = compute()
+                if cacheable:
+                    self._set(key, value)
+                return value, False
+            finally:
+                self._release(lock_key, token)
+
+        value = self._wait_for(key)
+        if value is not None:
+            self._incr('waits')
+            return value, True
+        value, _ = compute()
+        return value, False
+
+    async def aget_or_set(self, key, compute):
+        """get_or_set for async views: the same protocol over the async cache API, with an async `compute`."""
+        if key is None:
+            value, _ = await compute()
+            return value, False
+        try:
+            value = await self.backend.aget(key)
+        except Exception:
+            logger.exception("Explore feed cache read failed")
+            await self._aincr('errors')
+            value, _ = await compute()
+            return value, False
+
+        if value is not None:
+            await self._aincr('hits')
+            return value, True
+
+        await self._aincr('misses')
+        lock_key = f'{key}:lock'
+        token = uuid.uuid4().hex
+        if await self._aacquire(lock_key, token):
+            try:
+                value, cacheable = await compute()
+                if cacheable:
+                    await self._aset(key, value)
+                return value, False
+            finally:
+                await self._arelease(lock_key, token)
+
+        value = await self._await_for(key)
+        if value is not None:
+            await self._aincr('waits')
+            return value, True
+        value, _ = await compute()
+        return value, False
+
+    def invalidate(self, *categories):
+        """Bump the global generation and the generation of each given category name."""
+        keys = [self.generation_key()] + [self.generation_key(name) for name in categories if name]
+        for gen_key in dict.fromkeys(keys):
+            try:
+                try:
+                    self.backend.incr(gen_key)
+                except ValueError:
+                    self.backend.add(gen_key, self._initial_generation(), timeout=None)
+            except Exception:
+                logger.exception("Explore feed cache invalidation failed")
+                self._incr('errors')
+
+    def invalidate_post(self, post):
+        """Invalidate the feeds showing `post` once the current transaction commits."""
+        category = post.category.name
+        transaction.on_commit(lambda: self.invalidate(category))
+
+    def stats(self):
+        keys = {name: f'{self.prefix}:stats:{name}' for name in self.stats_keys}
+        try:
+            values = self.backend.get_many(keys.values())
+        except Exception:
+            values = {}
+        stats = {name: values.get(key, 0) for name, key in keys.items()}
+        lookups = stats['hits'] + stats['misses']
+        stats['hit_ratio'] = round(stats['hits'] / lookups, 4) if lookups else 0.0
+        return stats
+
+    def reset_stats(self):
+        self.backend.delete_many([f'{self.prefix}:stats:{name}' for name in self.stats_keys])
+
+    def _generation(self, gen_key):
+        try:
+            generation = self.backend.get(gen_key)
+            if generation is None:
+                # Seed from the clock so a flushed counter never reuses an old generation.
+                self.backend.add(gen_key, self._initial_generation(), timeout=None)
+                generation = self.backend.get(gen_key)
+            return generation
+        except Exception:
+            logger.exception("Explore feed cache generation lookup failed")
+            self._incr('errors')
+            return None
+
+    async def _ageneration(self, gen_key):
+        try:
+            generation = await self.backend.aget(gen_key)
+            if generation is None:
+                await self.backend.aadd(gen_key, self._initial_generation(), timeout=None)
+                generation = await self.backend.aget(gen_key)
+            return generation
+        except Exception:
+            logger.exception("Explore feed cache generation lookup failed")
+            await self._aincr('errors')
+            return None
+
+    def _initial_generation(self):
+        return int(time.time() * 1000)
+
+    def _set(self, key, value):
+        try:
+            self.backend.set(key, value, timeout=self.ttl)
+        except Exception:
+            logger.exception("Explore feed cache write failed")
+            self._incr('errors')
+
+    def _acquire(self, lock_key, token):
+        try:
+            return self.backend.add(lock_key, token, timeout=getattr(settings, 'EXPLORE_CACHE_LOCK_TIMEOUT', 10))
+        except Exception:
+            return True
+
+    def _release(self, lock_key, token):
+        try:
+            if self.backend.get(lock_key) == token:
+                self.backend.delete(lock_key)
+        except Exception:
+            pass
+
+    def _wait_for(self, key):
+        deadline = time.monotonic() + getattr(settings, 'EXPLORE_CACHE_LOCK_WAIT', 2)
+        delay = 0.01
+        while time.monotonic() < deadline:
+            time.sleep(delay)
+            delay = min(delay * 2, 0.1)
+            try:
+                value = self.backend.get(key)
+            except Exception:
+                return None
+            if value is not None:
+                return value
+        return None
+
+    async def _aset(self, key, value):
+        try:
+            await self.backend.aset(key, value, timeout=self.ttl)
+        except Exception:
+            logger.exception("Explore feed cache write failed")
+            await self._aincr('errors')
+
+    async def _aacquire(self, lock_key, token):
+        try:
+            return await self.backend.aadd(lock_key, token, timeout=getattr(settings, 'EXPLORE_CACHE_LOCK_TIMEOUT', 10))
+        except Exception:
+            return True
+
+    async def _arelease(self, lock_key, token):
+        try:
+            if await self.backend.aget(lock_key) == token:
+                await self.backend.adelete(lock_key)
+        except Exception:
+            pass
+
+    async def _await_for(self, key):
+        deadline = time.monotonic() + getattr(settings, 'EXPLORE_CACHE_LOCK_WAIT', 2)
+        delay = 0.01
+        while time.monotonic() < deadline:
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, 0.1)
+            try:
+                value = await self.backend.aget(key)
+            except Exception:
+                return None
+            if value is not None:
+                return value
+        return None
+
+    def _incr(self, name):
+        key = f'{self.prefix}:stats:{name}'
+        try:
+            try:
+                self.backend.incr(key)
+            except ValueError:
+                self.backend.add(key, 1, timeout=None)
+        except Exception:
+            pass
+
+    async def _aincr(self, name):
+        key = f'{self.prefix}:stats:{name}'
+        try:
+            try:
+                await self.backend.aincr(key)
+            except ValueError:
+                await self.backend.aadd(key, 1, timeout=None)
+        except Exception:
+            pass
+
+
+feed_cache = FeedCache()
+
+
+def invalidate_feed_on_save(sender, instance, raw=False, using='default', **kwargs):
+    if raw:
+        return
+    previous = previous_state(instance)
+    categories = (instance.category.name, previous.category_name if previous else None)
+    transaction.on_commit(lambda: feed_cache.invalidate(*categories), using=using)
+
+
+def invalidate_feed_on_delete(sender, instance, using='default', **kwargs):
+    category = instance.category.name
+    transaction.on_commit(lambda: feed_cache.invalidate(category), using=using)
@@ -0,0 +1,72 @@
+"""
+Conditional GET for the explore read endpoints.
+
+Responses carry a strong ETag, and the post detail also a Last-Modified.
+A request whose If-None-Match still matches gets an empty 304 before
+anything is serialized or rendered.
+
+If-Modified-Since alone never gets a 304: the post's updated_at does not
+move when its counters, its author or the viewer's like change (likes and
+comments update the counters with .update()), so only the ETag covers
+everything in the body. Last-Modified is sent for information.
+"""
+import hashlib
+import json
+from django.utils.cache import patch_cache_control, patch_vary_headers
+from django.utils.http import http_date, parse_etags, quote_etag
+from rest_framework import status
+from rest_framework.response import Response
+
+# Part of every ETag, so a change to what the responses contain can invalidate them all.
+ETAG_VERSION = 1
+
+
+def make_etag(*parts):
+    digest = hashlib.sha1('|'.join(str(part) for part in (ETAG_VERSION, *parts)).encode('utf-8')).hexdigest()
+    return quote_etag(digest)
+
+
+def post_etag(post, user_id, is_liked):
+    """
+    Everything BlogPostDetailSerializer output depends on: the post's last
+    edit and counters, the author and category it embeds, and the viewer.
+    """
+    author, category = post.author, post.category
+    return make_etag(
+        post.id, post.updated_at.isoformat(), post.likes_count, post.comments_count,
+        author.id, author.first_name, author.last_name, author.profile_picture,
+        category.id, category.name, category.active,
+        user_id, is_liked,
+    )
+
+
+def page_etag(data):
+    """ETag of a serialized list page, computed once when the page is built and cached with it."""
+    return make_etag(json.dumps(data, sort_keys=True, default=str))
+
+
+def not_modified(request, etag):
+    if_none_match = request.headers.get('If-None-Match')
+    if if_none_match is None:
+        return False
+    # Weak comparison, as RFC 9110 asks for If-None-Match.
+    etags = [tag.removeprefix('W/') for tag in parse_etags(if_none_match)]
+    return '*' in etags or etag in etags
+
+
+def conditional_response(request, etag, last_modified=None, build=None, status_code=status.HTTP_200_OK):
+    """
+    A 304 when the client's copy is current, otherwise a response with the
+    data returned by `build()`. Both carry the validators; the response
+    depends on the viewer, so shared caches must not store it.
+    """
+    if not_modified(request, etag):
+        response = Response(status=status.HTTP_304_NOT_MODIFIED)
+    else:
+        response = Response(build(), status=status_code)
+    response['ETag'] = etag
+    if last_modified is not None:
+        response['Last-Modified'] = http_date(last_modified.timestamp())
+    patch_cache_control(response, private=True, no_cache=True)
+    patch_vary_headers(response, ('Cookie', 'Authorization'))
+    return response
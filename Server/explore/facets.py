@@ -0,0 +1,195 @@
+"""
+Facet counts for the explore UI: published, visible posts per category and
+per tag.
+
+The unfiltered counts are read from two rollup tables, CategoryFacet and
+TagFacet, which every post save and delete adjusts by the post's old and
+new contribution. BlogPost.save() and delete() run in a transaction that
+covers the post write and the rollup update, and the old contribution is
+read from the locked row (explore/signals.py). A post counts when it is
+published and shown, so publishing, editing the category or tags, and
+soft-deleting a post all move the counts. Bulk paths that skip save()
+(`import_posts`, the benchmark seeding) call `rebuild()` afterwards, as does
+`manage.py rebuild_facets`.
+
+Filtered variants (`search`, `category`, `tags`) are counted over the posts
+matching the filter, which the feed's indexes select, and cached for
+EXPLORE_FACETS_CACHE_TTL seconds. No facet read aggregates over the whole
+BlogPost table.
+"""
+import hashlib
+from collections import Counter, defaultdict
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections, transaction
+from django.db.models import Count, F, IntegerField, Value
+from django.db.models.functions import Coalesce, Greatest
+from cms_project.Loggin.logger import logger
+from users.models import BlogPost, ContentCategory
+from users.tags import parse_tags
+from .models import CategoryFacet, TagFacet
+from .signals import previous_state
+
+FILTER_PARAMS = ('search', 'category', 'tags', 'tags_match')
+
+# Tag counts of the posts matching a filter, most used first.
+FILTERED_TAGS_SQL = """
+    SELECT tag, COUNT(*) AS posts
+    FROM ({posts}) AS post, jsonb_array_elements_text(post.tags) AS tag
+    WHERE jsonb_typeof(post.tags) = 'array'
+    GROUP BY tag
+    ORDER BY posts DESC, tag
+    LIMIT %s
+"""
+
+
+def contribution(status, show, category_id, tags):
+    """What a post adds to the facets: its category and tags while it is visible, nothing otherwise."""
+    if status != 'published' or not show:
+        return None
+    return category_id, list(tags or ())
+
+
+class FacetCounts:
+    prefix = 'explore:facets'
+
+    @property
+    def tag_limit(self):
+        return getattr(settings, 'EXPLORE_FACET_TAGS', 20)
+
+    @property
+    def ttl(self):
+        return getattr(settings, 'EXPLORE_FACETS_CACHE_TTL', 30)
+
+    def apply(self, old, new, using='default'):
+        """Move the counts from a post's old contribution to its new one."""
+        categories, tags = Counter(), Counter()
+        for contributed, sign in ((old, -1), (new, 1)):
+            if contributed is not None:
+                category_id, post_tags = contributed
+                categories[category_id] += sign
+                for tag in post_tags:
+                    tags[tag] += sign
+        self._add(CategoryFacet, categories, using)
+        self._add(TagFacet, tags, using)
+
+    def _add(self, model, deltas, using):
+        by_delta = defaultdict(list)
+        for key, delta in deltas.items():
+            if delta:
+                by_delta[delta].append(key)
+        if not by_delta:
+            return
+        manager = model.objects.using(using)
+        new_keys = [key for delta, keys in by_delta.items() if delta > 0 for key in keys]
+        if new_keys:
+            manager.bulk_create([model(pk=key, posts=0) for key in new_keys], ignore_conflicts=True)
+        for delta, keys in by_delta.items():
+            manager.filter(pk__in=keys).update(posts=Greatest(F('posts') + delta, 0))
+
+    def rebuild(self, using='default'):
+        """Recount both tables from the posts. Returns the number of categories and tags counted."""
+        posts = BlogPost.objects.using(using).filter(status='published', show=True).order_by()
+        tags = Counter()
+        for post_tags in posts.values_list('tags', flat=True).iterator(chunk_size=2000):
+            tags.update(post_tags or ())
+        categories = posts.values('category_id').annotate(posts=Count('id')).values_list('category_id', 'posts')
+        with transaction.atomic(using=using):
+            CategoryFacet.objects.using(using).all().delete()
+            TagFacet.objects.using(using).all().delete()
+            CategoryFacet.objects.using(using).bulk_create(
+                [CategoryFacet(category_id=category_id, posts=count) for category_id, count in categories]
+            )
+            TagFacet.objects.using(using).bulk_create(
+                [TagFacet(tag=tag, posts=count) for tag, count in tags.items()], batch_size=1000
+            )
+        return CategoryFacet.objects.using(using).count(), len(tags)
+
+    def read(self):
+        """The unfiltered facets, from the rollup tables: every category and the most used tags."""
+        categories = ContentCategory.objects.annotate(
+            posts=Coalesce(F('facet__posts'), Value(0), output_field=IntegerField())
+        ).order_by('name').values('id', 'name', 'posts')
+        tags = TagFacet.objects.filter(posts__gt=0).order_by('-posts', 'tag').values('tag', 'posts')[:self.tag_limit]
+        return {
+            'categories': [{'id': c['id'], 'name': c['name'], 'count': c['posts']} for c in categories],
+            'tags': [{'name': t['tag'], 'count': t['posts']} for t in tags],
+        }
+
+    def count(self, queryset):
+        """The facets of the posts in `queryset` (already filtered down to a search, category or tags)."""
+        queryset = queryset.order_by()
+        categories = (
+            queryset.values('category_id', 'category__name').annotate(posts=Count('id')).order_by('category__name')
+        )
+        return {
+            'categories': [
+                {'id': c['category_id'], 'name': c['category__name'], 'count': c['posts']} for c in categories
+            ],
+            'tags': [{'name': tag, 'count': count} for tag, count in self._count_tags(queryset)],
+        }
+
+    def _count_tags(self, queryset):
+        connection = connections[queryset.db]
+        if connection.vendor == 'postgresql':
+            sql, params = queryset.values('tags').query.sql_with_params()
+            with connection.cursor() as cursor:
+                cursor.execute(FILTERED_TAGS_SQL.format(posts=sql), [*params, self.tag_limit])
+                return cursor.fetchall()
+        tags = Counter()
+        for post_tags in queryset.values_list('tags', flat=True):
+            tags.update(post_tags or ())
+        return sorted(tags.items(), key=lambda item: (-item[1], item[0]))[:self.tag_limit]
+
+    def is_filtered(self, params):
+        return any(params.get(name) for name in FILTER_PARAMS if name != 'tags_match')
+
+    def cache_key(self, params):
+        parts = []
+        for name in FILTER_PARAMS:
+            value = params.get(name)
+            if not value:
+                continue
+            if name == 'tags':
+                value = ','.join(sorted(parse_tags(value)))
+            else:
+                value = ' '.join(value.lower().split())
+            parts.append(f'{name}={value}')
+        digest = hashlib.sha1('&'.join(parts).encode('utf-8')).hexdigest()
+        return f'{self.prefix}:{digest}'
+
+    def get_or_count(self, params, queryset):
+        """Filtered facets, from the cache when counted within the last EXPLORE_FACETS_CACHE_TTL seconds."""
+        key = self.cache_key(params)
+        try:
+            facets = cache.get(key)
+        except Exception:
+            logger.exception("Explore facets cache read failed")
+            return self.count(queryset), False
+        if facets is not None:
+            return facets, True
+        facets = self.count(queryset)
+        try:
+            cache.set(key, facets, self.ttl)
+        except Exception:
+            logger.exception("Explore facets cache write failed")
+        return facets, False
+
+
+facet_counts = FacetCounts()
+
+
+def update_facets_on_save(sender, instance, raw=False, using='default', **kwargs):
+    if raw:
+        return
+    new = contribution(instance.status, instance.show, instance.category_id, instance.tags)
+    previous = previous_state(instance)
+    old = contribution(previous.status, previous.show, previous.category_id, previous.tags) if previous else None
+    if old != new:
+        facet_counts.apply(old, new, using=using)
+
+
+def update_facets_on_delete(sender, instance, using='default', **kwargs):
+    old = contribution(instance.status, instance.show, instance.category_id, instance.tags)
+    if old is not None:
+        facet_counts.apply(old, None, using=using)
@@ -0,0 +1,279 @@
+import redis
+from django.conf import settings
+from django.db import transaction
+from cms_project.Loggin.logger import logger
+from cms_project.redis_client import get_redis
+from authCustom.models import Profile
+from users.models import BlogPost
+from .signals import previous_state
+
+
+class PersonalFeed:
+    """
+    Precomputed "for you" feeds in Redis sorted sets (member: post id, score:
+    created_at timestamp).
+
+    Every category has a list of its latest published posts, loaded lazily
+    from the table the first time it is needed, plus a global list. A user's
+    list is built on first read by merging the lists of the categories they
+    are interested in (ZUNIONSTORE); users without interests read the global
+    list itself. A marker key records that a user's feed is built and which
+    list it reads, so a user whose categories are all empty is served an
+    empty feed from one read instead of rebuilding it on every request.
+    Publishing a post adds it to its category list and the global list and
+    queues it for fan-out; `manage.py fan_out_feeds --loop` then adds it to
+    the warm lists of every interested user, outside the publishing request.
+    All lists are trimmed to PERSONAL_FEED_LENGTH.
+
+    Posts that are later hidden, unpublished or deleted are dropped from the
+    category lists; user lists may keep their ids until they expire, so the
+    page fetch filters on status and visibility again.
+    """
+    prefix = 'feed'
+    fanout_key = 'feed:fanout'
+    # Values of the built marker: the user's own list, or the global list.
+    OWN, GLOBAL = 'own', 'global'
+    fanout_batch_size = 1000
+
+    def __init__(self, client=None):
+        self._client = client
+
+    @property
+    def client(self):
+        return self._client or get_redis()
+
+    @property
+    def enabled(self):
+        return self.client is not None
+
+    @property
+    def length(self):
+        return getattr(settings, 'PERSONAL_FEED_LENGTH', 500)
+
+    @property
+    def ttl(self):
+        return getattr(settings, 'PERSONAL_FEED_TTL', 60 * 60 * 24)
+
+    def user_key(self, user_id):
+        return f'{self.prefix}:user:{user_id}'
+
+    def category_key(self, category_id=None):
+        if category_id is None:
+            return f'{self.prefix}:global'
+        return f'{self.prefix}:cat:{category_id}'
+
+    def loaded_key(self, list_key):
+        return f'{list_key}:loaded'
+
+    def built_key(self, user_id):
+        """Set while a user's feed is built, to OWN or GLOBAL (no interests: read the global list)."""
+        return f'{self.prefix}:user:{user_id}:built'
+
+    def page(self, user, offset, limit):
+        """Return (post_ids, has_more) for the user's feed, newest first."""
+        client = self.client
+        key = self.user_key(user.id)
+        # Read one extra id to know whether another page exists.
+        with client.pipeline(transaction=False) as pipe:
+            pipe.zrevrange(key, offset, offset + limit)
+            pipe.get(self.built_key(user.id))
+            post_ids, built = pipe.execute()
+        if built == self.GLOBAL:
+            post_ids = client.zrevrange(self.category_key(), offset, offset + limit)
+        elif built is None:
+            key = self.build(user)
+            post_ids = client.zrevrange(key, offset, offset + limit)
+        # Built as OWN with no ids: the user's categories hold no posts yet.
+        return [int(post_id) for post_id in post_ids[:limit]], len(post_ids) > limit
+
+    def build(self, user):
+        """Merge the user's category lists into their own list. Returns the key their feed is read from."""
+        category_ids = list(user.interests.values_list('id', flat=True))
+        if not category_ids:
+            # The global list is kept current by publish(), so it is read as is rather than copied.
+            self.ensure_loaded(self.category_key())
+            self.client.set(self.built_key(user.id), self.GLOBAL, ex=self.ttl)
+            return self.category_key()
+        source_keys = [self.category_key(category_id) for category_id in category_ids]
+        for source_key in source_keys:
+            self.ensure_loaded(source_key)
+        key = self.user_key(user.id)
+        with self.client.pipeline() as pipe:
+            # Stores nothing when every source list is empty; the marker still records the build.
+            pipe.zunionstore(key, source_keys, aggregate='MAX')
+            pipe.zremrangebyrank(key, 0, -self.length - 1)
+            pipe.expire(key, self.ttl)
+            pipe.set(self.built_key(user.id), self.OWN, ex=self.ttl)
+            pipe.execute()
+        return key
+
+    def ensure_loaded(self, list_key):
+        client = self.client
+        loaded_key = self.loaded_key(list_key)
+        if client.exists(loaded_key):
+            return
+        with client.pipeline() as pipe:
+            try:
+                pipe.watch(loaded_key)
+                if pipe.exists(loaded_key):
+                    return
+                posts = BlogPost.objects.filter(status='published', show=True)
+                if list_key != self.category_key():
+                    posts = posts.filter(category_id=int(list_key.rsplit(':', 1)[1]))
+                scores = {
+                    post_id: created_at.timestamp()
+                    for post_id, created_at in posts.order_by('-created_at').values_list('id', 'created_at')[:self.length]
+                }
+                pipe.multi()
+                pipe.delete(list_key)
+                if scores:
+                    pipe.zadd(list_key, scores)
+                pipe.set(loaded_key, 1)
+                pipe.execute()
+            except redis.WatchError:
+                # Another worker loaded the list first.
+                pass
+
+    def publish(self, post):
+        """Add a visible post to its category list and the global list, and queue its fan-out to user lists."""
+        score = {post.id: post.created_at.timestamp()}
+        client = self.client
+        with client.pipeline(transaction=False) as pipe:
+            for list_key in (self.category_key(post.category_id), self.category_key()):
+                self.ensure_loaded(list_key)
+                pipe.zadd(list_key, score)
+                pipe.zremrangebyrank(list_key, 0, -self.length - 1)
+            pipe.zadd(self.fanout_key, score)
+            pipe.execute()
+
+    def fan_out_pending(self, limit=100):
+        """
+        Add queued posts to the warm lists of the users interested in their
+        category. Posts hidden since they were queued are skipped. Returns the
+        number of queued posts handled.
+        """
+        client = self.client
+        pending = client.zrange(self.fanout_key, 0, limit - 1)
+        if not pending:
+            return 0
+        posts = BlogPost.objects.filter(
+            id__in=[int(post_id) for post_id in pending], status='published', show=True
+        ).values_list('id', 'category_id', 'created_at')
+        for post_id, category_id, created_at in posts:
+            self.fan_out(post_id, category_id, created_at.timestamp())
+        # Adding a post to a list twice is harmless, so a worker dying before this line only repeats work.
+        client.zrem(self.fanout_key, *pending)
+        return len(pending)
+
+    def fan_out(self, post_id, category_id, score):
+        """Add a post to the warm list of every user interested in its category."""
+        score = {post_id: score}
+        interested = (
+            Profile.interests.through.objects.filter(contentcategory_id=category_id)
+            .values_list('profile_id', flat=True)
+        )
+        batch, written = [], 0
+        for user_id in interested.iterator(chunk_size=self.fanout_batch_size):
+            batch.append(user_id)
+            if len(batch) >= self.fanout_batch_size:
+                written += self._fan_out(batch, score)
+                batch = []
+        if batch:
+            written += self._fan_out(batch, score)
+        logger.debug(f"Fanned out post {post_id} to {written} personal feed(s)")
+        return written
+
+    def retract(self, post_id, category_id):
+        """Remove a post from the category and global lists."""
+        with self.client.pipeline(transaction=False) as pipe:
+            pipe.zrem(self.category_key(category_id), post_id)
+            pipe.zrem(self.category_key(), post_id)
+            pipe.zrem(self.fanout_key, post_id)
+            pipe.execute()
+
+    def forget_user(self, user_id):
+        self.client.delete(self.user_key(user_id), self.built_key(user_id))
+
+    def reset(self):
+        """Drop every list so each is rebuilt from the table on next use."""
+        client = self.client
+        keys = list(client.scan_iter(match=f'{self.prefix}:*'))
+        for start in range(0, len(keys), 500):
+            client.delete(*keys[start:start + 500])
+        return len(keys)
+
+    def _fan_out(self, user_ids, score):
+        # Only users whose list is built get the post; cold lists are merged from
+        # the category lists when they are next read. A built list may be empty
+        # (and so absent), so it takes the remaining lifetime of its marker.
+        with self.client.pipeline(transaction=False) as pipe:
+            for user_id in user_ids:
+                pipe.get(self.built_key(user_id))
+                pipe.pttl(self.built_key(user_id))
+            replies = pipe.execute()
+        warm = [
+            (user_id, ttl) for user_id, built, ttl in zip(user_ids, replies[::2], replies[1::2])
+            if built == self.OWN and ttl > 0
+        ]
+        if not warm:
+            return 0
+        with self.client.pipeline(transaction=False) as pipe:
+            for user_id, ttl in warm:
+                key = self.user_key(user_id)
+                pipe.zadd(key, score)
+                pipe.zremrangebyrank(key, 0, -self.length - 1)
+                pipe.pexpire(key, ttl)
+            pipe.execute()
+        return len(warm)
+
+
+personal_feed = PersonalFeed()
+
+
+def update_feeds_on_save(sender, instance, raw=False, using='default', **kwargs):
+    if raw or not personal_feed.enabled:
+        return
+    previous = previous_state(instance)
+    was_visible = previous is not None and previous.status == 'published' and previous.show
+    visible = instance.status == 'published' and instance.show
+    if not visible and not was_visible:
+        return
+    if visible and was_visible and previous.category_id == instance.category_id:
+        return
+    post_id, category_id = instance.pk, instance.category_id
+
+    def apply():
+        try:
+            if was_visible and previous.category_id != category_id:
+                personal_feed.retract(post_id, previous.category_id)
+            if visible:
+                personal_feed.publish(instance)
+            else:
+                personal_feed.retract(post_id, category_id)
+        except redis.RedisError:
+            logger.exception("Personal feed update failed")
+
+    transaction.on_commit(apply, using=using)
+
+
+def update_feeds_on_delete(sender, instance, using='default', **kwargs):
+    if not personal_feed.enabled:
+        return
+    post_id, category_id = instance.pk, instance.category_id
+
+    def apply():
+        try:
+            personal_feed.retract(post_id, category_id)
+        except redis.RedisError:
+            logger.exception("Personal feed update failed")
+
+    transaction.on_commit(apply, using=using)
+
+
+def forget_feed_on_interests_change(sender, instance, action, reverse=False, pk_set=None, **kwargs):
+    if not action.startswith('post_') or not personal_feed.enabled:
+        return
+    # From the category side pk_set holds profile ids (and is None after a clear).
+    user_ids = (pk_set or ()) if reverse else (instance.pk,)
+    for user_id in user_ids:
+        personal_feed.forget_user(user_id)
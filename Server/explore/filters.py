@@ -1,26 +1,42 @@
-from django_filters import rest_framework as filters
-from users.models import BlogPost
-from django.db.models import Q
-
-class BlogPostFilter(filters.FilterSet):
-    search = filters.CharFilter(method='filter_by_search')
-    category = filters.CharFilter(field_name='category__name', lookup_expr='iexact')
-    sort_by = filters.CharFilter(method='filter_by_sort')
-
-    class Meta:
-        model = BlogPost
-        fields = ['search', 'category', 'sort_by']
-
-    def filter_by_search(self, queryset, name, value):
-        return queryset.filter(
-            Q(title__icontains=value) | Q(excerpt__icontains=value)
-        )
-
-    def filter_by_sort(self, queryset, name, value):
-        if value == 'latest':
-            return queryset.order_by('-created_at')
-        elif value == 'popular':
-            return queryset.order_by('-likes__count')
-        elif value == 'most-commented':
-            return queryset.order_by('-comments__count')
+from django_filters import rest_framework as filters
+from users.models import BlogPost
+from users.tags import filter_by_tags, parse_tags
+from .search import search_posts
+
+class BlogPostFilter(filters.FilterSet):
+    search = filters.CharFilter(method='filter_by_search')
+    category = filters.CharFilter(field_name='category__name', lookup_expr='iexact')
+    sort_by = filters.CharFilter(method='filter_by_sort')
+    # `?tags=python,django`: posts with any of the tags, or all of them with `tags_match=all`.
+    tags = filters.CharFilter(method='filter_by_tags')
+    tags_match = filters.ChoiceFilter(choices=[('any', 'Any'), ('all', 'All')], method='filter_by_tags_match')
+
+    class Meta:
+        model = BlogPost
+        fields = ['search', 'category', 'sort_by', 'tags', 'tags_match']
+
+    def filter_by_search(self, queryset, name, value):
+        return search_posts(queryset, value)
+
+    def filter_by_tags(self, queryset, name, value):
+        return filter_by_tags(queryset, parse_tags(value), match_all=self.form.cleaned_data.get('tags_match') == 'all')
+
+    def filter_by_tags_match(self, queryset, name, value):
+        # Read by filter_by_tags.
+        return queryset
+
+    def filter_by_sort(self, queryset, name, value):
+        if value == 'latest':
+            return queryset.order_by('-created_at')
+        elif value == 'popular':
+            return queryset.order_by('-likes_count', '-created_at')
+        elif value == 'most-commented':
+            return queryset.order_by('-comments_count', '-created_at')
+        elif value == 'trending':
+            # Only posts with activity recent enough to still count have a rank row.
+            return queryset.filter(trending__isnull=False).select_related('trending').order_by('-trending__score', '-created_at')
+        elif value == 'relevance':
+            if 'rank' in queryset.query.annotations:
+                return queryset.order_by('-rank', '-created_at')
+            return queryset.order_by('-created_at')
         return queryset
\ No newline at end of file
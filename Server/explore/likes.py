@@ -0,0 +1,193 @@
+import redis
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from authCustom.models import Profile
+from cms_project.Loggin.logger import logger
+from cms_project.redis_client import get_redis
+from users.models import BlogLike, BlogPost
+from .cache import feed_cache
+from .trending import trending_engine
+
+
+class LikeEngine:
+    """
+    Write-behind like storage.
+
+    The set of users who like a post lives in a Redis set that is loaded
+    lazily from BlogLike the first time the post is touched (so an empty or
+    restarted Redis rebuilds itself from the table). A toggle is one SADD, or
+    SREM when the user was already in the set, plus a "dirty" marker for the
+    (post, user) pair; the response is answered from Redis.
+
+    flush() later writes the current set membership of every dirty pair to
+    BlogLike with batched bulk_create / delete, refreshes likes_count and
+    invalidates the explore feed. Concurrent toggles on the same pair are
+    harmless because the flusher writes the state, not the sequence of clicks.
+    """
+    prefix = 'likes'
+    dirty_key = 'likes:dirty'
+    flushing_key = 'likes:flushing'
+    key_ttl = 60 * 60 * 24 * 7
+
+    def __init__(self, client=None):
+        self._client = client
+
+    @property
+    def client(self):
+        return self._client or get_redis()
+
+    @property
+    def enabled(self):
+        return bool(getattr(settings, 'LIKE_WRITE_BEHIND', False)) and self.client is not None
+
+    def members_key(self, post_id):
+        return f'{self.prefix}:post:{post_id}:users'
+
+    def loaded_key(self, post_id):
+        return f'{self.prefix}:post:{post_id}:loaded'
+
+    def ensure_loaded(self, post_id):
+        client = self.client
+        loaded_key = self.loaded_key(post_id)
+        if client.exists(loaded_key):
+            return
+        with client.pipeline() as pipe:
+            try:
+                pipe.watch(loaded_key)
+                if pipe.exists(loaded_key):
+                    return
+                user_ids = list(BlogLike.objects.filter(blog_id=post_id).values_list('user_id', flat=True))
+                pipe.multi()
+                members_key = self.members_key(post_id)
+                pipe.delete(members_key)
+                if user_ids:
+                    pipe.sadd(members_key, *user_ids)
+                    pipe.expire(members_key, self.key_ttl)
+                pipe.set(loaded_key, 1, ex=self.key_ttl)
+                pipe.execute()
+            except redis.WatchError:
+                # Another worker loaded the post first.
+                pass
+
+    def toggle(self, post_id, user_id):
+        """Toggle the like of `user_id` on `post_id`. Returns (action, likes_count)."""
+        self.ensure_loaded(post_id)
+        client = self.client
+        members_key = self.members_key(post_id)
+        if client.sadd(members_key, user_id):
+            action = 'liked'
+        else:
+            client.srem(members_key, user_id)
+            action = 'unliked'
+        with client.pipeline(transaction=False) as pipe:
+            pipe.sadd(self.dirty_key, f'{post_id}:{user_id}')
+            pipe.scard(members_key)
+            pipe.expire(members_key, self.key_ttl)
+            pipe.expire(self.loaded_key(post_id), self.key_ttl)
+            _, likes_count, _, _ = pipe.execute()
+        return action, likes_count
+
+    def is_liked(self, post_id, user_id):
+        self.ensure_loaded(post_id)
+        return bool(self.client.sismember(self.members_key(post_id), user_id))
+
+    def liked_among(self, post_ids, user_id):
+        """
+        The ids in `post_ids` that `user_id` likes, in two pipelined round
+        trips. Posts not loaded into Redis yet have no pending toggles, so
+        they are answered by one BlogLike query instead of being loaded.
+        """
+        client = self.client
+        with client.pipeline(transaction=False) as pipe:
+            for post_id in post_ids:
+                pipe.exists(self.loaded_key(post_id))
+                pipe.sismember(self.members_key(post_id), user_id)
+            replies = pipe.execute()
+        liked, unloaded = set(), []
+        for post_id, loaded, member in zip(post_ids, replies[::2], replies[1::2]):
+            if not loaded:
+                unloaded.append(post_id)
+            elif member:
+                liked.add(post_id)
+        if unloaded:
+            liked.update(BlogLike.objects.filter(blog_id__in=unloaded, user_id=user_id).values_list('blog_id', flat=True))
+        return liked
+
+    def likes_count(self, post_id):
+        self.ensure_loaded(post_id)
+        return self.client.scard(self.members_key(post_id))
+
+    def flush(self, batch_size=1000):
+        """Persist dirty likes to the database. Returns the number of (post, user) pairs written."""
+        client = self.client
+        # A leftover flushing set means a previous flush died half way; finish it first.
+        if not client.exists(self.flushing_key):
+            try:
+                client.rename(self.dirty_key, self.flushing_key)
+            except redis.ResponseError:
+                return 0  # nothing dirty
+
+        pairs = {}
+        for member in client.smembers(self.flushing_key):
+            post_id, user_id = member.split(':')
+            pairs.setdefault(int(post_id), set()).add(int(user_id))
+
+        post_ids = list(pairs)
+        with client.pipeline(transaction=False) as pipe:
+            for post_id in post_ids:
+                pipe.smembers(self.members_key(post_id))
+            memberships = dict(zip(post_ids, pipe.execute()))
+
+        existing_posts = set(BlogPost.objects.filter(pk__in=post_ids).values_list('pk', flat=True))
+        # Likes of posts or accounts deleted since the toggle are dropped; the
+        # foreign keys would fail the whole batch, and ignore_conflicts does not cover them.
+        existing_users = set(
+            Profile.objects.filter(pk__in={user_id for user_ids in pairs.values() for user_id in user_ids})
+            .values_list('pk', flat=True)
+        )
+        to_create, to_delete = [], {}
+        for post_id, user_ids in pairs.items():
+            if post_id not in existing_posts:
+                continue
+            liked = {int(user_id) for user_id in memberships[post_id]}
+            for user_id in user_ids:
+                if user_id in liked and user_id in existing_users:
+                    to_create.append(BlogLike(blog_id=post_id, user_id=user_id))
+                else:
+                    to_delete.setdefault(post_id, []).append(user_id)
+
+        with transaction.atomic():
+            BlogLike.objects.bulk_create(to_create, batch_size=batch_size, ignore_conflicts=True)
+            for post_id, user_ids in to_delete.items():
+                BlogLike.objects.filter(blog_id=post_id, user_id__in=user_ids).delete()
+            if to_delete:
+                trending_engine.mark_stale(*to_delete)
+            self._refresh_counts(existing_posts)
+            categories = set(
+                BlogPost.objects.filter(pk__in=existing_posts).values_list('category__name', flat=True)
+            )
+            transaction.on_commit(lambda: feed_cache.invalidate(*categories))
+
+        client.delete(self.flushing_key)
+        written = sum(len(user_ids) for user_ids in pairs.values())
+        logger.debug(f"Flushed {written} like change(s) across {len(existing_posts)} post(s)")
+        return written
+
+    def reset(self):
+        """Drop all cached like sets so they are rebuilt from BlogLike on next use."""
+        client = self.client
+        keys = list(client.scan_iter(match=f'{self.prefix}:post:*'))
+        for start in range(0, len(keys), 500):
+            client.delete(*keys[start:start + 500])
+        return len(keys)
+
+    def _refresh_counts(self, post_ids):
+        likes = BlogLike.objects.filter(blog=OuterRef('pk')).order_by().values('blog').annotate(c=Count('pk')).values('c')
+        BlogPost.objects.filter(pk__in=post_ids).update(
+            likes_count=Coalesce(Subquery(likes, output_field=IntegerField()), 0)
+        )
+
+
+like_engine = LikeEngine()
@@ -0,0 +1,128 @@
+import json
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.test.utils import override_settings, setup_test_environment, teardown_test_environment
+from explore.benchmark import Dataset, Runner, ServerComparison, compare, load_baseline, save_baseline
+
+LOCMEM_CACHE = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'benchmark'}}
+
+
+class Command(BaseCommand):
+    help = (
+        "Seed a throwaway database and benchmark the REST API: p50/p95/p99 latency, throughput and "
+        "SQL queries per endpoint, optionally compared against a stored baseline."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=200)
+        parser.add_argument('--posts', type=int, default=2000)
+        parser.add_argument('--categories', type=int, default=10)
+        parser.add_argument('--comments-per-post', type=int, default=5)
+        parser.add_argument('--likes-per-post', type=int, default=10)
+        parser.add_argument('--seed', type=int, default=1)
+        parser.add_argument('--requests', type=int, default=200, help="Measured requests per scenario.")
+        parser.add_argument('--warmup', type=int, default=10, help="Unmeasured requests per scenario.")
+        parser.add_argument('--scenario', action='append', dest='scenarios',
+                            help="Only run this scenario (repeatable).")
+        parser.add_argument('--baseline', help="Baseline JSON file to compare against (or to write).")
+        parser.add_argument('--save-baseline', action='store_true', help="Write the results to --baseline.")
+        parser.add_argument('--threshold', type=float, default=0.25,
+                            help="Allowed p95 latency growth over the baseline, as a fraction.")
+        parser.add_argument('--min-delta-ms', type=float, default=2.0,
+                            help="p95 growth below this many milliseconds is never a regression.")
+        parser.add_argument('--output', help="Also write the results as JSON to this file.")
+        parser.add_argument('--redis', action='store_true',
+                            help="Use the configured cache and Redis instead of process memory. "
+                                 "Point REDIS_URL at a scratch database: the run writes feed and like keys.")
+        parser.add_argument('--compare-asgi', action='store_true',
+                            help="Compare the sync and async explore views under --concurrency instead.")
+        parser.add_argument('--concurrency', type=int, default=16, help="Concurrent clients for --compare-asgi.")
+        parser.add_argument('--keepdb', action='store_true', help="Keep the benchmark database between runs.")
+        parser.add_argument('--noinput', '--no-input', action='store_false', dest='interactive')
+
+    def handle(self, *args, **options):
+        if options['compare_asgi'] and options['baseline']:
+            raise CommandError("--compare-asgi results are not compared against a baseline.")
+        if options['save_baseline'] and not options['baseline']:
+            raise CommandError("--save-baseline needs --baseline PATH.")
+        baseline = None
+        if options['baseline'] and not options['save_baseline']:
+            baseline = load_baseline(options['baseline'])
+
+        dataset = Dataset(
+            users=options['users'], posts=options['posts'], categories=options['categories'],
+            comments_per_post=options['comments_per_post'], likes_per_post=options['likes_per_post'],
+            seed=options['seed'],
+        )
+        if baseline and baseline['dataset'] != dataset.as_dict():
+            raise CommandError(f"The baseline was recorded with a different dataset: {baseline['dataset']}")
+
+        # Only the benchmark database is created, so configured replicas are not used.
+        isolation = {'DATABASE_REPLICAS': []}
+        if not options['redis']:
+            isolation.update(CACHES=LOCMEM_CACHE, REDIS_URL=None, LIKE_WRITE_BEHIND=False)
+        connection = connections['default']
+        old_name = connection.settings_dict['NAME']
+        setup_test_environment()
+        connection.creation.create_test_db(
+            verbosity=0, autoclobber=not options['interactive'], keepdb=options['keepdb']
+        )
+        try:
+            with override_settings(**isolation):
+                results = self.run(dataset, options)
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0, keepdb=options['keepdb'])
+            teardown_test_environment()
+
+        if options['compare_asgi']:
+            self.report_servers(results)
+        else:
+            self.report(results)
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as handle:
+                json.dump(results, handle, indent=2, sort_keys=True)
+        if options['save_baseline']:
+            save_baseline(options['baseline'], dataset, results)
+            self.stdout.write(self.style.SUCCESS(f"Saved the baseline to {options['baseline']}."))
+        elif baseline:
+            regressions = compare(results, baseline['results'], options['threshold'], options['min_delta_ms'])
+            if regressions:
+                raise CommandError("Regressions against the baseline:\n  " + "\n  ".join(regressions))
+            self.stdout.write(self.style.SUCCESS("No regressions against the baseline."))
+
+    def run(self, dataset, options):
+        User = get_user_model()
+        if not User.objects.filter(email=dataset.email(0)).exists():
+            self.stdout.write(f"Seeding {dataset.posts} post(s) for {dataset.users} user(s)...")
+            dataset.seed_database()
+        staff = User.objects.get(email='bench-admin@example.com')
+        reader = User.objects.get(email=dataset.email(0))
+        if options['compare_asgi']:
+            comparison = ServerComparison(
+                requests=options['requests'], concurrency=options['concurrency'], seed=options['seed']
+            )
+            return comparison.run(reader)
+        runner = Runner(requests=options['requests'], warmup=options['warmup'], seed=options['seed'])
+        return runner.run(reader, staff, names=options['scenarios'])
+
+    def report(self, results):
+        header = f"{'scenario':<18} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'req/s':>8} {'queries':>8} {'errors':>7}"
+        self.stdout.write(header)
+        self.stdout.write('-' * len(header))
+        for name, result in results.items():
+            self.stdout.write(
+                f"{name:<18} {result['p50_ms']:>9} {result['p95_ms']:>9} {result['p99_ms']:>9} "
+                f"{result['rps']:>8} {result['queries']:>8} {result['errors']:>7}"
+            )
+
+    def report_servers(self, results):
+        header = f"{'endpoint':<16} {'server':<6} {'p50 ms':>9} {'p95 ms':>9} {'req/s':>8} {'errors':>7}"
+        self.stdout.write(header)
+        self.stdout.write('-' * len(header))
+        for name, modes in results.items():
+            for mode, result in modes.items():
+                self.stdout.write(
+                    f"{name:<16} {mode:<6} {result['p50_ms']:>9} {result['p95_ms']:>9} "
+                    f"{result['rps']:>8} {result['errors']:>7}"
+                )
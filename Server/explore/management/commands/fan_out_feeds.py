@@ -0,0 +1,40 @@
+import time
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from explore.feeds import personal_feed
+
+
+class Command(BaseCommand):
+    help = "Add newly published posts to the personal feeds of interested users (once, or continuously with --loop)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--loop', action='store_true', help="Keep fanning out every --interval seconds.")
+        parser.add_argument('--interval', type=float, default=None)
+        parser.add_argument('--batch-size', type=int, default=100, help="Queued posts handled per pass.")
+
+    def handle(self, *args, **options):
+        if not personal_feed.enabled:
+            raise CommandError("REDIS_URL is not configured.")
+
+        interval = options['interval'] or getattr(settings, 'PERSONAL_FEED_FANOUT_INTERVAL', 1)
+        batch_size = options['batch_size']
+
+        if not options['loop']:
+            handled = 0
+            while True:
+                count = personal_feed.fan_out_pending(limit=batch_size)
+                handled += count
+                if count < batch_size:
+                    break
+            self.stdout.write(self.style.SUCCESS(f"Fanned out {handled} post(s)."))
+            return
+
+        self.stdout.write(f"Fanning out new posts every {interval}s (Ctrl+C to stop).")
+        try:
+            while True:
+                started = time.monotonic()
+                while personal_feed.fan_out_pending(limit=batch_size) == batch_size:
+                    pass
+                time.sleep(max(0.0, interval - (time.monotonic() - started)))
+        except KeyboardInterrupt:
+            pass
@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+from explore.cache import feed_cache
+
+
+class Command(BaseCommand):
+    help = "Show hit/miss statistics of the explore feed response cache."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--reset', action='store_true', help="Reset the counters after printing them.")
+
+    def handle(self, *args, **options):
+        for name, value in feed_cache.stats().items():
+            self.stdout.write(f"{name}: {value}")
+        if options['reset']:
+            feed_cache.reset_stats()
+            self.stdout.write(self.style.SUCCESS("Counters reset."))
@@ -0,0 +1,39 @@
+import time
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from explore.likes import like_engine
+
+
+class Command(BaseCommand):
+    help = "Persist write-behind likes from Redis to BlogLike (once, or continuously with --loop)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--loop', action='store_true', help="Keep flushing every --interval seconds.")
+        parser.add_argument('--interval', type=float, default=None)
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--rebuild', action='store_true',
+                            help="After flushing, drop the Redis like sets so they are reloaded from the table.")
+
+    def handle(self, *args, **options):
+        if like_engine.client is None:
+            raise CommandError("REDIS_URL is not configured.")
+
+        interval = options['interval'] or getattr(settings, 'LIKE_FLUSH_INTERVAL', 1)
+        batch_size = options['batch_size']
+
+        if not options['loop']:
+            written = like_engine.flush(batch_size=batch_size)
+            self.stdout.write(self.style.SUCCESS(f"Flushed {written} like change(s)."))
+            if options['rebuild']:
+                dropped = like_engine.reset()
+                self.stdout.write(self.style.SUCCESS(f"Dropped {dropped} cached key(s)."))
+            return
+
+        self.stdout.write(f"Flushing likes every {interval}s (Ctrl+C to stop).")
+        try:
+            while True:
+                started = time.monotonic()
+                like_engine.flush(batch_size=batch_size)
+                time.sleep(max(0.0, interval - (time.monotonic() - started)))
+        except KeyboardInterrupt:
+            like_engine.flush(batch_size=batch_size)
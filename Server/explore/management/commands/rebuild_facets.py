@@ -0,0 +1,10 @@
+from django.core.management.base import BaseCommand
+from explore.facets import facet_counts
+
+
+class Command(BaseCommand):
+    help = "Recount the category and tag facet tables from the published, visible posts."
+
+    def handle(self, *args, **options):
+        categories, tags = facet_counts.rebuild()
+        self.stdout.write(self.style.SUCCESS(f"Counted posts for {categories} category(ies) and {tags} tag(s)."))
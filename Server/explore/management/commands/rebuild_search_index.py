@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+from users.models import BlogPost
+from explore.search import update_search_vector
+
+
+class Command(BaseCommand):
+    help = "Rebuild BlogPost.search_vector for existing posts (run after deploying full-text search)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        ids = BlogPost.objects.order_by('pk').values_list('pk', flat=True)
+        updated = 0
+        last_pk = 0
+        while True:
+            batch = list(ids.filter(pk__gt=last_pk)[:batch_size])
+            if not batch:
+                break
+            updated += update_search_vector(BlogPost.objects.filter(pk__in=batch))
+            last_pk = batch[-1]
+        self.stdout.write(self.style.SUCCESS(f"Indexed {updated} post(s)."))
@@ -0,0 +1,35 @@
+import time
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from explore.trending import trending_engine
+
+
+class Command(BaseCommand):
+    help = "Re-score the posts with new or removed likes and comments in the trending rank table (once, or continuously with --loop)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--loop', action='store_true', help="Keep refreshing every --interval seconds.")
+        parser.add_argument('--interval', type=float, default=None)
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--full', action='store_true',
+                            help="Rebuild the table from all recent activity instead of the last checkpoint.")
+
+    def handle(self, *args, **options):
+        interval = options['interval'] or getattr(settings, 'TRENDING_REFRESH_INTERVAL', 300)
+        batch_size = options['batch_size']
+
+        if not options['loop']:
+            updated = trending_engine.refresh(full=options['full'], batch_size=batch_size)
+            self.stdout.write(self.style.SUCCESS(f"Updated the trending score of {updated} post(s)."))
+            return
+
+        if options['full']:
+            trending_engine.refresh(full=True, batch_size=batch_size)
+        self.stdout.write(f"Refreshing trending scores every {interval}s (Ctrl+C to stop).")
+        try:
+            while True:
+                started = time.monotonic()
+                trending_engine.refresh(batch_size=batch_size)
+                time.sleep(max(0.0, interval - (time.monotonic() - started)))
+        except KeyboardInterrupt:
+            pass
@@ -1,3 +1,59 @@
-from django.db import models
-
-# Create your models here.
+from django.db import models
+from users.models import BlogPost, ContentCategory
+from users.tags import TAG_MAX_LENGTH
+
+
+class PostRank(models.Model):
+    """
+    Trending score of a post with recent activity, maintained by
+    `manage.py update_trending` (explore/trending.py).
+
+    `score` is log2 of the post's activity weights decayed to a fixed epoch, so
+    ordering by it equals ordering by the decayed score at any later moment and
+    rows only change when their post gets new activity. `stale` marks a post
+    that lost a like or comment and is re-scored by the next refresh.
+    """
+    post = models.OneToOneField(BlogPost, on_delete=models.CASCADE, primary_key=True, related_name='trending')
+    score = models.FloatField()
+    stale = models.BooleanField(default=False)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['-score'], name='postrank_score_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.post_id} - {self.score:.3f}"
+
+
+class TrendingCheckpoint(models.Model):
+    """Single row recording the time of the last trending refresh."""
+    scanned_until = models.DateTimeField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"scanned until {self.scanned_until}"
+
+
+class CategoryFacet(models.Model):
+    """Published, visible posts per category, kept up to date on every post save (explore/facets.py)."""
+    category = models.OneToOneField(ContentCategory, on_delete=models.CASCADE, primary_key=True, related_name='facet')
+    posts = models.PositiveIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.category_id} - {self.posts}"
+
+
+class TagFacet(models.Model):
+    """Published, visible posts per tag, kept up to date on every post save (explore/facets.py)."""
+    tag = models.CharField(max_length=TAG_MAX_LENGTH, primary_key=True)
+    posts = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['-posts', 'tag'], name='tagfacet_posts_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.tag} - {self.posts}"
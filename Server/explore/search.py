@@ -0,0 +1,79 @@
+from django.conf import settings
+from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVector
+from django.db import connections
+from django.db.models import Case, F, FloatField, IntegerField, Q, TextField, Value, When
+from django.db.models.functions import Cast
+from users.models import BlogPost
+
+SEARCHABLE_FIELDS = {'title', 'excerpt', 'content', 'tags'}
+
+
+def search_config():
+    return getattr(settings, 'SEARCH_CONFIG', 'english')
+
+
+def build_search_vector():
+    config = search_config()
+    return (
+        SearchVector('title', weight='A', config=config)
+        + SearchVector(Cast('tags', TextField()), weight='B', config=config)
+        + SearchVector('excerpt', weight='C', config=config)
+        + SearchVector('content', weight='D', config=config)
+    )
+
+
+class PostgresSearchBackend:
+    """Full-text search over the stored, GIN-indexed BlogPost.search_vector."""
+
+    def search(self, queryset, value):
+        query = SearchQuery(value, search_type='websearch', config=search_config())
+        return queryset.filter(search_vector=query).annotate(
+            # Cast ts_rank's float4 to float8 so cursor keys survive a JSON round trip exactly.
+            rank=Cast(SearchRank(F('search_vector'), query), FloatField())
+        )
+
+    def update(self, queryset):
+        return queryset.update(search_vector=build_search_vector())
+
+
+class FallbackSearchBackend:
+    """
+    Substring search for databases without tsvector support (SQLite test runs).
+    The rank mirrors the Postgres weights: title > tags > excerpt > content.
+    """
+
+    weights = (('title', 8), ('tags', 4), ('excerpt', 2), ('content', 1))
+
+    def search(self, queryset, value):
+        condition = Q()
+        for field, _ in self.weights:
+            condition |= Q(**{f'{field}__icontains': value})
+        rank = sum(
+            (Case(When(**{f'{field}__icontains': value}, then=Value(weight)), default=Value(0), output_field=IntegerField())
+             for field, weight in self.weights),
+            Value(0),
+        )
+        return queryset.filter(condition).annotate(rank=Cast(rank, FloatField()))
+
+    def update(self, queryset):
+        return 0
+
+
+def get_search_backend(using='default'):
+    if connections[using].vendor == 'postgresql':
+        return PostgresSearchBackend()
+    return FallbackSearchBackend()
+
+
+def search_posts(queryset, value):
+    return get_search_backend(queryset.db).search(queryset, value)
+
+
+def update_search_vector(queryset):
+    return get_search_backend(queryset.db).update(queryset)
+
+
+def update_post_search_vector(sender, instance, using='default', update_fields=None, **kwargs):
+    if update_fields is not None and not SEARCHABLE_FIELDS.intersection(update_fields):
+        return
+    update_search_vector(BlogPost.objects.using(using).filter(pk=instance.pk))
@@ -1,14 +1,16 @@
-from rest_framework import serializers
-from users.models import BlogPost, ContentCategory, Comment, BlogLike
-from authCustom.models import Profile
-
-class ContentCategorySerializer(serializers.ModelSerializer):
-    class Meta:
-        model = ContentCategory
-        fields = ['id', 'name', 'active']
-
+from rest_framework import serializers
+from users.models import BlogPost, ContentCategory, Comment, BlogLike
+from authCustom.models import Profile
+from cms_project.serialization import ValuesSerializer
+
+class ContentCategorySerializer(serializers.ModelSerializer):
+    class Meta:
+        model = ContentCategory
+        fields = ['id', 'name', 'active']
+
 class ProfileSerializer(serializers.ModelSerializer):
     display_name = serializers.SerializerMethodField()
+    values_sources = {'display_name': ('first_name', 'last_name')}
 
     class Meta:
         model = Profile
@@ -20,54 +22,88 @@ class ProfileSerializer(serializers.ModelSerializer):
 
 class CommentSerializer(serializers.ModelSerializer):
     user = ProfileSerializer(read_only=True)
+    parent = serializers.PrimaryKeyRelatedField(queryset=Comment.objects.all(), required=False, allow_null=True)
     can_edit = serializers.SerializerMethodField()
     can_delete = serializers.SerializerMethodField()
 
     class Meta:
         model = Comment
-        fields = ['id', 'blog', 'user', 'content', 'created_at', 'can_edit', 'can_delete']
-        read_only_fields = ['blog', 'user']
+        fields = [
+            'id', 'blog', 'user', 'parent', 'depth', 'replies_count', 'content', 'created_at',
+            'can_edit', 'can_delete'
+        ]
+        read_only_fields = ['blog', 'user', 'depth', 'replies_count']
+
+    def validate_parent(self, parent):
+        if self.instance is not None:
+            if parent != self.instance.parent:
+                raise serializers.ValidationError("A comment cannot be moved to another thread.")
+            return parent
+        if parent is None:
+            return parent
+        blog = self.context.get('blog')
+        if blog is not None and parent.blog_id != blog.id:
+            raise serializers.ValidationError("The parent comment belongs to another post.")
+        if parent.depth >= Comment.MAX_DEPTH:
+            raise serializers.ValidationError("This thread cannot be nested any deeper.")
+        return parent
 
     def _has_comment_permission(self, obj):
+        viewer = self.context.get('viewer')
+        if viewer is not None:
+            return viewer.can_edit(obj)
         request = self.context.get('request')
         user = getattr(request, 'user', None)
         if not user or not user.is_authenticated:
             return False
-        return obj.user_id == user.id or obj.blog.author_id == user.id
+        # List views pass the post's author so rows need not load their post.
+        blog_author_id = self.context.get('blog_author_id') or obj.blog.author_id
+        return obj.user_id == user.id or blog_author_id == user.id
 
     def get_can_edit(self, obj):
         return self._has_comment_permission(obj)
 
     def get_can_delete(self, obj):
         return self._has_comment_permission(obj)
-
-class BlogLikeSerializer(serializers.ModelSerializer):
-    user = ProfileSerializer(read_only=True)
-
-    class Meta:
-        model = BlogLike
-        fields = ['id', 'user', 'liked_at']
-
-class BlogExploreSerializer(serializers.ModelSerializer):
-    author = ProfileSerializer(read_only=True)
-    category = ContentCategorySerializer(read_only=True)
-    likes_count = serializers.IntegerField(source='likes.count', read_only=True)
-    comments_count = serializers.IntegerField(source='comments.count', read_only=True)
-    tags = serializers.ListField(child=serializers.CharField())
-
-    class Meta:
-        model = BlogPost
-        fields = [
-            'id', 'author', 'title', 'excerpt', 'category', 'status', 'tags', 
-            'thumbnail', 'created_at', 'updated_at', 'published_date', 
-            'likes_count', 'comments_count'
-        ]
-        
-class BlogPostDetailSerializer(serializers.ModelSerializer):
+
+class BlogLikeSerializer(serializers.ModelSerializer):
+    user = ProfileSerializer(read_only=True)
+
+    class Meta:
+        model = BlogLike
+        fields = ['id', 'user', 'liked_at']
+
+class ViewerStateMixin:
+    """`is_liked` / `is_author` from the page's ViewerState in the context (explore/viewer.py); False without one."""
+    values_sources = {'is_liked': ('id',), 'is_author': ('author_id',)}
+
+    def get_is_liked(self, obj):
+        viewer = self.context.get('viewer')
+        return viewer is not None and viewer.is_liked(obj.id)
+
+    def get_is_author(self, obj):
+        viewer = self.context.get('viewer')
+        return viewer is not None and viewer.is_author(obj.author_id)
+
+class BlogExploreSerializer(ViewerStateMixin, serializers.ModelSerializer):
+    author = ProfileSerializer(read_only=True)
+    category = ContentCategorySerializer(read_only=True)
+    tags = serializers.ListField(child=serializers.CharField())
+    is_liked = serializers.SerializerMethodField()
+    is_author = serializers.SerializerMethodField()
+
+    class Meta:
+        model = BlogPost
+        fields = [
+            'id', 'author', 'title', 'excerpt', 'category', 'status', 'tags', 
+            'thumbnail', 'created_at', 'updated_at', 'published_date', 
+            'likes_count', 'comments_count', 'is_liked', 'is_author'
+        ]
+        read_only_fields = ['likes_count', 'comments_count']
+        
+class BlogPostDetailSerializer(ViewerStateMixin, serializers.ModelSerializer):
     author = ProfileSerializer()
     category = ContentCategorySerializer()
-    likes_count = serializers.SerializerMethodField()
-    comments_count = serializers.SerializerMethodField()
     is_liked = serializers.SerializerMethodField()
     is_author = serializers.SerializerMethodField()
 
@@ -79,21 +115,7 @@ class BlogPostDetailSerializer(serializers.ModelSerializer):
             'published_date', 'likes_count', 'comments_count', 'is_liked',
             'is_author'
         ]
-
-    def get_likes_count(self, obj):
-        return obj.likes.count()
-
-    def get_comments_count(self, obj):
-        return obj.comments.count()
-
-    def get_is_liked(self, obj):
-        request = self.context.get('request')
-        user = getattr(request, 'user', None)
-        if not user or not user.is_authenticated:
-            return False
-        return obj.likes.filter(user=user).exists()
+        read_only_fields = ['likes_count', 'comments_count']
 
-    def get_is_author(self, obj):
-        request = self.context.get('request')
-        user = getattr(request, 'user', None)
-        return bool(user and user.is_authenticated and obj.author_id == user.id)
+# Explore list pages serialized from values() rows (cms_project/serialization.py).
+explore_list_values = ValuesSerializer(BlogExploreSerializer)
@@ -0,0 +1,28 @@
+"""
+The state a BlogPost had before a save, read once for every explore
+handler that reacts to the change (feed cache, personal feeds, facets).
+
+BlogPost.save() runs in a transaction and the row is read FOR UPDATE, so a
+concurrent save of the same post waits and then reads this save's result;
+the deltas the handlers apply never count one change twice.
+"""
+from collections import namedtuple
+from django.db import transaction
+
+PostSnapshot = namedtuple('PostSnapshot', ['status', 'show', 'category_id', 'category_name', 'tags'])
+
+
+def remember_previous_state(sender, instance, raw=False, using='default', **kwargs):
+    if raw or instance.pk is None:
+        instance._explore_previous = None
+        return
+    queryset = sender._default_manager.using(using).filter(pk=instance.pk)
+    if transaction.get_connection(using).in_atomic_block:
+        queryset = queryset.select_for_update(of=('self',))
+    previous = queryset.values_list('status', 'show', 'category_id', 'category__name', 'tags').first()
+    instance._explore_previous = PostSnapshot(*previous) if previous else None
+
+
+def previous_state(instance):
+    """The post's row before the save being handled, or None for a new post."""
+    return getattr(instance, '_explore_previous', None)
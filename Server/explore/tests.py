@@ -1,3 +1,953 @@
-from django.test import TestCase
-
-# Create your tests here.
+import json
+import threading
+from base64 import b64encode
+from asgiref.sync import async_to_sync
+from datetime import timedelta
+from io import StringIO
+from unittest import skipUnless
+from unittest.mock import patch
+import fakeredis
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import DatabaseError, connections
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import include, path
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+from authCustom.cache import user_cache
+from authCustom.models import Profile
+from cms_project.db_router import PIN_COOKIE, replica_health
+from users.models import BlogLike, BlogPost, Comment, ContentCategory
+from .benchmark import Dataset, Runner, compare
+from .cache import feed_cache
+from .facets import facet_counts
+from .feeds import personal_feed
+from .likes import like_engine
+from .models import CategoryFacet, PostRank, TagFacet, TrendingCheckpoint
+from .trending import trending_engine
+from .urls import explore_patterns
+
+LOCMEM_CACHE = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'explore-tests'}}
+
+
+class ExploreTestCase(TestCase):
+    def setUp(self):
+        user_cache.clear()
+        self.user = Profile.objects.create_user(email='reader@example.com', password='secret123', first_name='Reader')
+        self.tech = ContentCategory.objects.create(name='Tech')
+        self.travel = ContentCategory.objects.create(name='Travel')
+        self.client = APIClient()
+        self.client.cookies['access_token'] = str(RefreshToken.for_user(self.user).access_token)
+
+    def create_post(self, category=None, **kwargs):
+        fields = {
+            'author': self.user, 'title': 'Post', 'content': 'Body', 'category': category or self.tech,
+            'status': 'published', 'thumbnail': 'https://example.com/thumb.png',
+        }
+        fields.update(kwargs)
+        return BlogPost.objects.create(**fields)
+
+
+@override_settings(CACHES=LOCMEM_CACHE)
+class FeedCacheTests(ExploreTestCase):
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        self.post = self.create_post()
+
+    def test_repeated_request_is_served_from_cache(self):
+        first = self.client.get('/api/v1/explore/blogs/')
+        with self.assertNumQueries(1):  # the viewer's likes; user and page come from the cache
+            second = self.client.get('/api/v1/explore/blogs/')
+        self.assertEqual(first['X-Cache'], 'MISS')
+        self.assertEqual(second['X-Cache'], 'HIT')
+        self.assertEqual(first.data, second.data)
+        self.assertEqual(feed_cache.stats()['hits'], 1)
+
+    def test_equivalent_parameters_share_a_key(self):
+        self.client.get('/api/v1/explore/blogs/?category=Tech&search=Post')
+        response = self.client.get('/api/v1/explore/blogs/?search=%20post&category=tech&_=123')
+        self.assertEqual(response['X-Cache'], 'HIT')
+
+    def test_like_invalidates_feed(self):
+        self.client.get('/api/v1/explore/blogs/')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(f'/api/v1/explore/blogs/{self.post.id}/like/')
+        response = self.client.get('/api/v1/explore/blogs/')
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual(response.data['results'][0]['likes_count'], 1)
+
+    def test_soft_delete_invalidates_global_and_category_feeds(self):
+        self.client.get('/api/v1/explore/blogs/')
+        self.client.get('/api/v1/explore/blogs/?category=Tech')
+        self.client.get('/api/v1/explore/blogs/?category=Travel')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.post.show = False
+            self.post.save()
+        self.assertEqual(self.client.get('/api/v1/explore/blogs/')['X-Cache'], 'MISS')
+        self.assertEqual(self.client.get('/api/v1/explore/blogs/?category=Tech')['X-Cache'], 'MISS')
+        self.assertEqual(self.client.get('/api/v1/explore/blogs/?category=Travel')['X-Cache'], 'HIT')
+
+    def test_concurrent_miss_waits_for_the_computing_worker(self):
+        key = 'explore:feed:test:single-flight'
+        cache.add(f'{key}:lock', 'other-worker')
+        threading.Timer(0.05, lambda: cache.set(key, 'computed elsewhere')).start()
+
+        def compute():
+            raise AssertionError("value should come from the lock holder")
+
+        value, hit = feed_cache.get_or_set(key, compute)
+        self.assertEqual(value, 'computed elsewhere')
+        self.assertTrue(hit)
+
+
+@override_settings(CACHES=LOCMEM_CACHE)
+class ConditionalGetTests(ExploreTestCase):
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        self.post = self.create_post(content='A long body ' * 500)
+        self.url = f'/api/v1/explore/blogs/{self.post.id}/'
+
+    def test_detail_revalidates_without_a_body(self):
+        first = self.client.get(self.url)
+        self.assertEqual(first.status_code, 200)
+        self.assertIn('private', first['Cache-Control'])
+        with self.assertNumQueries(2):  # the post and the viewer's like
+            second = self.client.get(self.url, HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(second.status_code, 304)
+        self.assertEqual(second.content, b'')
+        self.assertEqual(second['ETag'], first['ETag'])
+
+    def test_if_modified_since_alone_does_not_revalidate(self):
+        first = self.client.get(self.url)
+        self.assertIn('Last-Modified', first)
+        # A like moves likes_count and is_liked but not updated_at.
+        self.client.post(f'/api/v1/explore/blogs/{self.post.id}/like/')
+        since = self.client.get(self.url, HTTP_IF_MODIFIED_SINCE=first['Last-Modified'])
+        self.assertEqual(since.status_code, 200)
+        self.assertTrue(since.data['is_liked'])
+        self.assertEqual(since.data['likes_count'], 1)
+
+    def test_detail_etag_follows_counters_and_viewer(self):
+        etag = self.client.get(self.url)['ETag']
+        BlogPost.objects.filter(pk=self.post.pk).update(comments_count=3)
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['comments_count'], 3)
+        BlogLike.objects.create(blog=self.post, user=self.user)
+        liked = self.client.get(self.url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(liked.status_code, 200)
+        self.assertTrue(liked.data['is_liked'])
+
+    def test_list_revalidates_from_the_cached_page(self):
+        first = self.client.get('/api/v1/explore/blogs/')
+        second = self.client.get('/api/v1/explore/blogs/', HTTP_IF_NONE_MATCH=f'W/{first["ETag"]}')
+        self.assertEqual(second.status_code, 304)
+        self.assertEqual(second['X-Cache'], 'HIT')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.create_post(title='Newer')
+        third = self.client.get('/api/v1/explore/blogs/', HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(third.status_code, 200)
+        self.assertNotEqual(third['ETag'], first['ETag'])
+
+
+@override_settings(CACHES=LOCMEM_CACHE)
+class ViewerStateTests(ExploreTestCase):
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        self.other = Profile.objects.create_user(email='other@example.com', password='secret123')
+        self.posts = [self.create_post(title=f'Post {i}', author=self.other) for i in range(9)]
+        self.own = self.create_post(title='Own')
+        BlogLike.objects.create(blog=self.posts[3], user=self.user)
+        self.client.get('/api/v1/explore/blogs/')  # warm the user cache
+
+    def test_list_carries_the_viewers_state_over_the_shared_page(self):
+        response = self.client.get('/api/v1/explore/blogs/?page_size=10')
+        state = {post['title']: (post['is_liked'], post['is_author']) for post in response.data['results']}
+        self.assertEqual(state['Post 3'], (True, False))
+        self.assertEqual(state['Own'], (False, True))
+        self.assertEqual(state['Post 0'], (False, False))
+
+        other = APIClient()
+        other.cookies['access_token'] = str(RefreshToken.for_user(self.other).access_token)
+        shared = other.get('/api/v1/explore/blogs/?page_size=10')
+        self.assertEqual(shared['X-Cache'], 'HIT')
+        state = {post['title']: (post['is_liked'], post['is_author']) for post in shared.data['results']}
+        self.assertEqual(state['Post 3'], (False, True))
+        self.assertEqual(state['Own'], (False, False))
+        self.assertNotEqual(shared['ETag'], response['ETag'])
+
+    def test_query_count_does_not_grow_with_the_page(self):
+        counts = []
+        for page_size in (2, 10):
+            cache.clear()
+            with CaptureQueriesContext(connections['default']) as queries:
+                self.client.get(f'/api/v1/explore/blogs/?page_size={page_size}')
+            counts.append(len(queries.captured_queries))
+        self.assertEqual(counts[0], counts[1])
+
+    def test_a_like_changes_the_list_etag(self):
+        etag = self.client.get('/api/v1/explore/blogs/')['ETag']
+        BlogLike.objects.create(blog=self.posts[8], user=self.user)
+        response = self.client.get('/api/v1/explore/blogs/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response['X-Cache'], 'HIT')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(next(post for post in response.data['results'] if post['id'] == self.posts[8].id)['is_liked'])
+
+
+@override_settings(CACHES=LOCMEM_CACHE)
+class SearchTests(ExploreTestCase):
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        self.in_content = self.create_post(title='Weekend notes', content='Upgrading a Django project')
+        self.in_title = self.create_post(title='Django tips', content='Short and practical')
+        self.unrelated = self.create_post(title='Cooking', content='Bread and soup')
+
+    def ids(self, query):
+        response = self.client.get(f'/api/v1/explore/blogs/?{query}')
+        self.assertEqual(response.status_code, 200)
+        return [post['id'] for post in response.data['results']]
+
+    def test_search_matches_title_and_body(self):
+        self.assertEqual(set(self.ids('search=django')), {self.in_content.id, self.in_title.id})
+        self.assertEqual(self.ids('search=zebra'), [])
+
+    def test_relevance_ranks_title_matches_first(self):
+        # Make the body match the newest post, so only the rank can put the title match first.
+        BlogPost.objects.filter(pk=self.in_content.pk).update(created_at=timezone.now() + timedelta(hours=1))
+        self.assertEqual(self.ids('search=django&sort_by=latest'), [self.in_content.id, self.in_title.id])
+        cache.clear()
+        self.assertEqual(self.ids('search=django&sort_by=relevance'), [self.in_title.id, self.in_content.id])
+
+    def test_rebuild_search_index(self):
+        out = StringIO()
+        if connections['default'].vendor == 'postgresql':
+            BlogPost.objects.update(search_vector=None)
+            self.assertEqual(self.ids('search=django'), [])
+            cache.clear()
+            call_command('rebuild_search_index', batch_size=2, stdout=out)
+            self.assertIn('Indexed 3 post(s).', out.getvalue())
+        else:
+            # The fallback backend searches the columns directly and has nothing to index.
+            call_command('rebuild_search_index', batch_size=2, stdout=out)
+            self.assertIn('Indexed 0 post(s).', out.getvalue())
+        self.assertEqual(set(self.ids('search=django')), {self.in_content.id, self.in_title.id})
+
+
+@override_settings(CACHES=LOCMEM_CACHE)
+class TagFilterTests(ExploreTestCase):
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        self.python = self.create_post(title='Python', tags=['Python', '#Machine Learning', 'python'])
+        self.both = self.create_post(title='Both', tags=['python', 'Django'])
+        self.django = self.create_post(title='Django', tags=['django_rest', 'DJANGO'])
+
+    def titles(self, query):
+        response = self.client.get(f'/api/v1/explore/blogs/?{query}')
+        self.assertEqual(response.status_code, 200)
+        return {post['title'] for post in response.data['results']}
+
+    def test_tags_are_stored_in_canonical_form(self):
+        self.python.refresh_from_db()
+        self.assertEqual(self.python.tags, ['python', 'machine-learning'])
+        self.django.refresh_from_db()
+        self.assertEqual(self.django.tags, ['django-rest', 'django'])
+
+    def test_any_and_all_tags(self):
+        self.assertEqual(self.titles('tags=PYTHON,%23django'), {'Python', 'Both', 'Django'})
+        self.assertEqual(self.titles('tags=python,django&tags_match=all'), {'Both'})
+        self.assertEqual(self.titles('tags=machine_learning'), {'Python'})
+        self.assertEqual(self.titles('tags=pyth'), set())
+        response = self.client.get('/api/v1/explore/blogs/?tags=python&tags_match=some')
+        self.assertEqual(response.status_code, 400)
+
+    def test_equivalent_tag_lists_share_a_key(self):
+        self.client.get('/api/v1/explore/blogs/?tags=Django,python')
+        response = self.client.get('/api/v1/explore/blogs/?tags=python,%23django')
+        self.assertEqual(response['X-Cache'], 'HIT')
+
+    def test_normalize_tags_command_rewrites_old_rows(self):
+        BlogPost.objects.filter(pk=self.both.pk).update(tags=['Old Tag', 'python'])
+        call_command('normalize_tags', stdout=StringIO())
+        self.both.refresh_from_db()
+        self.assertEqual(self.both.tags, ['old-tag', 'python'])
+
+
+@override_settings(CACHES=LOCMEM_CACHE)
+class CursorPaginationTests(ExploreTestCase):
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        self.now = timezone.now()
+
+    def create_posts(self, count, **kwargs):
+        posts = [self.create_post(title=f'Post {i}', **kwargs) for i in range(count)]
+        return [post.id for post in posts]
+
+    def walk(self, url):
+        """Ids of every page following `next` from `url`, and the last response."""
+        pages = []
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            pages.append([row['id'] for row in response.data['results']])
+            url = response.data['next']
+        return pages, response
+
+    def expected(self, *ordering):
+        return list(BlogPost.objects.order_by(*ordering).values_list('id', flat=True))
+
+    def test_next_and_previous_cursors(self):
+        for i, pk in enumerate(self.create_posts(7)):
+            BlogPost.objects.filter(pk=pk).update(created_at=self.now - timedelta(minutes=i))
+        first = self.client.get('/api/v1/explore/blogs/?pagination=cursor&page_size=3')
+        self.assertIsNone(first.data['previous'])
+
+        pages, last = self.walk('/api/v1/explore/blogs/?pagination=cursor&page_size=3')
+        self.assertEqual([len(page) for page in pages], [3, 3, 1])
+        self.assertEqual(sum(pages, []), self.expected('-created_at'))
+        self.assertIsNone(last.data['next'])
+
+        previous = self.client.get(last.data['previous'])
+        self.assertEqual([row['id'] for row in previous.data['results']], pages[1])
+        previous = self.client.get(previous.data['previous'])
+        self.assertEqual([row['id'] for row in previous.data['results']], pages[0])
+        self.assertIsNone(previous.data['previous'])
+
+    def test_equal_timestamps_are_split_by_id(self):
+        self.create_posts(5)
+        BlogPost.objects.update(created_at=self.now)
+        pages, _ = self.walk('/api/v1/explore/blogs/?pagination=cursor&page_size=2')
+        self.assertEqual(sum(pages, []), self.expected('-id'))
+
+    def test_popular_sort(self):
+        for i, pk in enumerate(self.create_posts(6)):
+            BlogPost.objects.filter(pk=pk).update(likes_count=i % 3, created_at=self.now - timedelta(minutes=i % 2))
+        pages, _ = self.walk('/api/v1/explore/blogs/?pagination=cursor&page_size=2&sort_by=popular')
+        self.assertEqual(sum(pages, []), self.expected('-likes_count', '-created_at', '-id'))
+
+    def test_invalid_cursor_is_not_found(self):
+        self.create_posts(2)
+        wrong_length = b64encode(b'{"p":[1],"r":0}').decode('ascii')
+        for cursor in ('not-a-cursor', wrong_length):
+            with self.subTest(cursor=cursor):
+                response = self.client.get(f'/api/v1/explore/blogs/?cursor={cursor}')
+                self.assertEqual(response.status_code, 404)
+
+
+@override_settings(CACHES=LOCMEM_CACHE)
+class FastSerializationTests(ExploreTestCase):
+    """The values() fast path and the orjson renderer give the bytes of the serializer + JSONRenderer path."""
+
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        writer = Profile.objects.create_user(email='writer@example.com', password='secret123')  # no name: "User"
+        texts = [
+            'Caf\u00e9 \u65e5\u672c \U0001f680', 'line\u2028para\u2029end', 'quote " back \\ slash /',
+            'tab\tnew\nline\x01\x1f\x7f', '', '<script>&amp;</script>',
+        ]
+        now = timezone.now().replace(microsecond=0)
+        for i in range(14):
+            post = self.create_post(
+                title=f'{texts[i % len(texts)]} {i}', excerpt=texts[(i + 1) % len(texts)],
+                author=writer if i % 3 else self.user, category=self.travel if i % 2 else self.tech,
+                tags=['python', f'tag {i}'] if i % 4 else [], likes_count=i % 5, comments_count=i % 3,
+            )
+            # Equal timestamps across pages, with and without microseconds.
+            BlogPost.objects.filter(pk=post.pk).update(created_at=now - timedelta(microseconds=(i // 2) * 1500))
+        BlogLike.objects.create(blog=BlogPost.objects.get(title__endswith=' 13'), user=self.user)
+        self.client.get('/api/v1/explore/blogs/')  # warm the user cache
+
+    def assertSameBytes(self, url, client=None):
+        get = client or self.client.get
+        cache.clear()
+        with override_settings(FAST_SERIALIZATION=False):
+            current = get(url)
+        cache.clear()
+        fast = get(url)
+        self.assertEqual(fast.status_code, 200)
+        self.assertEqual(fast['Content-Type'], 'application/json')
+        self.assertEqual(fast.content, JSONRenderer().render(current.data))
+        return json.loads(fast.content)
+
+    def test_explore_list_pages(self):
+        for query in ('', 'page=2&page_size=5', 'sort_by=popular', 'sort_by=most-commented&category=travel',
+                      'tags=python', 'search=quote'):
+            with self.subTest(query=query):
+                data = self.assertSameBytes(f'/api/v1/explore/blogs/?{query}')
+                self.assertTrue(data['results'])
+        self.assertIn('\\u2028', self.client.get('/api/v1/explore/blogs/?page_size=20').content.decode())
+
+    def test_explore_cursor_pages(self):
+        url = '/api/v1/explore/blogs/?pagination=cursor&page_size=4&sort_by=popular'
+        for _ in range(3):
+            data = self.assertSameBytes(url)
+            url = data['next']
+        self.assertSameBytes(data['previous'])
+
+    def test_async_explore_list(self):
+        self.async_client.cookies['access_token'] = self.client.cookies['access_token'].value
+        with override_settings(ROOT_URLCONF=AsyncURLConf):
+            self.assertSameBytes('/api/v1/explore/blogs/?page_size=20', client=async_to_sync(self.async_client.get))
+
+    def test_user_blog_list(self):
+        self.create_post(title='Draft \u2028', status='draft')
+        self.assertSameBytes('/api/v1/user/blogs/user/')
+        self.assertSameBytes('/api/v1/user/blogs/user/?status=draft')
+
+
+@override_settings(CACHES=LOCMEM_CACHE)
+class FacetTests(ExploreTestCase):
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        self.first = self.create_post(title='First', tags=['python', 'django'])
+        self.second = self.create_post(title='Second', tags=['python'])
+        self.create_post(title='Draft', status='draft', tags=['python'])
+
+    def counts(self):
+        return (
+            dict(CategoryFacet.objects.filter(posts__gt=0).values_list('category__name', 'posts')),
+            dict(TagFacet.objects.filter(posts__gt=0).values_list('tag', 'posts')),
+        )
+
+    def test_counts_follow_publish_edit_and_soft_delete(self):
+        self.assertEqual(self.counts(), ({'Tech': 2}, {'python': 2, 'django': 1}))
+        self.second.category, self.second.tags = self.travel, ['python', 'travel']
+        self.second.save()
+        self.assertEqual(self.counts(), ({'Tech': 1, 'Travel': 1}, {'python': 2, 'django': 1, 'travel': 1}))
+        self.first.show = False
+        self.first.save()
+        self.assertEqual(self.counts(), ({'Travel': 1}, {'python': 1, 'travel': 1}))
+        self.first.show = True
+        self.first.save()
+        self.second.delete()
+        self.assertEqual(self.counts(), ({'Tech': 1}, {'python': 1, 'django': 1}))
+        expected = self.counts()
+        call_command('rebuild_facets', stdout=StringIO())
+        self.assertEqual(self.counts(), expected)
+
+    def test_a_save_reads_the_previous_row_once(self):
+        self.second.category, self.second.tags = self.travel, ['travel']
+        with CaptureQueriesContext(connections['default']) as queries:
+            self.second.save()
+        reads = [q['sql'] for q in queries.captured_queries if q['sql'].startswith('SELECT') and 'users_blogpost' in q['sql']]
+        self.assertEqual(len(reads), 1)
+        if connections['default'].vendor == 'postgresql':
+            self.assertIn('FOR UPDATE', reads[0])
+        self.assertEqual(self.counts(), ({'Tech': 1, 'Travel': 1}, {'python': 1, 'django': 1, 'travel': 1}))
+
+    def test_a_failed_rollup_update_rolls_the_save_back(self):
+        expected = self.counts()
+        self.second.status = 'draft'
+        with patch.object(facet_counts, 'apply', side_effect=DatabaseError('rollup')):
+            with self.assertRaises(DatabaseError):
+                self.second.save()
+        self.assertEqual(BlogPost.objects.get(pk=self.second.pk).status, 'published')
+        self.assertEqual(self.counts(), expected)
+
+    def test_unfiltered_facets_are_read_from_the_rollup(self):
+        self.client.get('/api/v1/explore/facets/')  # warm the user cache
+        with CaptureQueriesContext(connections['default']) as queries:
+            response = self.client.get('/api/v1/explore/facets/')
+        self.assertFalse([q['sql'] for q in queries.captured_queries if 'users_blogpost' in q['sql']])
+        self.assertEqual(response.data['categories'], [
+            {'id': self.tech.id, 'name': 'Tech', 'count': 2}, {'id': self.travel.id, 'name': 'Travel', 'count': 0},
+        ])
+        self.assertEqual(response.data['tags'], [{'name': 'python', 'count': 2}, {'name': 'django', 'count': 1}])
+
+    def test_filtered_facets_count_the_matches_and_are_cached(self):
+        self.create_post(category=self.travel, title='Trip', tags=['travel', 'django'])
+        first = self.client.get('/api/v1/explore/facets/?tags=django')
+        self.assertEqual(first['X-Cache'], 'MISS')
+        self.assertEqual(first.data['categories'], [
+            {'id': self.tech.id, 'name': 'Tech', 'count': 1}, {'id': self.travel.id, 'name': 'Travel', 'count': 1},
+        ])
+        self.assertEqual(first.data['tags'], [
+            {'name': 'django', 'count': 2}, {'name': 'python', 'count': 1}, {'name': 'travel', 'count': 1},
+        ])
+        second = self.client.get('/api/v1/explore/facets/?tags=%23Django&sort_by=popular')
+        self.assertEqual(second['X-Cache'], 'HIT')
+        self.assertEqual(second.data, first.data)
+        searched = self.client.get('/api/v1/explore/facets/?search=trip')
+        self.assertEqual(searched.data['categories'], [{'id': self.travel.id, 'name': 'Travel', 'count': 1}])
+        self.assertEqual(searched.data['tags'], [{'name': 'django', 'count': 1}, {'name': 'travel', 'count': 1}])
+        invalid = self.client.get('/api/v1/explore/facets/?tags=django&tags_match=some')
+        self.assertEqual(invalid.status_code, 400)
+
+
+@override_settings(CACHES=LOCMEM_CACHE, LIKE_WRITE_BEHIND=False)
+class CounterTests(ExploreTestCase):
+    def setUp(self):
+        super().setUp()
+        self.post = self.create_post()
+
+    def counters(self):
+        self.post.refresh_from_db()
+        return self.post.likes_count, self.post.comments_count
+
+    def test_like_and_unlike_keep_likes_count(self):
+        url = f'/api/v1/explore/blogs/{self.post.id}/like/'
+        self.assertEqual(self.client.post(url).data, {'action': 'liked', 'likes_count': 1})
+        self.assertEqual(self.counters(), (1, 0))
+        self.assertEqual(self.client.post(url).data, {'action': 'unliked', 'likes_count': 0})
+        self.assertEqual(self.counters(), (0, 0))
+
+    def test_comment_and_delete_keep_comments_count(self):
+        url = f'/api/v1/explore/blogs/{self.post.id}/comments/'
+        first = self.client.post(url, {'content': 'First'}, format='json').data
+        self.client.post(url, {'content': 'Second'}, format='json')
+        self.assertEqual(self.counters(), (0, 2))
+        response = self.client.delete(f"/api/v1/explore/blogs/comments/{first['id']}/")
+        self.assertEqual(response.status_code, 204)
+        self.assertEqual(self.counters(), (0, 1))
+
+    def test_reconcile_counters_repairs_drift(self):
+        other = Profile.objects.create_user(email='other@example.com', password='secret123')
+        BlogLike.objects.create(blog=self.post, user=other)
+        Comment.objects.create(blog=self.post, user=other, content='Hi')
+        intact = self.create_post(title='Intact')
+        BlogPost.objects.filter(pk=self.post.pk).update(likes_count=7, comments_count=0)
+
+        out = StringIO()
+        call_command('reconcile_counters', '--dry-run', stdout=out)
+        self.assertIn('Found 1 post(s)', out.getvalue())
+        self.assertEqual(self.counters(), (7, 0))
+
+        out = StringIO()
+        call_command('reconcile_counters', stdout=out)
+        self.assertIn('Repaired 1 post(s)', out.getvalue())
+        self.assertEqual(self.counters(), (1, 1))
+        intact.refresh_from_db()
+        self.assertEqual((intact.likes_count, intact.comments_count), (0, 0))
+
+
+@override_settings(CACHES=LOCMEM_CACHE, LIKE_WRITE_BEHIND=True)
+class WriteBehindLikeTests(ExploreTestCase):
+    def setUp(self):
+        super().setUp()
+        client = patch.object(like_engine, '_client', fakeredis.FakeRedis(decode_responses=True))
+        client.start()
+        self.addCleanup(client.stop)
+        self.post = self.create_post()
+        self.other = Profile.objects.create_user(email='other@example.com', password='secret123')
+        BlogLike.objects.create(blog=self.post, user=self.other)
+        BlogPost.objects.filter(pk=self.post.pk).update(likes_count=1)
+
+    def like(self):
+        return self.client.post(f'/api/v1/explore/blogs/{self.post.id}/like/').data
+
+    def test_toggle_answers_from_redis_until_flushed(self):
+        self.assertEqual(self.like(), {'action': 'liked', 'likes_count': 2})
+        self.assertFalse(BlogLike.objects.filter(blog=self.post, user=self.user).exists())
+
+        like_engine.flush()
+        self.post.refresh_from_db()
+        self.assertTrue(BlogLike.objects.filter(blog=self.post, user=self.user).exists())
+        self.assertEqual(self.post.likes_count, 2)
+
+    def test_double_toggle_before_flush_writes_nothing(self):
+        self.like()
+        self.assertEqual(self.like(), {'action': 'unliked', 'likes_count': 1})
+        like_engine.flush()
+        self.assertEqual(BlogLike.objects.filter(blog=self.post).count(), 1)
+
+    def test_state_is_rebuilt_from_table_after_reset(self):
+        self.like()
+        like_engine.flush()
+        like_engine.reset()
+        self.assertTrue(like_engine.is_liked(self.post.id, self.user.id))
+        self.assertEqual(like_engine.likes_count(self.post.id), 2)
+
+    def test_page_state_sees_unflushed_likes(self):
+        unloaded = self.create_post(title='Not in Redis')
+        BlogLike.objects.create(blog=unloaded, user=self.user)
+        self.like()
+        self.assertEqual(like_engine.liked_among([self.post.id, unloaded.id], self.user.id), {self.post.id, unloaded.id})
+        self.assertEqual(like_engine.liked_among([self.post.id, unloaded.id], self.other.id), {self.post.id})
+
+    def test_flush_drops_likes_of_deleted_accounts(self):
+        gone = Profile.objects.create_user(email='gone@example.com', password='secret123')
+        like_engine.toggle(self.post.id, gone.id)
+        self.like()
+        gone.delete()
+        self.assertEqual(like_engine.flush(), 2)
+        self.assertFalse(like_engine.client.exists(like_engine.flushing_key))
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.likes_count, 2)
+        self.assertEqual(set(BlogLike.objects.filter(blog=self.post).values_list('user_id', flat=True)), {self.other.id, self.user.id})
+
+
+@override_settings(CACHES=LOCMEM_CACHE)
+class ThreadedCommentTests(ExploreTestCase):
+    def setUp(self):
+        super().setUp()
+        self.post = self.create_post()
+
+    def comment(self, content, parent=None):
+        data = {'content': content}
+        if parent is not None:
+            data['parent'] = parent
+        response = self.client.post(f'/api/v1/explore/blogs/{self.post.id}/comments/', data, format='json')
+        self.assertEqual(response.status_code, 201, response.data)
+        return response.data
+
+    def test_top_level_comments_are_cursor_paginated(self):
+        for i in range(25):
+            Comment.objects.create(blog=self.post, user=self.user, content=f'c{i}')
+        self.client.post('/api/v1/auth/authenticated/')  # warm the user cache
+        with self.assertNumQueries(2):  # post lookup + page, no COUNT
+            first = self.client.get(f'/api/v1/explore/blogs/{self.post.id}/comments/')
+        self.assertEqual(len(first.data['results']), 20)
+        self.assertTrue(first.data['results'][0]['can_delete'])
+        second = self.client.get(first.data['next'])
+        self.assertEqual(len(second.data['results']), 5)
+        self.assertIsNone(second.data['next'])
+        ids = [row['id'] for row in first.data['results'] + second.data['results']]
+        self.assertEqual(ids, list(Comment.objects.order_by('-created_at', '-id').values_list('id', flat=True)))
+
+    def test_replies_roll_up_and_load_as_one_subtree(self):
+        root = self.comment('root')
+        child = self.comment('child', parent=root['id'])
+        grandchild = self.comment('grandchild', parent=child['id'])
+        sibling = self.comment('sibling', parent=root['id'])
+        other = self.comment('other root')
+
+        listing = self.client.get(f'/api/v1/explore/blogs/{self.post.id}/comments/').data['results']
+        self.assertEqual([row['id'] for row in listing], [other['id'], root['id']])
+        self.assertEqual(listing[1]['replies_count'], 3)
+        self.assertEqual(grandchild['depth'], 2)
+
+        replies = self.client.get(f"/api/v1/explore/blogs/comments/{root['id']}/replies/").data['results']
+        self.assertEqual([row['id'] for row in replies], [child['id'], grandchild['id'], sibling['id']])
+
+        response = self.client.delete(f"/api/v1/explore/blogs/comments/{child['id']}/")
+        self.assertEqual(response.status_code, 204)
+        self.assertEqual(Comment.objects.get(pk=root['id']).replies_count, 1)
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.comments_count, 3)
+
+    def test_reply_must_stay_on_the_same_post(self):
+        foreign = Comment.objects.create(blog=self.create_post(), user=self.user, content='elsewhere')
+        response = self.client.post(
+            f'/api/v1/explore/blogs/{self.post.id}/comments/', {'content': 'x', 'parent': foreign.id}, format='json'
+        )
+        self.assertEqual(response.status_code, 400)
+
+
+@override_settings(CACHES=LOCMEM_CACHE)
+class PersonalFeedTests(ExploreTestCase):
+    def setUp(self):
+        super().setUp()
+        if personal_feed.enabled:
+            personal_feed.reset()
+        self.user.interests.set([self.travel])
+
+    def feed(self, url='/api/v1/explore/for-you/'):
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def test_feed_only_holds_interest_categories(self):
+        self.create_post(category=self.tech, title='Tech')
+        trips = [self.create_post(category=self.travel, title=f'Trip {i}') for i in range(11)]
+        first = self.feed()
+        self.assertEqual([row['id'] for row in first['results']], [post.id for post in reversed(trips[2:])])
+        second = self.feed(first['next'])
+        self.assertEqual([row['id'] for row in second['results']], [trips[1].id, trips[0].id])
+        self.assertIsNone(second['next'])
+
+    def use_redis(self):
+        client = patch.object(personal_feed, '_client', fakeredis.FakeRedis(decode_responses=True))
+        client.start()
+        self.addCleanup(client.stop)
+
+    def test_warm_feed_gets_fan_out_and_serves_from_redis(self):
+        self.use_redis()
+        self.create_post(category=self.travel, title='Old trip')
+        self.feed()  # builds the list from the category list
+        self.assertTrue(personal_feed.client.exists(personal_feed.user_key(self.user.id)))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            fresh = self.create_post(category=self.travel, title='New trip')
+        # Publishing only queues the fan-out; the worker adds the post to user lists.
+        self.assertNotEqual(personal_feed.client.zrevrange(personal_feed.user_key(self.user.id), 0, 0), [str(fresh.id)])
+        call_command('fan_out_feeds', stdout=StringIO())
+        self.assertEqual(personal_feed.client.zrevrange(personal_feed.user_key(self.user.id), 0, 0), [str(fresh.id)])
+        self.assertEqual(personal_feed.client.zcard(personal_feed.fanout_key), 0)
+
+        self.client.post('/api/v1/auth/authenticated/')  # warm the user cache
+        with self.assertNumQueries(2):  # the id__in fetch and the viewer's likes
+            data = self.feed()
+        self.assertEqual(data['results'][0]['id'], fresh.id)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            fresh.show = False
+            fresh.save()
+        self.assertIsNone(personal_feed.client.zscore(personal_feed.category_key(self.travel.id), fresh.id))
+        self.assertNotIn(fresh.id, [row['id'] for row in self.feed()['results']])
+
+    def test_feed_without_interests_reads_the_global_list(self):
+        self.use_redis()
+        self.user.interests.clear()
+        old = self.create_post(category=self.tech, title='Old')
+        self.assertEqual([row['id'] for row in self.feed()['results']], [old.id])
+        self.assertFalse(personal_feed.client.exists(personal_feed.user_key(self.user.id)))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            fresh = self.create_post(category=self.travel, title='New')
+        # No fan-out has run: the warm feed sees the post through the global list.
+        self.assertEqual([row['id'] for row in self.feed()['results']], [fresh.id, old.id])
+
+        self.user.interests.set([self.travel])
+        self.assertEqual([row['id'] for row in self.feed()['results']], [fresh.id])
+
+    def test_feed_of_empty_categories_is_built_once(self):
+        self.use_redis()
+        self.feed()  # builds an empty list
+        self.assertFalse(personal_feed.client.exists(personal_feed.user_key(self.user.id)))
+        self.client.post('/api/v1/auth/authenticated/')  # warm the user cache
+        with self.assertNumQueries(0):
+            self.assertEqual(self.feed()['results'], [])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            trip = self.create_post(category=self.travel, title='First trip')
+        call_command('fan_out_feeds', stdout=StringIO())
+        self.assertEqual([row['id'] for row in self.feed()['results']], [trip.id])
+        self.assertGreater(personal_feed.client.ttl(personal_feed.user_key(self.user.id)), 0)
+
+
+@override_settings(CACHES=LOCMEM_CACHE, TRENDING_HALF_LIFE_HOURS=24, LIKE_WRITE_BEHIND=False)
+class TrendingTests(ExploreTestCase):
+    def setUp(self):
+        super().setUp()
+        self.readers = [Profile.objects.create_user(email=f'fan{i}@example.com') for i in range(3)]
+
+    def like(self, post, reader, hours_ago=0):
+        like = BlogLike.objects.create(blog=post, user=reader)
+        BlogLike.objects.filter(pk=like.pk).update(liked_at=timezone.now() - timedelta(hours=hours_ago))
+
+    def trending_ids(self):
+        response = self.client.get('/api/v1/explore/blogs/?sort_by=trending&pagination=cursor')
+        return [row['id'] for row in response.data['results']]
+
+    def test_recent_activity_outranks_older_activity(self):
+        old, recent, quiet = self.create_post(title='Old'), self.create_post(title='Recent'), self.create_post()
+        for reader in self.readers:
+            self.like(old, reader, hours_ago=72)  # 3 likes, three half-lives ago
+        self.like(recent, self.readers[0])
+        self.assertEqual(trending_engine.refresh(), 2)
+        self.assertEqual(self.trending_ids(), [recent.id, old.id])
+        self.assertNotIn(quiet.id, self.trending_ids())
+
+    @override_settings(TRENDING_REFRESH_OVERLAP=0)
+    def test_refresh_only_rescores_posts_with_new_activity(self):
+        post, other = self.create_post(), self.create_post()
+        self.like(post, self.readers[0])
+        trending_engine.refresh()
+        score = PostRank.objects.get(post=post).score
+
+        self.like(other, self.readers[1])
+        self.assertEqual(trending_engine.refresh(), 1)
+        self.assertEqual(PostRank.objects.get(post=post).score, score)
+
+        Comment.objects.create(blog=post, user=self.readers[2], content='Nice')
+        trending_engine.refresh()
+        self.assertGreater(PostRank.objects.get(post=post).score, score)
+        self.assertEqual(trending_engine.refresh(), 0)
+
+    def test_refresh_picks_up_rows_that_commit_late(self):
+        post = self.create_post()
+        # The id of a like whose transaction is still open during the first run.
+        reserved = BlogLike.objects.create(blog=post, user=self.readers[1])
+        reserved_id = reserved.pk
+        reserved.delete()
+        self.like(post, self.readers[0])
+        trending_engine.refresh()
+        score = PostRank.objects.get(post=post).score
+
+        BlogLike.objects.create(id=reserved_id, blog=post, user=self.readers[1])
+        last_run = TrendingCheckpoint.objects.get().scanned_until
+        BlogLike.objects.filter(pk=reserved_id).update(liked_at=last_run - timedelta(seconds=1))
+        self.assertEqual(trending_engine.refresh(), 1)
+        score_with_late_like = PostRank.objects.get(post=post).score
+        self.assertGreater(score_with_late_like, score)
+        trending_engine.refresh()  # re-scores the window again without counting anything twice
+        self.assertEqual(PostRank.objects.get(post=post).score, score_with_late_like)
+
+    def test_a_like_counts_once_however_often_it_is_toggled(self):
+        post = self.create_post()
+        url = f'/api/v1/explore/blogs/{post.id}/like/'
+        self.client.post(url)
+        trending_engine.refresh()
+        for _ in range(3):
+            self.client.post(url)  # unlike
+            self.client.post(url)  # like again
+        trending_engine.refresh()
+        liked_at = BlogLike.objects.get(blog=post).liked_at
+        self.assertAlmostEqual(PostRank.objects.get(post=post).score, trending_engine.level(liked_at))
+
+    def test_removed_likes_and_comments_stop_counting(self):
+        post = self.create_post()
+        like_url = f'/api/v1/explore/blogs/{post.id}/like/'
+        self.client.post(like_url)
+        comment = self.client.post(f'/api/v1/explore/blogs/{post.id}/comments/', {'content': 'Nice'}, format='json')
+        trending_engine.refresh()
+
+        self.client.delete(f"/api/v1/explore/blogs/comments/{comment.data['id']}/")
+        self.assertTrue(PostRank.objects.get(post=post).stale)
+        trending_engine.refresh()
+        rank = PostRank.objects.get(post=post)
+        self.assertFalse(rank.stale)
+        self.assertAlmostEqual(rank.score, trending_engine.level(BlogLike.objects.get(blog=post).liked_at))
+
+        self.client.post(like_url)  # unlike
+        trending_engine.refresh()
+        self.assertFalse(PostRank.objects.filter(post=post).exists())
+
+    def test_stale_posts_are_pruned(self):
+        post = self.create_post()
+        self.like(post, self.readers[0], hours_ago=24 * 10)
+        trending_engine.refresh()
+        self.assertFalse(PostRank.objects.exists())
+
+
+@override_settings(CACHES=LOCMEM_CACHE, REDIS_URL=None)
+class BenchmarkTests(TestCase):
+    def test_seeded_scenarios_run_without_errors(self):
+        dataset = Dataset(users=5, posts=12, categories=2, comments_per_post=4, likes_per_post=3)
+        staff = dataset.seed_database(batch_size=5)
+        self.assertEqual(BlogPost.objects.count(), 12)
+        self.assertEqual(Comment.objects.filter(parent__isnull=False).count(), 12)
+        reader = Profile.objects.get(email=dataset.email(0))
+        results = Runner(requests=3, warmup=1).run(reader, staff)
+        self.assertEqual({name for name, result in results.items() if result['errors']}, set())
+        self.assertEqual(results['admin-users']['max_queries'], 1)
+
+    def test_compare_flags_latency_and_query_regressions(self):
+        baseline = {'explore-list': {'p95_ms': 10.0, 'max_queries': 2, 'errors': 0}}
+        self.assertEqual(compare({'explore-list': {'p95_ms': 12.4, 'max_queries': 2, 'errors': 0}}, baseline, 0.25), [])
+        self.assertEqual(len(compare({'explore-list': {'p95_ms': 13.0, 'max_queries': 3, 'errors': 0}}, baseline, 0.25)), 2)
+
+
+class AsyncURLConf:
+    urlpatterns = [path('api/v1/explore/', include(explore_patterns(use_async=True)))]
+
+
+@override_settings(CACHES=LOCMEM_CACHE, ROOT_URLCONF=AsyncURLConf)
+class AsyncViewTests(ExploreTestCase):
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        self.async_client.cookies['access_token'] = self.client.cookies['access_token'].value
+
+    def get(self, url):
+        response = async_to_sync(self.async_client.get)(url)
+        return response, response.json()
+
+    def test_list_pages_and_caches_like_the_sync_view(self):
+        posts = [self.create_post(title=f'Post {i}') for i in range(12)]
+        response, data = self.get('/api/v1/explore/blogs/')
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual(data['count'], 12)
+        self.assertEqual([row['id'] for row in data['results']], [post.id for post in reversed(posts)][:9])
+        self.assertTrue(data['next'].endswith('?page=2'))
+        response, cached = self.get('/api/v1/explore/blogs/')
+        self.assertEqual(response['X-Cache'], 'HIT')
+        self.assertEqual(cached, data)
+        response, data = self.get('/api/v1/explore/blogs/?pagination=cursor&page_size=5')
+        self.assertEqual(len(data['results']), 5)
+        self.assertIn('cursor=', data['next'])
+        response, data = self.get('/api/v1/explore/blogs/?page=9')
+        self.assertEqual(response.status_code, 404)
+
+    def test_detail_and_comments(self):
+        post = self.create_post()
+        BlogLike.objects.create(blog=post, user=self.user)
+        Comment.objects.create(blog=post, user=self.user, content='First')
+        response, data = self.get(f'/api/v1/explore/blogs/{post.id}/')
+        self.assertEqual(data['id'], post.id)
+        self.assertTrue(data['is_liked'])
+        self.assertEqual(data['category']['name'], 'Tech')
+        response, data = self.get(f'/api/v1/explore/blogs/{post.id}/comments/')
+        self.assertEqual([row['content'] for row in data['results']], ['First'])
+        self.assertTrue(data['results'][0]['can_delete'])
+        draft = self.create_post(status='draft')
+        self.assertEqual(self.get(f'/api/v1/explore/blogs/{draft.id}/')[0].status_code, 404)
+
+    def test_posting_a_comment_falls_back_to_the_sync_view(self):
+        post = self.create_post()
+        response = async_to_sync(self.async_client.post)(
+            f'/api/v1/explore/blogs/{post.id}/comments/', {'content': 'Hello'}, content_type='application/json'
+        )
+        self.assertEqual(response.status_code, 201)
+        post.refresh_from_db()
+        self.assertEqual(post.comments_count, 1)
+
+    def test_requires_authentication(self):
+        self.async_client.cookies.clear()
+        response = async_to_sync(self.async_client.get)('/api/v1/explore/blogs/')
+        self.assertEqual(response.status_code, 401)
+        self.assertIn('WWW-Authenticate', response)
+
+
+REPLICA = (settings.DATABASE_REPLICAS or [None])[0]
+
+
+@skipUnless(REPLICA, "replica routing needs a second database in DATABASE_REPLICAS")
+@override_settings(CACHES=LOCMEM_CACHE)
+class ReplicaRoutingTests(TransactionTestCase):
+    # TestCase wraps each test in a transaction on the primary, which keeps every read there.
+    databases = {'default', REPLICA} if REPLICA else {'default'}
+
+    def setUp(self):
+        cache.clear()
+        user_cache.clear()
+        replica_health.reset()
+        self.user = Profile.objects.create_user(email='reader@example.com', password='secret123', first_name='Reader')
+        self.post = BlogPost.objects.create(
+            author=self.user, title='Post', content='Body', category=ContentCategory.objects.create(name='Tech'),
+            status='published', thumbnail='https://example.com/thumb.png',
+        )
+        self.client = APIClient()
+        self.client.cookies['access_token'] = str(RefreshToken.for_user(self.user).access_token)
+
+    def get(self, url):
+        with CaptureQueriesContext(connections['default']) as primary, CaptureQueriesContext(connections[REPLICA]) as replica:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(primary), len(replica)
+
+    def test_list_views_read_from_the_replica(self):
+        primary, replica = self.get('/api/v1/explore/blogs/')
+        self.assertEqual(primary, 0)
+        self.assertGreater(replica, 0)
+        primary, replica = self.get('/api/v1/user/blogs/user/')
+        self.assertEqual(primary, 0)
+        self.assertGreater(replica, 0)
+        primary, replica = self.get(f'/api/v1/explore/blogs/{self.post.id}/')
+        self.assertEqual(replica, 0)
+
+    def test_writes_pin_reads_to_the_primary(self):
+        response = self.client.post(f'/api/v1/explore/blogs/{self.post.id}/comments/', {'content': 'Hello'})
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.cookies[PIN_COOKIE]['max-age'], settings.DATABASE_REPLICA_PIN_SECONDS)
+        primary, replica = self.get(f'/api/v1/explore/blogs/{self.post.id}/comments/')
+        self.assertGreater(primary, 0)
+        self.assertEqual(replica, 0)
+
+    def test_unhealthy_replica_falls_back_to_the_primary(self):
+        self.assertTrue(replica_health.check(REPLICA))
+        replica_health.mark(REPLICA, False)
+        primary, replica = self.get('/api/v1/explore/blogs/')
+        self.assertGreater(primary, 0)
+        self.assertEqual(replica, 0)
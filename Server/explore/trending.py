@@ -0,0 +1,136 @@
+import math
+from datetime import datetime, timedelta, timezone as dt_timezone
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from cms_project.Loggin.logger import logger
+from users.models import BlogLike, Comment
+from .cache import feed_cache
+from .models import PostRank, TrendingCheckpoint
+
+EPOCH = datetime(2025, 1, 1, tzinfo=dt_timezone.utc)
+
+
+def log2_add(a, b):
+    """log2(2**a + 2**b) without overflowing."""
+    high, low = max(a, b), min(a, b)
+    return high + math.log1p(2 ** (low - high)) / math.log(2)
+
+
+class TrendingEngine:
+    """
+    Time-decayed activity ranking.
+
+    Every like and comment adds `weight * 2 ** ((t - EPOCH) / half_life)` to its
+    post; PostRank.score stores log2 of that sum. Dividing by the same
+    `2 ** ((now - EPOCH) / half_life)` for every post gives the decayed score at
+    `now`, so the ordering by the stored value never goes stale and a refresh
+    only has to re-score the posts with BlogLike / Comment rows created since
+    the last checkpoint. A post is scored from its current rows, so a like
+    counts once per user however often it is toggled, and removing a like or
+    comment marks the post stale (`mark_stale`) for the next refresh. Rows
+    whose decayed score falls below TRENDING_MIN_SCORE are pruned, which keeps
+    the table to the posts that are actually trending.
+
+    A row is stamped before its transaction commits, so one stamped just before
+    a refresh can become visible only after it. Each refresh therefore also
+    re-scores the posts with activity in the TRENDING_REFRESH_OVERLAP seconds
+    before the previous run.
+    """
+
+    @property
+    def half_life(self):
+        return getattr(settings, 'TRENDING_HALF_LIFE_HOURS', 24) * 3600
+
+    @property
+    def like_weight(self):
+        return getattr(settings, 'TRENDING_LIKE_WEIGHT', 1.0)
+
+    @property
+    def comment_weight(self):
+        return getattr(settings, 'TRENDING_COMMENT_WEIGHT', 2.0)
+
+    @property
+    def min_score(self):
+        return getattr(settings, 'TRENDING_MIN_SCORE', 0.05)
+
+    @property
+    def overlap(self):
+        return timedelta(seconds=getattr(settings, 'TRENDING_REFRESH_OVERLAP', 300))
+
+    def level(self, moment):
+        return (moment - EPOCH).total_seconds() / self.half_life
+
+    @property
+    def horizon(self):
+        """How far back an event can still lift a post above TRENDING_MIN_SCORE."""
+        return timedelta(
+            seconds=self.half_life * math.log2(max(self.like_weight, self.comment_weight) / self.min_score)
+        )
+
+    def mark_stale(self, *post_ids):
+        """Have the next refresh re-score `post_ids`, after a like or comment of theirs was removed."""
+        PostRank.objects.filter(post_id__in=post_ids, stale=False).update(stale=True)
+
+    def refresh(self, full=False, batch_size=1000):
+        """
+        Re-score the posts with activity since the last run and the posts marked
+        stale. With `full`, rebuild the table for every post with activity
+        recent enough to still count. Returns the number of posts re-scored.
+        """
+        now = timezone.now()
+        horizon = now - self.horizon
+        floor = self.level(now) + math.log2(self.min_score)
+        with transaction.atomic():
+            checkpoint, _ = TrendingCheckpoint.objects.select_for_update().get_or_create(pk=1)
+            if full:
+                PostRank.objects.all().delete()
+            since = horizon
+            if not full and checkpoint.scanned_until is not None:
+                since = max(horizon, checkpoint.scanned_until - self.overlap)
+
+            post_ids = set(
+                BlogLike.objects.filter(liked_at__gte=since).order_by().values_list('blog_id', flat=True).distinct()
+            )
+            post_ids.update(
+                Comment.objects.filter(created_at__gte=since).order_by().values_list('blog_id', flat=True).distinct()
+            )
+            # Locked so a removal marking one of them stale again waits for this run.
+            post_ids.update(PostRank.objects.select_for_update().filter(stale=True).values_list('post_id', flat=True))
+
+            post_ids = sorted(post_ids)
+            for start in range(0, len(post_ids), batch_size):
+                chunk = post_ids[start:start + batch_size]
+                scores = {}
+                self._accumulate(
+                    scores, BlogLike.objects.filter(blog_id__in=chunk, liked_at__gte=horizon).order_by()
+                    .values_list('blog_id', 'liked_at'), self.like_weight, batch_size,
+                )
+                self._accumulate(
+                    scores, Comment.objects.filter(blog_id__in=chunk, created_at__gte=horizon).order_by()
+                    .values_list('blog_id', 'created_at'), self.comment_weight, batch_size,
+                )
+                PostRank.objects.filter(post_id__in=chunk).exclude(post_id__in=scores).delete()
+                PostRank.objects.bulk_create(
+                    [PostRank(post_id=post_id, score=score, stale=False) for post_id, score in scores.items()],
+                    update_conflicts=True, unique_fields=['post'], update_fields=['score', 'stale', 'updated_at'],
+                )
+
+            pruned, _ = PostRank.objects.filter(score__lt=floor).delete()
+            checkpoint.scanned_until = now
+            checkpoint.save()
+
+            if post_ids or pruned:
+                transaction.on_commit(feed_cache.invalidate)
+
+        logger.debug(f"Trending refresh re-scored {len(post_ids)} post(s), pruned {pruned}")
+        return len(post_ids)
+
+    def _accumulate(self, scores, events, weight, batch_size):
+        offset = math.log2(weight)
+        for post_id, moment in events.iterator(chunk_size=batch_size):
+            score = self.level(moment) + offset
+            scores[post_id] = log2_add(scores[post_id], score) if post_id in scores else score
+
+
+trending_engine = TrendingEngine()
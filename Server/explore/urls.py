@@ -1,10 +1,25 @@
-from django.urls import path
-from .views import *
-
-urlpatterns = [
-    path('blogs/', BlogExploretListView.as_view(), name='explore_blogs'),
-    path('blogs/<int:id>/', BlogPostDetailView.as_view(), name='blog-detail'),
-    path('blogs/<int:id>/like/', ToggleLikeView.as_view(), name='toggle-like'),
-    path('blogs/<int:id>/comments/', CommentsListView.as_view(), name='comments-list'),
-    path('blogs/comments/<int:comment_id>/', CommentDetailView.as_view(), name='comment-detail'),
-]
+from django.conf import settings
+from django.urls import path
+from .views import *
+from .async_views import AsyncBlogExploreListView, AsyncBlogPostDetailView, AsyncCommentsListView
+
+
+def explore_patterns(use_async=False):
+    """The explore routes, with the read-heavy views in their async versions when `use_async`."""
+    if use_async:
+        list_view, detail_view, comments_view = AsyncBlogExploreListView, AsyncBlogPostDetailView, AsyncCommentsListView
+    else:
+        list_view, detail_view, comments_view = BlogExploretListView, BlogPostDetailView, CommentsListView
+    return [
+        path('blogs/', list_view.as_view(), name='explore_blogs'),
+        path('facets/', ExploreFacetsView.as_view(), name='explore-facets'),
+        path('for-you/', PersonalFeedView.as_view(), name='personal-feed'),
+        path('blogs/<int:id>/', detail_view.as_view(), name='blog-detail'),
+        path('blogs/<int:id>/like/', ToggleLikeView.as_view(), name='toggle-like'),
+        path('blogs/<int:id>/comments/', comments_view.as_view(), name='comments-list'),
+        path('blogs/comments/<int:comment_id>/', CommentDetailView.as_view(), name='comment-detail'),
+        path('blogs/comments/<int:comment_id>/replies/', CommentRepliesView.as_view(), name='comment-replies'),
+    ]
+
+
+urlpatterns = explore_patterns(getattr(settings, 'EXPLORE_ASYNC_VIEWS', False))
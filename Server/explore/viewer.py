@@ -0,0 +1,72 @@
+"""
+Viewer state: what depends on who is looking at a page of posts or
+comments, i.e. `is_liked`, `is_author` and `can_edit` / `can_delete`.
+
+It is resolved for a whole page at once: one `blog_id__in` query for the
+viewer's likes (or one Redis pipeline with write-behind likes), whatever
+the page size. The explore feed cache stores pages without viewer state,
+shared by every user, and the state is overlaid on the cached page per
+request (see `overlay`).
+"""
+from asgiref.sync import sync_to_async
+from users.models import BlogLike
+from .conditional import make_etag
+from .likes import like_engine
+
+
+class ViewerState:
+    def __init__(self, user, liked=(), post_authors=None):
+        self.user_id = user.id if user is not None and user.is_authenticated else None
+        self.liked = frozenset(liked)
+        # Post id -> author id, for the comment permissions.
+        self.post_authors = post_authors or {}
+
+    @classmethod
+    def resolve(cls, user, post_ids, post_authors=None):
+        post_ids = list(post_ids)
+        liked = ()
+        if post_ids and user is not None and user.is_authenticated:
+            if like_engine.enabled:
+                liked = like_engine.liked_among(post_ids, user.id)
+            else:
+                liked = BlogLike.objects.filter(user_id=user.id, blog_id__in=post_ids).values_list('blog_id', flat=True)
+        return cls(user, liked, post_authors)
+
+    @classmethod
+    async def aresolve(cls, user, post_ids, post_authors=None):
+        """resolve() for async views."""
+        post_ids = list(post_ids)
+        liked = ()
+        if post_ids and user is not None and user.is_authenticated:
+            if like_engine.enabled:
+                liked = await sync_to_async(like_engine.liked_among)(post_ids, user.id)
+            else:
+                likes = BlogLike.objects.filter(user_id=user.id, blog_id__in=post_ids).values_list('blog_id', flat=True)
+                liked = [blog_id async for blog_id in likes]
+        return cls(user, liked, post_authors)
+
+    def is_liked(self, post_id):
+        return post_id in self.liked
+
+    def is_author(self, author_id):
+        return self.user_id is not None and author_id == self.user_id
+
+    def can_edit(self, comment):
+        """A comment can be edited and deleted by its writer and by the author of its post."""
+        if self.user_id is None:
+            return False
+        blog_author_id = self.post_authors.get(comment.blog_id)
+        if blog_author_id is None:
+            blog_author_id = comment.blog.author_id
+        return comment.user_id == self.user_id or blog_author_id == self.user_id
+
+    def overlay(self, posts):
+        """Copies of serialized posts (BlogExploreSerializer data) with this viewer's state."""
+        return [
+            {**post, 'is_liked': self.is_liked(post['id']), 'is_author': self.is_author(post['author']['id'])}
+            for post in posts
+        ]
+
+    def etag(self, etag):
+        """The ETag of a shared page as this viewer sees it."""
+        return make_etag(etag, self.user_id, *sorted(self.liked))
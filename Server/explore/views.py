@@ -1,97 +1,240 @@
-from rest_framework.views import APIView
-from rest_framework.response import Response
-from rest_framework import status
-from rest_framework.permissions import AllowAny, IsAuthenticated
+from rest_framework.views import APIView
+from rest_framework.response import Response
+from rest_framework import status
+from rest_framework.permissions import AllowAny, IsAuthenticated
+from rest_framework.exceptions import NotFound
+from rest_framework.utils.urls import replace_query_param
 from users.models import BlogPost, BlogLike, Comment
-from .serializers import BlogExploreSerializer, BlogPostDetailSerializer, CommentSerializer
-from .filters import BlogPostFilter
-from django.db.models import Count
-from .pagination import *
-
-class BlogExploretListView(APIView):
-    permission_classes = [IsAuthenticated]
-
-    def get(self, request):
-        try:
-            queryset = BlogPost.objects.filter(status='published', show=True).annotate(
-                likes_count=Count('likes'),
-                comments_count=Count('comments') )
-
-            filterset = BlogPostFilter(request.GET, queryset=queryset)
-            if not filterset.is_valid():
-                return Response(filterset.errors, status=status.HTTP_400_BAD_REQUEST)
-
-            filtered_queryset = filterset.qs
-            paginator = BlogPostPagination()
-            paginated_queryset = paginator.paginate_queryset(filtered_queryset, request)
-            serializer = BlogExploreSerializer(paginated_queryset, many=True)
-
-            return paginator.get_paginated_response(serializer.data)
-
-        except Exception as e:
-            return Response( {'error': str(e)},
-                status=status.HTTP_500_INTERNAL_SERVER_ERROR )
-            
+from .serializers import BlogExploreSerializer, BlogPostDetailSerializer, CommentSerializer, explore_list_values
+from .filters import BlogPostFilter
+from .cache import feed_cache
+from .facets import FILTER_PARAMS, facet_counts
+from .conditional import conditional_response, page_etag, post_etag
+from .likes import like_engine
+from .viewer import ViewerState
+from .feeds import personal_feed
+from .trending import trending_engine
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.db.models.functions import Greatest
+from cms_project.Loggin.logger import logger
+import redis
+from .pagination import *
+
+class BlogExploretListView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        try:
+            cache_key = feed_cache.build_key(request)
+            (data, response_status, etag), hit = feed_cache.get_or_set(cache_key, lambda: self.get_page(request))
+            if etag is None:
+                response = Response(data, status=response_status)
+            else:
+                # The cached page is shared by every user; the viewer's state goes on top.
+                viewer = ViewerState.resolve(request.user, [post['id'] for post in data['results']])
+                data = {**data, 'results': viewer.overlay(data['results'])}
+                response = conditional_response(request, viewer.etag(etag), build=lambda: data)
+            response['X-Cache'] = 'HIT' if hit else 'MISS'
+            return response
+
+        except NotFound as e:
+            return Response({'error': str(e.detail)}, status=status.HTTP_404_NOT_FOUND)
+        except Exception as e:
+            return Response( {'error': str(e)},
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR )
+
+    def get_page(self, request):
+        queryset = BlogPost.objects.filter(status='published', show=True).select_related('author', 'category').order_by('-created_at')
+
+        filterset = BlogPostFilter(request.GET, queryset=queryset)
+        if not filterset.is_valid():
+            return (filterset.errors, status.HTTP_400_BAD_REQUEST, None), False
+
+        filtered_queryset = filterset.qs
+        if BlogPostCursorPagination.is_requested(request):
+            paginator = BlogPostCursorPagination()
+        else:
+            paginator = BlogPostPagination()
+        if settings.FAST_SERIALIZATION:
+            page = paginator.paginate_queryset(explore_list_values.queryset(filtered_queryset), request)
+            results = explore_list_values.serialize(page)
+        else:
+            paginated_queryset = paginator.paginate_queryset(filtered_queryset, request)
+            results = BlogExploreSerializer(paginated_queryset, many=True).data
+        data = paginator.get_paginated_response(results).data
+
+        return (data, status.HTTP_200_OK, page_etag(data)), True
+            
+class ExploreFacetsView(APIView):
+    """
+    Category and tag chips with their post counts. Unfiltered counts come
+    from the rollup tables; with `search`, `category` or `tags` the matching
+    posts are counted and the result cached briefly (explore/facets.py).
+    """
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        params = {name: request.query_params[name] for name in FILTER_PARAMS if name in request.query_params}
+        if not facet_counts.is_filtered(params):
+            return Response(facet_counts.read(), status=status.HTTP_200_OK)
+
+        queryset = BlogPost.objects.filter(status='published', show=True)
+        filterset = BlogPostFilter(params, queryset=queryset)
+        if not filterset.is_valid():
+            return Response(filterset.errors, status=status.HTTP_400_BAD_REQUEST)
+        facets, hit = facet_counts.get_or_count(params, filterset.qs)
+        response = Response(facets, status=status.HTTP_200_OK)
+        response['X-Cache'] = 'HIT' if hit else 'MISS'
+        return response
+
+class PersonalFeedView(APIView):
+    """
+    Posts from the categories the user picked as interests, newest first.
+    Pages come from the user's precomputed Redis list (one sorted-set read and
+    one id__in fetch); without Redis they are queried directly.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        paginator = BlogPostPagination()
+        page_size = paginator.get_page_size(request)
+        try:
+            page = int(request.query_params.get('page', 1))
+            if page < 1:
+                raise ValueError
+        except ValueError:
+            return Response({'error': 'Invalid page.'}, status=status.HTTP_404_NOT_FOUND)
+        offset = (page - 1) * page_size
+
+        posts = None
+        if personal_feed.enabled:
+            try:
+                post_ids, has_more = personal_feed.page(request.user, offset, page_size)
+                by_id = BlogPost.objects.filter(
+                    id__in=post_ids, status='published', show=True
+                ).select_related('author', 'category').in_bulk()
+                posts = [by_id[post_id] for post_id in post_ids if post_id in by_id]
+            except redis.RedisError:
+                logger.exception("Personal feed read failed")
+        if posts is None:
+            posts, has_more = self.query_page(request.user, offset, page_size)
+
+        viewer = ViewerState.resolve(request.user, [post.id for post in posts])
+        serializer = BlogExploreSerializer(posts, many=True, context={'request': request, 'viewer': viewer})
+        url = request.build_absolute_uri()
+        return Response({
+            'next': replace_query_param(url, 'page', page + 1) if has_more else None,
+            'previous': replace_query_param(url, 'page', page - 1) if page > 1 else None,
+            'results': serializer.data,
+        })
+
+    def query_page(self, user, offset, page_size):
+        queryset = BlogPost.objects.filter(status='published', show=True)
+        category_ids = list(user.interests.values_list('id', flat=True))
+        if category_ids:
+            queryset = queryset.filter(category_id__in=category_ids)
+        posts = list(
+            queryset.select_related('author', 'category').order_by('-created_at', '-id')[offset:offset + page_size + 1]
+        )
+        return posts[:page_size], len(posts) > page_size
+
 class BlogPostDetailView(APIView):
+    """A post, answered with a 304 and no serialization when the client's ETag is still current."""
     permission_classes = [IsAuthenticated]
 
     def get(self, request, id):
         try:
-            blog_post = BlogPost.objects.get(id=id, status='published', show=True)
-            serializer = BlogPostDetailSerializer(blog_post, context={'request': request})
-            return Response(serializer.data)
+            blog_post = BlogPost.objects.select_related('author', 'category').get(id=id, status='published', show=True)
         except BlogPost.DoesNotExist:
             return Response(
                 {"error": "Blog post not found."},
                 status=status.HTTP_404_NOT_FOUND
-            )
-            
+            )
+        viewer = ViewerState.resolve(request.user, [blog_post.id])
+        context = {'request': request, 'viewer': viewer}
+        return conditional_response(
+            request, post_etag(blog_post, request.user.id, viewer.is_liked(blog_post.id)), blog_post.updated_at,
+            build=lambda: BlogPostDetailSerializer(blog_post, context=context).data,
+        )
+            
 class ToggleLikeView(APIView):
     permission_classes = [IsAuthenticated]
 
     def post(self, request, id):
+        if like_engine.enabled:
+            return self.toggle_write_behind(request, id)
         try:
-            blog_post = BlogPost.objects.get(id=id, status='published', show=True)
-            user = request.user
-
-            like, created = BlogLike.objects.get_or_create(blog=blog_post, user=user)
-
-            if not created:
-                like.delete()
-                action = "unliked"
-            else:
-                action = "liked"
-
-            likes_count = blog_post.likes.count()
-            return Response({"action": action, "likes_count": likes_count})
-
-        except BlogPost.DoesNotExist:
-            return Response(
-                {"error": "Blog post not found."},
-                status=status.HTTP_404_NOT_FOUND
-            )
-
+            with transaction.atomic():
+                blog_post = BlogPost.objects.select_for_update(of=('self',)).select_related('category').get(
+                    id=id, status='published', show=True)
+                user = request.user
+
+                like, created = BlogLike.objects.get_or_create(blog=blog_post, user=user)
+
+                if not created:
+                    like.delete()
+                    trending_engine.mark_stale(blog_post.pk)
+                    action = "unliked"
+                    BlogPost.objects.filter(pk=blog_post.pk).update(likes_count=Greatest(F('likes_count') - 1, 0))
+                    likes_count = max(blog_post.likes_count - 1, 0)
+                else:
+                    action = "liked"
+                    BlogPost.objects.filter(pk=blog_post.pk).update(likes_count=F('likes_count') + 1)
+                    likes_count = blog_post.likes_count + 1
+                feed_cache.invalidate_post(blog_post)
+
+            return Response({"action": action, "likes_count": likes_count})
+
+        except BlogPost.DoesNotExist:
+            return Response(
+                {"error": "Blog post not found."},
+                status=status.HTTP_404_NOT_FOUND
+            )
+
+    def toggle_write_behind(self, request, id):
+        if not BlogPost.objects.filter(id=id, status='published', show=True).exists():
+            return Response(
+                {"error": "Blog post not found."},
+                status=status.HTTP_404_NOT_FOUND
+            )
+        action, likes_count = like_engine.toggle(id, request.user.id)
+        return Response({"action": action, "likes_count": likes_count})
+
 class CommentsListView(APIView):
     permission_classes = [IsAuthenticated]
 
     def get(self, request, id):
-        try:
-            blog_post = BlogPost.objects.get(id=id, status='published', show=True)
-            comments = Comment.objects.filter(blog=blog_post).select_related('user', 'blog__author').order_by('-created_at')
-            serializer = CommentSerializer(comments, many=True, context={'request': request})
-            return Response(serializer.data)
-        except BlogPost.DoesNotExist:
+        author_id = BlogPost.objects.filter(id=id, status='published', show=True).values_list('author_id', flat=True).first()
+        if author_id is None:
             return Response(
                 {"error": "Blog post not found."},
                 status=status.HTTP_404_NOT_FOUND
-            )
-
+            )
+        comments = (
+            Comment.objects.filter(blog_id=id, parent__isnull=True)
+            .select_related('user')
+            .order_by('-created_at', '-id')
+        )
+        paginator = CommentCursorPagination()
+        page = paginator.paginate_queryset(comments, request, view=self)
+        viewer = ViewerState(request.user, post_authors={id: author_id})
+        serializer = CommentSerializer(page, many=True, context={'request': request, 'viewer': viewer})
+        return paginator.get_paginated_response(serializer.data)
+
     def post(self, request, id):
         try:
-            blog_post = BlogPost.objects.get(id=id, status='published', show=True)
-            serializer = CommentSerializer(data=request.data, context={'request': request})
+            blog_post = BlogPost.objects.select_related('category').get(id=id, status='published', show=True)
+            serializer = CommentSerializer(data=request.data, context={'request': request, 'blog': blog_post})
             if serializer.is_valid():
-                comment = serializer.save(blog=blog_post, user=request.user)
+                with transaction.atomic():
+                    comment = serializer.save(blog=blog_post, user=request.user)
+                    ancestors = comment.ancestor_ids()
+                    if ancestors:
+                        Comment.objects.filter(id__in=ancestors).update(replies_count=F('replies_count') + 1)
+                    BlogPost.objects.filter(pk=blog_post.pk).update(comments_count=F('comments_count') + 1)
+                    feed_cache.invalidate_post(blog_post)
                 response_serializer = CommentSerializer(comment, context={'request': request})
                 return Response(response_serializer.data, status=status.HTTP_201_CREATED)
             return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
@@ -101,12 +244,34 @@ class CommentsListView(APIView):
                 status=status.HTTP_404_NOT_FOUND
             )
 
+class CommentRepliesView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, comment_id):
+        try:
+            comment = (
+                Comment.objects.select_related('blog').only('id', 'blog_id', 'path', 'blog__author_id')
+                .get(id=comment_id, blog__status='published', blog__show=True)
+            )
+        except Comment.DoesNotExist:
+            return Response(
+                {"error": "Comment not found."},
+                status=status.HTTP_404_NOT_FOUND
+            )
+        # The whole subtree in thread order: one range scan over (blog, path).
+        replies = comment.subtree().exclude(pk=comment.pk).select_related('user').order_by('path')
+        paginator = CommentCursorPagination()
+        page = paginator.paginate_queryset(replies, request, view=self)
+        viewer = ViewerState(request.user, post_authors={comment.blog_id: comment.blog.author_id})
+        serializer = CommentSerializer(page, many=True, context={'request': request, 'viewer': viewer})
+        return paginator.get_paginated_response(serializer.data)
+
 class CommentDetailView(APIView):
     permission_classes = [IsAuthenticated]
 
     def get_object(self, comment_id):
         try:
-            return Comment.objects.select_related('user', 'blog__author').get(
+            return Comment.objects.select_related('user', 'blog__author', 'blog__category').get(
                 id=comment_id,
                 blog__status='published',
                 blog__show=True
@@ -154,5 +319,8 @@ class CommentDetailView(APIView):
                 status=status.HTTP_403_FORBIDDEN
             )
 
-        comment.delete()
+        with transaction.atomic():
+            comment.delete_thread()
+            trending_engine.mark_stale(comment.blog_id)
+            feed_cache.invalidate_post(comment.blog)
         return Response(status=status.HTTP_204_NO_CONTENT)
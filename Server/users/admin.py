@@ -1,7 +1,8 @@
-from django.contrib import admin
-from .models import ContentCategory, BlogPost, BlogLike, Comment
-
-admin.site.register(ContentCategory)
-admin.site.register(BlogPost)
-admin.site.register(BlogLike)
-admin.site.register(Comment)
\ No newline at end of file
+from django.contrib import admin
+from .models import ContentCategory, BlogPost, BlogLike, Comment, ImportCheckpoint
+
+admin.site.register(ContentCategory)
+admin.site.register(BlogPost)
+admin.site.register(BlogLike)
+admin.site.register(Comment)
+admin.site.register(ImportCheckpoint)
\ No newline at end of file
@@ -0,0 +1,35 @@
+from django.contrib.postgres.indexes import GinIndex, OpClass
+from django.db import connections
+from django.db.models import Index
+
+POSTGRES_EXTENSIONS = ('pg_trgm',)
+
+
+class PostgresGinIndex(GinIndex):
+    """
+    GIN index on PostgreSQL. On other backends (the SQLite test database) it is
+    created as a plain index, without operator classes, so the schema still builds.
+    """
+
+    def create_sql(self, model, schema_editor, using="", **kwargs):
+        if schema_editor.connection.vendor != 'postgresql':
+            expressions = [
+                expression.get_source_expressions()[0] if isinstance(expression, OpClass) else expression
+                for expression in self.expressions
+            ]
+            index = Index(*expressions, fields=self.fields, name=self.name, condition=self.condition)
+            return index.create_sql(model, schema_editor, using=using, **kwargs)
+        return super().create_sql(model, schema_editor, using=using, **kwargs)
+
+
+def create_postgres_extensions(sender, using='default', **kwargs):
+    """
+    pre_migrate handler installing the extensions the indexes above rely on
+    (gin_trgm_ops needs pg_trgm) before any table is created.
+    """
+    connection = connections[using]
+    if connection.vendor != 'postgresql':
+        return
+    with connection.cursor() as cursor:
+        for name in POSTGRES_EXTENSIONS:
+            cursor.execute(f'CREATE EXTENSION IF NOT EXISTS {name}')
@@ -0,0 +1,30 @@
+import sys
+from django.core.management.base import BaseCommand
+from users.models import BlogPost
+from users.transfer import export_posts
+
+
+class Command(BaseCommand):
+    help = "Stream blog posts with their comments and likes as JSON Lines (one post per line)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--output', '-o', default='-', help="File to write to ('-' for stdout).")
+        parser.add_argument('--chunk-size', type=int, default=1000)
+        parser.add_argument('--status', choices=[choice for choice, _ in BlogPost.STATUS_CHOICES])
+
+    def handle(self, *args, **options):
+        queryset = BlogPost.objects.all()
+        if options['status']:
+            queryset = queryset.filter(status=options['status'])
+
+        output = options['output']
+        stream = sys.stdout if output == '-' else open(output, 'w', encoding='utf-8')
+        exported = 0
+        try:
+            for line in export_posts(queryset, chunk_size=options['chunk_size']):
+                stream.write(line)
+                exported += 1
+        finally:
+            if stream is not sys.stdout:
+                stream.close()
+        self.stderr.write(self.style.SUCCESS(f"Exported {exported} post(s)."))
@@ -0,0 +1,75 @@
+import json
+import os
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from explore.cache import feed_cache
+from explore.facets import facet_counts
+from explore.feeds import personal_feed
+from explore.search import update_search_vector
+from users.models import BlogPost, ImportCheckpoint
+from users.transfer import FORMAT_VERSION, PostImporter
+
+
+class Command(BaseCommand):
+    help = (
+        "Import a JSON Lines file written by export_posts. Posts are inserted in batches and the "
+        "last line of each batch is checkpointed in the same transaction, so an interrupted import "
+        "continues with --resume."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('input')
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--create-users', action='store_true',
+                            help="Create missing authors/commenters (inactive, no password) instead of skipping their content.")
+        parser.add_argument('--checkpoint', help="Checkpoint name (defaults to the absolute path of the input).")
+        parser.add_argument('--resume', action='store_true', help="Skip the lines committed by a previous run.")
+
+    def handle(self, *args, **options):
+        path = options['input']
+        checkpoint = options['checkpoint'] or os.path.abspath(path)
+        batch_size = options['batch_size']
+        done = 0
+        if options['resume']:
+            done = ImportCheckpoint.objects.filter(source=checkpoint).values_list('line', flat=True).first() or 0
+        importer = PostImporter(create_users=options['create_users'], batch_size=batch_size)
+
+        def flush(records, line_number):
+            # The checkpoint commits with the batch, so a resumed run never imports a line twice.
+            with transaction.atomic():
+                post_ids = importer.import_batch(records)
+                update_search_vector(BlogPost.objects.filter(pk__in=post_ids))
+                ImportCheckpoint.objects.update_or_create(source=checkpoint, defaults={'line': line_number})
+
+        line_number = 0
+        records = []
+        with open(path, encoding='utf-8') as stream:
+            for line_number, line in enumerate(stream, start=1):
+                if line_number <= done or not line.strip():
+                    continue
+                try:
+                    record = json.loads(line)
+                except ValueError as e:
+                    raise CommandError(f"Line {line_number}: {e}")
+                if record.get('version') != FORMAT_VERSION:
+                    raise CommandError(f"Line {line_number}: unsupported format version {record.get('version')!r}.")
+                records.append(record)
+                if len(records) >= batch_size:
+                    flush(records, line_number)
+                    records = []
+            if records:
+                flush(records, line_number)
+
+        ImportCheckpoint.objects.filter(source=checkpoint).delete()
+        # The importer writes posts without save(), so the per-save facet updates never ran.
+        facet_counts.rebuild()
+        feed_cache.invalidate()
+        if personal_feed.enabled:
+            personal_feed.reset()
+
+        stats = importer.stats
+        self.stdout.write(self.style.SUCCESS(
+            f"Imported {stats['posts']} post(s), {stats['comments']} comment(s), {stats['likes']} like(s); "
+            f"created {stats['users']} user(s); skipped {stats['skipped_posts']} post(s) and "
+            f"{stats['skipped_comments']} comment(s) with unknown users."
+        ))
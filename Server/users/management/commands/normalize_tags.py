@@ -0,0 +1,40 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from explore.cache import feed_cache
+from users.models import BlogPost
+from users.tags import normalize_tags
+
+
+class Command(BaseCommand):
+    help = "Rewrite BlogPost.tags in their canonical form (see users/tags.py)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--dry-run', action='store_true', help="Report posts with non-canonical tags without writing.")
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        dry_run = options['dry_run']
+
+        changed = 0
+        batch = []
+        for pk, tags in BlogPost.objects.values_list('pk', 'tags').order_by('pk').iterator(chunk_size=batch_size):
+            normalized = normalize_tags(tags)
+            if normalized != tags:
+                batch.append(BlogPost(pk=pk, tags=normalized))
+            if len(batch) >= batch_size:
+                changed += self._flush(batch, dry_run)
+                batch = []
+        if batch:
+            changed += self._flush(batch, dry_run)
+
+        if changed and not dry_run:
+            feed_cache.invalidate()
+        verb = "Found" if dry_run else "Normalized"
+        self.stdout.write(self.style.SUCCESS(f"{verb} the tags of {changed} post(s)."))
+
+    def _flush(self, batch, dry_run):
+        if not dry_run:
+            with transaction.atomic():
+                BlogPost.objects.bulk_update(batch, ['tags'])
+        return len(batch)
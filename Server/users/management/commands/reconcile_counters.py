@@ -0,0 +1,46 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, IntegerField, OuterRef, Q, Subquery, F
+from django.db.models.functions import Coalesce
+from users.models import BlogPost, BlogLike, Comment
+
+
+class Command(BaseCommand):
+    help = "Recompute BlogPost.likes_count / comments_count from the BlogLike and Comment tables and repair any drift."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--dry-run', action='store_true', help="Report drifted posts without writing.")
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        dry_run = options['dry_run']
+
+        likes = BlogLike.objects.filter(blog=OuterRef('pk')).order_by().values('blog').annotate(c=Count('pk')).values('c')
+        comments = Comment.objects.filter(blog=OuterRef('pk')).order_by().values('blog').annotate(c=Count('pk')).values('c')
+
+        drifted = BlogPost.objects.annotate(
+            actual_likes=Coalesce(Subquery(likes, output_field=IntegerField()), 0),
+            actual_comments=Coalesce(Subquery(comments, output_field=IntegerField()), 0),
+        ).filter(
+            ~Q(likes_count=F('actual_likes')) | ~Q(comments_count=F('actual_comments'))
+        ).values_list('pk', 'actual_likes', 'actual_comments').order_by('pk')
+
+        repaired = 0
+        batch = []
+        for pk, actual_likes, actual_comments in drifted.iterator(chunk_size=batch_size):
+            batch.append(BlogPost(pk=pk, likes_count=actual_likes, comments_count=actual_comments))
+            if len(batch) >= batch_size:
+                repaired += self._flush(batch, dry_run)
+                batch = []
+        if batch:
+            repaired += self._flush(batch, dry_run)
+
+        verb = "Found" if dry_run else "Repaired"
+        self.stdout.write(self.style.SUCCESS(f"{verb} {repaired} post(s) with drifted counters."))
+
+    def _flush(self, batch, dry_run):
+        if not dry_run:
+            with transaction.atomic():
+                BlogPost.objects.bulk_update(batch, ['likes_count', 'comments_count'])
+        return len(batch)
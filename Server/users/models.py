@@ -1,50 +1,193 @@
-from django.db import models
-
-class ContentCategory(models.Model):
-    name = models.CharField(max_length=100, unique=True)
-    active = models.BooleanField(default=True)
-    
-    def __str__(self):
-        return self.name
-    
-class BlogPost(models.Model):
-    STATUS_CHOICES = [
-        ('draft', 'Draft'),
-        ('published', 'Published')
-    ]
-    
-    author = models.ForeignKey('authCustom.Profile', on_delete=models.CASCADE, related_name='blog_posts')
-    title = models.CharField(max_length=100)
-    content = models.TextField()
-    excerpt = models.TextField(max_length=500, blank=True)
-    category = models.ForeignKey(ContentCategory, on_delete=models.CASCADE, related_name='blogs')
-    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='draft')
-    tags = models.JSONField(default=list, blank=True)
-    thumbnail = models.URLField(max_length=500)
-    created_at = models.DateTimeField(auto_now_add=True)
-    updated_at = models.DateTimeField(auto_now=True)
-    published_date = models.DateTimeField(auto_now_add=True)
-    show = models.BooleanField(default=True)
-    
-    def __str__(self):
-        return f"{self.author.username} - {self.title[:50]}"
-    
-class Comment(models.Model):
-    blog = models.ForeignKey(BlogPost, on_delete=models.CASCADE, related_name='comments')
-    user = models.ForeignKey('authCustom.Profile', on_delete=models.CASCADE, related_name='comments')
-    content = models.TextField()
-    created_at = models.DateTimeField(auto_now_add=True)
-    
-    def __str__(self):
-        return f"{self.user.username}"
-    
-class BlogLike(models.Model):
-    blog = models.ForeignKey(BlogPost, on_delete=models.CASCADE, related_name='likes')
-    user = models.ForeignKey('authCustom.Profile', on_delete=models.CASCADE, related_name='liked_blogs')
-    liked_at = models.DateTimeField(auto_now_add=True)
-    
-    class Meta:
-        unique_together = ('blog', 'user')
-        
-    def __str__(self):
-        return f"{self.user.username} - {self.blog.title}"
\ No newline at end of file
+from django.db import models, router, transaction
+from django.contrib.postgres.indexes import OpClass
+from django.db.models import F
+from django.db.models.functions import Greatest, Upper
+from django.contrib.postgres.search import SearchVectorField
+from .indexes import PostgresGinIndex
+from .tags import normalize_tags
+
+class ContentCategory(models.Model):
+    name = models.CharField(max_length=100, unique=True)
+    active = models.BooleanField(default=True)
+
+    class Meta:
+        indexes = [
+            # `category__name__iexact` compares UPPER(name).
+            models.Index(Upper('name'), name='category_name_upper_idx'),
+        ]
+    
+    def __str__(self):
+        return self.name
+    
+class BlogPostManager(models.Manager):
+    def get_queryset(self):
+        # The search vector is only read by the database; never ship it to Python.
+        return super().get_queryset().defer('search_vector')
+
+class BlogPost(models.Model):
+    STATUS_CHOICES = [
+        ('draft', 'Draft'),
+        ('published', 'Published')
+    ]
+    
+    author = models.ForeignKey('authCustom.Profile', on_delete=models.CASCADE, related_name='blog_posts')
+    title = models.CharField(max_length=100)
+    content = models.TextField()
+    excerpt = models.TextField(max_length=500, blank=True)
+    category = models.ForeignKey(ContentCategory, on_delete=models.CASCADE, related_name='blogs')
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='draft')
+    tags = models.JSONField(default=list, blank=True)
+    thumbnail = models.URLField(max_length=500)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    published_date = models.DateTimeField(auto_now_add=True)
+    show = models.BooleanField(default=True)
+    likes_count = models.PositiveIntegerField(default=0)
+    comments_count = models.PositiveIntegerField(default=0)
+    search_vector = SearchVectorField(null=True, editable=False)
+    
+    objects = BlogPostManager()
+    
+    class Meta:
+        indexes = [
+            PostgresGinIndex(fields=['search_vector'], name='blogpost_search_vector_gin'),
+            # `tags @> '["python"]'` for the explore `?tags=` filter (users/tags.py).
+            PostgresGinIndex(
+                OpClass('tags', name='jsonb_path_ops'), condition=models.Q(status='published', show=True),
+                name='blogpost_tags_gin',
+            ),
+            # The explore feed (newest first, cursor pages keyed on id) and its `?category=` variant.
+            models.Index(
+                fields=['-created_at', '-id'], condition=models.Q(status='published', show=True),
+                name='blogpost_latest_idx',
+            ),
+            models.Index(
+                fields=['category', '-created_at', '-id'], condition=models.Q(status='published', show=True),
+                name='blogpost_category_latest_idx',
+            ),
+            # A user's own posts, filtered by status and category (UserBlogListView).
+            models.Index(fields=['author', 'status', 'category'], name='blogpost_author_status_idx'),
+            # Explore sorts (`popular`, `most-commented`) over the visible posts.
+            models.Index(
+                fields=['-likes_count', '-created_at', '-id'], condition=models.Q(status='published', show=True),
+                name='blogpost_popular_idx',
+            ),
+            models.Index(
+                fields=['-comments_count', '-created_at', '-id'], condition=models.Q(status='published', show=True),
+                name='blogpost_commented_idx',
+            ),
+        ]
+    
+    def __str__(self):
+        return f"{self.author.username} - {self.title[:50]}"
+
+    def save(self, *args, **kwargs):
+        self.tags = normalize_tags(self.tags)
+        # The explore handlers lock the row before the write and adjust the facet
+        # rollups after it (explore/signals.py, explore/facets.py); one transaction covers all three.
+        with transaction.atomic(using=kwargs.get('using') or router.db_for_write(BlogPost, instance=self)):
+            super().save(*args, **kwargs)
+    
+class Comment(models.Model):
+    # Each path segment is the zero-padded id of a comment on the way down from
+    # the thread root, so a subtree is the contiguous range of paths starting
+    # with its root's path and sorts in thread order.
+    PATH_STEP = 10
+    MAX_DEPTH = 24
+
+    blog = models.ForeignKey(BlogPost, on_delete=models.CASCADE, related_name='comments')
+    user = models.ForeignKey('authCustom.Profile', on_delete=models.CASCADE, related_name='comments')
+    parent = models.ForeignKey('self', on_delete=models.CASCADE, null=True, blank=True, related_name='replies')
+    content = models.TextField()
+    created_at = models.DateTimeField(auto_now_add=True)
+    path = models.CharField(max_length=PATH_STEP * (MAX_DEPTH + 1), blank=True, editable=False)
+    depth = models.PositiveSmallIntegerField(default=0, editable=False)
+    replies_count = models.PositiveIntegerField(default=0, editable=False)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['blog', 'created_at', 'id'], name='comment_blog_created_idx'),
+            # Top-level comments of a post, newest first (CommentsListView).
+            models.Index(
+                fields=['blog', '-created_at', '-id'], condition=models.Q(parent__isnull=True),
+                name='comment_blog_roots_idx',
+            ),
+            models.Index(fields=['blog', 'path'], name='comment_blog_path_idx'),
+            # Recent activity across posts (explore/trending.py).
+            models.Index(fields=['created_at'], name='comment_created_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.user.username}"
+
+    def save(self, *args, **kwargs):
+        adding = self._state.adding
+        if adding and self.parent_id:
+            self.depth = self.parent.depth + 1
+        super().save(*args, **kwargs)
+        if adding and not self.path:
+            # The path ends with our own id, which only exists after the insert.
+            self.path = self.path_segment(self.pk)
+            if self.parent_id:
+                self.path = self.parent.get_path() + self.path
+            Comment.objects.filter(pk=self.pk).update(path=self.path)
+
+    @classmethod
+    def path_segment(cls, pk):
+        return str(pk).zfill(cls.PATH_STEP)
+
+    def get_path(self):
+        # Comments written before threading have no path; they are all roots.
+        if not self.path:
+            self.path = self.path_segment(self.pk)
+            Comment.objects.filter(pk=self.pk).update(path=self.path)
+        return self.path
+
+    def ancestor_ids(self):
+        path = self.get_path()
+        return [int(path[i:i + self.PATH_STEP]) for i in range(0, len(path) - self.PATH_STEP, self.PATH_STEP)]
+
+    def subtree(self):
+        """This comment and all of its replies, as one range over (blog, path)."""
+        path = self.get_path()
+        upper = path + '9' * (self._meta.get_field('path').max_length - len(path))
+        return Comment.objects.filter(blog_id=self.blog_id, path__gte=path, path__lte=upper)
+
+    def delete_thread(self):
+        """
+        Delete this comment with its replies (the FK cascade) and take them off
+        the ancestors' replies_count and the post's comments_count. Call inside
+        a transaction. Returns the number of comments deleted.
+        """
+        ancestors = self.ancestor_ids()
+        removed = self.subtree().count()
+        self.delete()
+        if ancestors:
+            Comment.objects.filter(id__in=ancestors).update(replies_count=Greatest(F('replies_count') - removed, 0))
+        BlogPost.objects.filter(pk=self.blog_id).update(comments_count=Greatest(F('comments_count') - removed, 0))
+        return removed
+    
+class BlogLike(models.Model):
+    blog = models.ForeignKey(BlogPost, on_delete=models.CASCADE, related_name='likes')
+    user = models.ForeignKey('authCustom.Profile', on_delete=models.CASCADE, related_name='liked_blogs')
+    liked_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        unique_together = ('blog', 'user')
+        indexes = [
+            models.Index(fields=['blog', '-liked_at'], name='bloglike_blog_liked_idx'),
+            models.Index(fields=['liked_at'], name='bloglike_liked_idx'),
+        ]
+        
+    def __str__(self):
+        return f"{self.user.username} - {self.blog.title}"
+
+
+class ImportCheckpoint(models.Model):
+    """Last line of an `import_posts` input whose batch has committed, written in that batch's transaction."""
+    source = models.CharField(max_length=1024, unique=True)
+    line = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.source}: line {self.line}"
@@ -0,0 +1,62 @@
+"""
+Post tags.
+
+Tags are stored in BlogPost.tags in a canonical form: case-folded, without
+a leading '#', words joined by '-', and only letters, digits and '+#.-'
+kept, so 'Machine Learning', '#machine_learning' and 'machine-learning'
+are one tag. Posts are normalized on save and on import; the
+`normalize_tags` command rewrites rows stored before that.
+
+Filtering uses JSONB containment (`tags @> '["python"]'`), which the
+blogpost_tags_gin index answers on PostgreSQL. Other databases (the SQLite
+test runs) match the tag's JSON string in the stored text instead.
+"""
+import json
+import re
+from django.db import connections
+from django.db.models import Q
+
+TAG_MAX_LENGTH = 50
+# More tags than this in one filter are ignored.
+MAX_FILTER_TAGS = 10
+
+_SEPARATORS = re.compile(r'[\s_]+')
+_DISALLOWED = re.compile(r'[^\w+#.-]')
+_DASHES = re.compile(r'-{2,}')
+
+
+def normalize_tag(name):
+    """The canonical form of a tag, or '' when nothing is left of it."""
+    tag = _SEPARATORS.sub('-', str(name).strip().casefold().lstrip('#'))
+    tag = _DASHES.sub('-', _DISALLOWED.sub('', tag))
+    return tag.strip('-.')[:TAG_MAX_LENGTH]
+
+
+def normalize_tags(tags):
+    """Canonical tags in their original order, without blanks or duplicates."""
+    if not isinstance(tags, (list, tuple)):
+        return []
+    return list(dict.fromkeys(tag for tag in map(normalize_tag, tags) if tag))
+
+
+def parse_tags(value):
+    """Tags of a `?tags=python,django` query parameter."""
+    return normalize_tags(value.split(','))[:MAX_FILTER_TAGS]
+
+
+def filter_by_tags(queryset, tags, match_all=False):
+    """Posts carrying all of `tags`, or any of them."""
+    if not tags:
+        return queryset
+    if connections[queryset.db].vendor == 'postgresql':
+        if match_all:
+            return queryset.filter(tags__contains=tags)
+        condition = Q()
+        for tag in tags:
+            condition |= Q(tags__contains=[tag])
+        return queryset.filter(condition)
+    conditions = [Q(tags__icontains=json.dumps(tag)) for tag in tags]
+    condition = conditions[0]
+    for other in conditions[1:]:
+        condition = condition & other if match_all else condition | other
+    return queryset.filter(condition)
@@ -0,0 +1,289 @@
+"""
+JSON Lines export / import of blog content (`manage.py export_posts` / `import_posts`).
+
+Each line is one post with its comments and likes nested inside it, so a
+line can be imported on its own: no id mapping has to be kept across lines
+and both directions run in constant memory. Authors, commenters and likers
+are referenced by email, categories by name. Comment `key`s are the source
+ids, only used to link replies to their parent within the same line.
+"""
+import io
+import json
+from collections import defaultdict
+from datetime import datetime
+from django.contrib.auth import get_user_model
+from django.db import connections, transaction
+from django.db.backends.postgresql.psycopg_any import is_psycopg3
+from django.db.models import JSONField
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from .models import BlogLike, BlogPost, Comment, ContentCategory
+from .tags import normalize_tags
+
+FORMAT_VERSION = 1
+
+POST_FIELDS = (
+    'title', 'content', 'excerpt', 'status', 'tags', 'thumbnail', 'show',
+    'created_at', 'updated_at', 'published_date',
+)
+POST_DATETIME_FIELDS = ('created_at', 'updated_at', 'published_date')
+
+
+def _isoformat(value):
+    return value.isoformat() if value is not None else None
+
+
+def export_posts(queryset=None, chunk_size=1000):
+    """Yield one JSON line per post, reading posts through a server-side cursor."""
+    queryset = BlogPost.objects.all() if queryset is None else queryset
+    posts = queryset.order_by('pk').values('pk', 'author__email', 'category__name', *POST_FIELDS)
+
+    batch = []
+    for post in posts.iterator(chunk_size=chunk_size):
+        batch.append(post)
+        if len(batch) >= chunk_size:
+            yield from _export_batch(batch)
+            batch = []
+    if batch:
+        yield from _export_batch(batch)
+
+
+def _export_batch(posts):
+    post_ids = [post['pk'] for post in posts]
+    comments = defaultdict(list)
+    for comment in (
+        Comment.objects.filter(blog_id__in=post_ids)
+        .order_by('blog_id', 'depth', 'id')
+        .values('id', 'blog_id', 'parent_id', 'user__email', 'content', 'created_at')
+    ):
+        comments[comment['blog_id']].append({
+            'key': comment['id'],
+            'parent': comment['parent_id'],
+            'user': comment['user__email'],
+            'content': comment['content'],
+            'created_at': _isoformat(comment['created_at']),
+        })
+    likes = defaultdict(list)
+    for blog_id, email, liked_at in (
+        BlogLike.objects.filter(blog_id__in=post_ids).order_by('blog_id', 'id')
+        .values_list('blog_id', 'user__email', 'liked_at')
+    ):
+        likes[blog_id].append({'user': email, 'liked_at': _isoformat(liked_at)})
+
+    for post in posts:
+        record = {'version': FORMAT_VERSION, 'author': post['author__email'], 'category': post['category__name']}
+        for field in POST_FIELDS:
+            value = post[field]
+            record[field] = _isoformat(value) if field in POST_DATETIME_FIELDS else value
+        record['comments'] = comments.get(post['pk'], [])
+        record['likes'] = likes.get(post['pk'], [])
+        yield json.dumps(record, ensure_ascii=False) + '\n'
+
+
+class PostImporter:
+    """
+    Imports batches of parsed post records.
+
+    Primary keys are reserved up front (from the table's sequence on
+    PostgreSQL), so comment paths, counters and the exported timestamps are
+    all known before anything is written and every row is inserted exactly
+    once: with COPY on PostgreSQL, a multi-row INSERT elsewhere. Unknown
+    categories are created; unknown users are created (inactive, without a
+    usable password) when `create_users` is set and skipped otherwise.
+    """
+
+    def __init__(self, create_users=False, batch_size=1000, using='default'):
+        self.create_users = create_users
+        self.batch_size = batch_size
+        self.connection = connections[using]
+        self.categories = dict(ContentCategory.objects.using(using).values_list('name', 'id'))
+        self.stats = defaultdict(int)
+        self._next_ids = {}
+
+    def import_batch(self, records):
+        """Insert a batch of records in one transaction. Returns the new post ids."""
+        with transaction.atomic(using=self.connection.alias):
+            users = self._resolve_users(records)
+            records = [record for record in records if self._keep(record, users)]
+            now = timezone.now()
+            post_ids = self._reserve_ids(BlogPost, len(records))
+            posts, comments, likes = [], [], []
+            for post_id, record in zip(post_ids, records):
+                post_comments = self._comment_rows(post_id, record.get('comments', ()), users)
+                post_likes = {}
+                for like in record.get('likes', ()):
+                    if like['user'] in users:
+                        post_likes[users[like['user']]] = _parse_datetime(like.get('liked_at'), now)
+                posts.append({
+                    'id': post_id,
+                    'author_id': users[record['author']],
+                    'category_id': self._category_id(record['category']),
+                    'title': record['title'],
+                    'content': record['content'],
+                    'excerpt': record.get('excerpt', ''),
+                    'status': record.get('status', 'draft'),
+                    'tags': normalize_tags(record.get('tags', [])),
+                    'thumbnail': record['thumbnail'],
+                    'show': record.get('show', True),
+                    'created_at': _parse_datetime(record.get('created_at'), now),
+                    'updated_at': _parse_datetime(record.get('updated_at'), now),
+                    'published_date': _parse_datetime(record.get('published_date'), now),
+                    'likes_count': len(post_likes),
+                    'comments_count': len(post_comments),
+                })
+                comments.extend(post_comments)
+                likes.extend({'blog_id': post_id, 'user_id': user_id, 'liked_at': liked_at}
+                             for user_id, liked_at in post_likes.items())
+
+            for comment, comment_id in zip(comments, self._reserve_ids(Comment, len(comments))):
+                comment['id'] = comment_id
+            # Parents precede their replies, so a parent's path is set before it is extended.
+            for comment in comments:
+                parent = comment.pop('parent')
+                comment['parent_id'] = parent['id'] if parent else None
+                comment['path'] = (parent['path'] if parent else '') + Comment.path_segment(comment['id'])
+            for like, like_id in zip(likes, self._reserve_ids(BlogLike, len(likes))):
+                like['id'] = like_id
+
+            self._write(BlogPost, posts)
+            self._write(Comment, comments)
+            self._write(BlogLike, likes)
+
+            self.stats['posts'] += len(posts)
+            self.stats['comments'] += len(comments)
+            self.stats['likes'] += len(likes)
+        return post_ids
+
+    def _keep(self, record, users):
+        if record['author'] in users:
+            return True
+        self.stats['skipped_posts'] += 1
+        return False
+
+    def _comment_rows(self, post_id, records, users):
+        """Comment rows of one post, parents before replies, with depth and replies_count filled in."""
+        by_key = {}
+        for record in records:
+            if record['user'] in users:
+                by_key[record['key']] = record
+            else:
+                self.stats['skipped_comments'] += 1
+        children = defaultdict(list)
+        for record in by_key.values():
+            # Replies to a skipped comment become top-level comments.
+            children[record['parent'] if record['parent'] in by_key else None].append(record)
+
+        rows = []
+
+        def add(record, parent):
+            row = {
+                'blog_id': post_id,
+                'user_id': users[record['user']],
+                'content': record['content'],
+                'created_at': _parse_datetime(record.get('created_at'), timezone.now()),
+                'depth': parent['depth'] + 1 if parent else 0,
+                'parent': parent,
+            }
+            rows.append(row)
+            start = len(rows)
+            for child in children[record['key']]:
+                if row['depth'] < Comment.MAX_DEPTH:
+                    add(child, row)
+            row['replies_count'] = len(rows) - start
+
+        for record in children[None]:
+            add(record, None)
+        return rows
+
+    def _reserve_ids(self, model, count):
+        if not count:
+            return []
+        table = model._meta.db_table
+        with self.connection.cursor() as cursor:
+            if self.connection.vendor == 'postgresql':
+                cursor.execute(
+                    "SELECT nextval(pg_get_serial_sequence(%s, 'id')) FROM generate_series(1, %s)", [table, count]
+                )
+                return [row[0] for row in cursor.fetchall()]
+            # Other backends (SQLite) hand out max(id) + 1, so continue from there.
+            if model not in self._next_ids:
+                cursor.execute(f'SELECT MAX(id) FROM {self.connection.ops.quote_name(table)}')
+                self._next_ids[model] = (cursor.fetchone()[0] or 0) + 1
+        start = self._next_ids[model]
+        self._next_ids[model] = start + count
+        return list(range(start, start + count))
+
+    def _write(self, model, rows):
+        if not rows:
+            return
+        names = list(rows[0])
+        fields = [model._meta.get_field(name) for name in names]
+        columns = ', '.join(self.connection.ops.quote_name(field.column) for field in fields)
+        table = self.connection.ops.quote_name(model._meta.db_table)
+        with self.connection.cursor() as cursor:
+            if self.connection.vendor == 'postgresql':
+                buffer = io.StringIO()
+                for row in rows:
+                    buffer.write('\t'.join(_copy_text(field, row[name]) for name, field in zip(names, fields)) + '\n')
+                statement = f'COPY {table} ({columns}) FROM STDIN'
+                if is_psycopg3:
+                    with cursor.copy(statement) as copy:
+                        copy.write(buffer.getvalue())
+                else:
+                    buffer.seek(0)
+                    cursor.copy_expert(statement, buffer)
+                return
+            values = [
+                [field.get_db_prep_save(row[name], self.connection) for name, field in zip(names, fields)] for row in rows
+            ]
+            per_statement = max(1, self.connection.ops.bulk_batch_size(fields, rows))
+            placeholders = '(' + ', '.join(['%s'] * len(fields)) + ')'
+            for start in range(0, len(values), per_statement):
+                chunk = values[start:start + per_statement]
+                cursor.execute(
+                    f'INSERT INTO {table} ({columns}) VALUES ' + ', '.join([placeholders] * len(chunk)),
+                    [value for row in chunk for value in row],
+                )
+
+    def _category_id(self, name):
+        if name not in self.categories:
+            self.categories[name] = ContentCategory.objects.using(self.connection.alias).get_or_create(name=name)[0].pk
+        return self.categories[name]
+
+    def _resolve_users(self, records):
+        emails = set()
+        for record in records:
+            emails.add(record['author'])
+            emails.update(comment['user'] for comment in record.get('comments', ()))
+            emails.update(like['user'] for like in record.get('likes', ()))
+        User = get_user_model()
+        manager = User._default_manager.db_manager(self.connection.alias)
+        users = dict(manager.filter(email__in=emails).values_list('email', 'id'))
+        missing = emails - users.keys()
+        if missing and self.create_users:
+            new_users = [User(email=email, is_active=False) for email in missing]
+            for user in new_users:
+                user.set_unusable_password()
+            manager.bulk_create(new_users, batch_size=self.batch_size)
+            users.update(manager.filter(email__in=missing).values_list('email', 'id'))
+            self.stats['users'] += len(missing)
+        return users
+
+
+def _parse_datetime(value, default):
+    return parse_datetime(value) if value else default
+
+
+def _copy_text(field, value):
+    """A value in COPY's text format."""
+    if value is None:
+        return '\\N'
+    if isinstance(value, bool):
+        return 't' if value else 'f'
+    if isinstance(field, JSONField):
+        value = json.dumps(value)
+    elif isinstance(value, datetime):
+        value = value.isoformat()
+    return (
+        str(value).replace('\\', '\\\\').replace('\t', '\\t').replace('\n', '\\n').replace('\r', '\\r')
+    )